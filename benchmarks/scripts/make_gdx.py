@@ -341,7 +341,11 @@ def load_data(tableFile, settingsFile, parameters):
     
     INPUTS:
         tableFile       = Excel CSV spreadsheet where each row is a barrier and 
-            columns are barrier attribute data
+            columns are barrier attribute data. May instead be a dictionary
+            mapping column names to sequences (lists or arrays) of values,
+            one per barrier (e.g. from make_columns() of
+            s1_prepare_data.py), in which case the columns are used as they
+            are, without writing and parsing a CSV.
             
         settingsFile    = Excel CSV file with parameters not indexed by barrier 
             and column designations in tableFile. Required columns are 
@@ -468,15 +472,23 @@ def load_data(tableFile, settingsFile, parameters):
             inTable.add(i)
         i += 1
         
-    # read in data from table file based on definitions
-    reader = csv.reader(open(tableFile, 'r'))
-    columns = reader.next()
-    c2I = dict((columns[i], i) for i in xrange(len(columns)))
-    for row in reader:
-        for i in inTable:
-            entryColumn = data[i][3]
-            value = row[c2I[entryColumn]]
-            data[i][4].append(value)
+    # read in data from table file based on definitions, or take the
+    #   columns straight from a dictionary of columns
+    if isinstance(tableFile, dict):
+        def column(k):
+            values = tableFile[k]
+            if hasattr(values, 'tolist'): return values.tolist() # arrays
+            else: return list(values)
+        for i in inTable: data[i][4] = column(data[i][3])
+    else:
+        reader = csv.reader(open(tableFile, 'r'))
+        columns = reader.next()
+        c2I = dict((columns[i], i) for i in xrange(len(columns)))
+        for row in reader:
+            for i in inTable:
+                entryColumn = data[i][3]
+                value = row[c2I[entryColumn]]
+                data[i][4].append(value)
 
     # add data to parameter objects, converting to the proper data format
     #   as we go
@@ -40,30 +40,58 @@ def make_table(barriers, fields, outFile):
     OUTPUTS:
         outFile, which is an Excel-style CSV to be processed by make_gdx.py
     """
+    return write_table(make_columns(barriers, fields), outFile)
+    
+    
+    
+# ~~ make_columns() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def make_columns(barriers, fields):
+    """
+    MAKE_COLUMNS() exports data from the hydrodatabase like make_table(), but
+    keeps them in memory as columns that load_data() of make_gdx.py takes in
+    place of table.csv, so that the values are never written to and parsed
+    back from text.
+    
+    INPUTS:
+        barriers    = see make_table()
+        fields      = see make_table()
+        
+    OUTPUTS:
+        dictionary mapping output field names to lists of values, one per
+        barrier (in the order of the barriers dataset)
+    """
     
     # imports
-    import arcpy, csv
+    import arcpy
     
     # loop over the database file, getting data out and adding derived data
     #   for the output
-    data = []
     outFields = fields.keys()
+    columns = dict((k, []) for k in outFields)
     inFields = list(set().union(*[fields[k][0] for k in fields]))
     f2I = dict((inFields[i], i) for i in xrange(len(inFields)))
     with arcpy.da.SearchCursor(barriers, inFields) as cursor:
         for row in cursor: # each barrier
-            data.append([])
             for outField in outFields: # each piece of info to output
                 inFieldVals = [row[f2I[k]] for k in fields[outField][0]]
-                outFieldVal = fields[outField][1](*inFieldVals)
-                data[-1].append(outFieldVal)
+                columns[outField].append(fields[outField][1](*inFieldVals))
                 
-    # write output and finish
+    return columns
+    
+    
+    
+# ~~ write_table() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def write_table(columns, outFile):
+    """
+    WRITE_TABLE() writes columns made by make_columns() to the CSV made by
+    make_table(), and returns outFile
+    """
+    import csv
+    outFields = columns.keys()
     writer = csv.writer(open(outFile, 'wb'))
     writer.writerow(outFields)
-    for row in data:
+    for row in zip(*[columns[k] for k in outFields]):
         writer.writerow(row)
-    
     return outFile
     
 
@@ -138,7 +166,7 @@ def main():
     from make_gdx import make_gdx, read_gms, load_data, prune_barriers
     from hydrography.hydrography import Hydrography
     from hydrography.load_data import load_hydro_mdb
-    import os
+    import os, threading
     
     
     
@@ -156,6 +184,7 @@ def main():
     # other parameters
     bidColumn = 'BID'
     dsidColumn = 'BID_DS'
+    writeTable = True # keep a copy of the data in tableCSV (written in the background)
     
     # get hydrography to map from bids to species presence
     hydrodata = load_hydro_mdb(hydroMDB)
@@ -200,19 +229,28 @@ def main():
 
     
     
-    # make table.csv
-    make_table(barriers, fields, tableCSV)
+    # get the table columns, writing table.csv for the record while the
+    #   gdx's are made
+    columns = make_columns(barriers, fields)
+    if writeTable:
+        writer = threading.Thread(target=write_table, args=(columns, tableCSV))
+        writer.start()
     
-    # load the gams parameter definitions from the gams model file
-    gamsParameters = read_gms(gmsFile)
+    try:
     
-    # load the data from tables and definitions file
-    data = load_data(tableCSV, defFile, gamsParameters)
+        # load the gams parameter definitions from the gams model file
+        gamsParameters = read_gms(gmsFile)
+        
+        # load the data from the table columns and definitions file
+        data = load_data(columns, defFile, gamsParameters)
+            
+        # make the gdx's for every model run
+        print '\n'.join(make_gdx(
+            data, outFolder, parameters=gamsParameters, zip=False
+        ))
         
-    # make the gdx's for every model run
-    print '\n'.join(make_gdx(
-        data, outFolder, parameters=gamsParameters, zip=False
-    ))
+    finally:
+        if writeTable: writer.join()
     
     
 if __name__ == '__main__':
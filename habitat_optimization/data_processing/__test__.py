@@ -0,0 +1,322 @@
+# This file contains tests for the data processing scripts
+
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+#
+#   usage: python __test__.py [-v]
+#
+#   The tests write a small network to a temporary directory and make its
+#   GDXs with the numpy backend of gdx_io.py, so GAMS is not needed.
+
+# small network: four barriers on one river (barrier 4 a candidate without
+#   any effect), two runs of a budget sweep and one run that changes a
+#   weight
+TST_TABLE = '\n'.join((
+    'BID,BID_DS,ROOT,CAN,COST,PB1,PB2,PC1,PC2,HB1,HB2,HC2',
+    '1,-1,1,1,10,0.5,0.5,0.5,0.5,100,50,-40',
+    '2,1,0,1,20,0.2,0.2,0.8,0.8,80,40,-30',
+    '3,1,0,1,5,0.9,0.3,0.1,0.7,60,20,-10',
+    '4,2,0,1,7,1,1,0,0,10,5,0',
+)) + '\n'
+TST_DEFINITIONS = '\n'.join((
+    '"Run","Symbol","Values","Values is Column Name"',
+    '"","Barriers","BID","yes"',
+    '"","Targets","Fish1,Lamprey","no"',
+    '"","Guilds","G1,G2","no"',
+    '"","Projects","removal","no"',
+    '"","BudgetNames","main","no"',
+    '"","Downstream(Barriers)","BID_DS","yes"',
+    '"","TargetToGuild(Fish1,G1)","yes","no"',
+    '"","TargetToGuild(Lamprey,G2)","yes","no"',
+    '"","GuildsBeneficiary","G1","no"',
+    '"","GuildsControl","G2","no"',
+    '"","ProjectsPassability","removal","no"',
+    '"","ProjectToBudget(removal,main)","yes","no"',
+    '"","isCandidate(Barriers,removal)","CAN","yes"',
+    '"","isRoot(Barriers)","ROOT","yes"',
+    '"","passBase(Barriers,G1)","PB1","yes"',
+    '"","passBase(Barriers,G2)","PB2","yes"',
+    '"","passChange(Barriers,removal,G1)","PC1","yes"',
+    '"","passChange(Barriers,removal,G2)","PC2","yes"',
+    '"","benefitMaxBase(Barriers,Fish1)","HB1","yes"',
+    '"","benefitMaxBase(Barriers,Lamprey)","HB2","yes"',
+    '"","benefitMaxChange(Barriers,removal,Lamprey)","HC2","yes"',
+    '"","cost(Barriers,removal)","COST","yes"',
+    '"","budget(main)","10","no"',
+    '"","weight(Fish1)","1","no"',
+    '"","weight(Lamprey)","1","no"',
+    '"","cap(Fish1)","0","no"',
+    '"","cap(Lamprey)","1000","no"',
+    '"","obj2Weight","-1","no"',
+    '"1-2","budget(main)","10:20:2","no"',
+    '"3","weight(Fish1)","2","no"',
+)) + '\n'
+TST_GMS = ('..', 'optimization', 'Habitat_Opt.gms')
+
+
+
+# ~~ raises() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def raises(func, *args, **kwargs):
+    """RAISES() returns the exception raised by func(*args, **kwargs), or None."""
+    try: func(*args, **kwargs)
+    except Exception as e: return e
+    return None
+
+
+
+# ~~ check() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def check(tests, namespace, verbose=False):
+    """
+    CHECK() evaluates test expressions in [namespace] and returns the number
+    that failed
+    """
+    failures = 0
+    for test in tests:
+        try:
+            result = eval(test, globals(), namespace)
+            if result == True:
+                if verbose: print 'PASSED: %s' % test
+            else:
+                print 'FAILED: %s' % test
+                failures += 1
+        except Exception as e:
+            print 'FAILED with Exception (%s): %s' % (str(e), test)
+            failures += 1
+    return failures
+
+
+
+# ~~ network() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def network(folder, definitions=''):
+    """
+    NETWORK() writes the test network to [folder], with any more lines of
+    [definitions], and returns (parameters, data) as read by read_gms() and
+    load_data()
+    """
+    import os
+    from make_gdx import read_gms, load_data
+    tableFile = os.path.join(folder, 'table.csv')
+    defFile = os.path.join(folder, 'definitions.csv')
+    with open(tableFile, 'w') as fh: fh.write(TST_TABLE)
+    with open(defFile, 'w') as fh: fh.write(TST_DEFINITIONS + definitions)
+    thisdir = os.path.dirname(os.path.abspath(__file__))
+    parameters = read_gms(os.path.join(thisdir, *TST_GMS))
+    return (parameters, load_data(tableFile, defFile, parameters))
+
+
+
+# ~~ test_read_gms() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_read_gms(verbose=False):
+    """TEST_READ_GMS() tests read_gms() on the model and its variants."""
+    import os
+    from make_gdx import read_gms, DMN_DIM
+    thisdir = os.path.dirname(os.path.abspath(__file__))
+    model = read_gms(os.path.join(thisdir, *TST_GMS))
+    domains = read_gms(os.path.join(thisdir, *(TST_GMS[:-1] + ('Habitat_Opt_Domains.gms',))))
+    tests = (
+        "[name for name in DMN_DIM if name in model] == []", # only with the domains option
+        "[name for name in DMN_DIM if not domains[name].external] == []", # declared and loaded by the variant
+        "domains['ActivePass'].indices == ['J', 'P', 'G']",
+        "sorted([n for n in domains if n not in DMN_DIM]) == sorted(model)", # the rest is the same model
+        "model['passChange'].external and not model['Candidates'].external",
+    )
+    return check(tests, locals(), verbose)
+
+
+
+# ~~ test_make_gdx() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_make_gdx(verbose=False):
+    """TEST_MAKE_GDX() tests make_gdx() and its manifest of GDX hashes."""
+    import os, shutil, tempfile
+    from make_gdx import make_gdx, read_manifest
+    folder = tempfile.mkdtemp()
+    try:
+        parameters, data = network(folder)
+        outdir = os.path.join(folder, 'gdxs')
+        os.makedirs(outdir)
+        made = make_gdx(data, outdir, parameters=parameters, backend='numpy')
+        names = [os.path.basename(f) for f in made]
+        manifest = read_manifest(outdir)
+        skipped = make_gdx(data, outdir, parameters=parameters, backend='numpy', skip=True)
+
+        # a gdx that can not be written (here a directory is in its way)
+        #   fails the call, and is not recorded as made
+        os.remove(os.path.join(outdir, 'data_run2.npz'))
+        os.makedirs(os.path.join(outdir, 'data_run2.npz'))
+        error = raises(make_gdx, data, outdir, parameters=parameters, backend='numpy')
+        afterError = read_manifest(outdir)
+
+        tests = (
+            "names == ['data_all.npz', 'data_run1.npz', 'data_run2.npz', 'data_run3.npz']", # a gdx per run after the default
+            "sorted(manifest) == sorted(names)", # every gdx is in the manifest
+            "skipped == []", # unchanged gdxs are skipped
+            "error is not None", # a failed write is raised
+            "'data_run2.npz' not in afterError", # and is not in the manifest
+            "afterError.get('data_run1.npz') == manifest['data_run1.npz']", # gdxs written before it are
+        )
+        return check(tests, locals(), verbose)
+    finally:
+        shutil.rmtree(folder, True)
+
+
+
+# ~~ test_features() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_features(verbose=False):
+    """TEST_FEATURES() tests the size features make_gdx() writes for each GDX."""
+    import os, shutil, tempfile
+    from make_gdx import make_gdx, read_features, MAK_FEA, FEA_CAN, FEA_TGT
+    folder = tempfile.mkdtemp()
+    try:
+        parameters, data = network(folder)
+        outdir = os.path.join(folder, 'gdxs')
+        os.makedirs(outdir)
+        make_gdx(data, outdir, parameters=parameters, backend='numpy')
+        serial = read_features(outdir)
+
+        # skipped gdxs keep their features, and the file is left alone
+        featureFile = os.path.join(outdir, MAK_FEA)
+        os.utime(featureFile, (0, 0))
+        make_gdx(data, outdir, parameters=parameters, backend='numpy', skip=True)
+        untouched = os.path.getmtime(featureFile) == 0
+
+        # the workers find the same features
+        shutil.rmtree(outdir)
+        os.makedirs(outdir)
+        make_gdx(data, outdir, parameters=parameters, backend='numpy', workers=2)
+        pooled = read_features(outdir)
+        tests = (
+            "sorted(serial) == ['data_run1.npz', 'data_run2.npz', 'data_run3.npz']", # not the default gdx
+            "serial['data_run1.npz'][FEA_CAN] == 4", # candidates
+            "abs(serial['data_run2.npz'][FEA_TGT] - 20. / 42.) < 1e-9", # budget over total cost
+            "untouched",
+            "pooled == serial",
+        )
+        return check(tests, locals(), verbose)
+    finally:
+        shutil.rmtree(folder, True)
+
+
+
+# ~~ test_validate() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_validate(verbose=False):
+    """TEST_VALIDATE() tests the checks of make_gdx() on the data of each run."""
+    import os, shutil, tempfile
+    from make_gdx import make_gdx, read_manifest, RunData, symbol_modes, validate_run
+    folder = tempfile.mkdtemp()
+    try:
+
+        # run 4 can take barrier 2 past a passability of 1 for G1
+        parameters, data = network(folder, '"4","passChange(2,removal,G1)","0.9","no"\n')
+        outdir = os.path.join(folder, 'gdxs')
+        os.makedirs(outdir)
+        with open(os.path.join(outdir, 'data_run4.npz'), 'w') as fh: fh.write('old')
+        made = make_gdx(data, outdir, parameters=parameters, backend='numpy', delta=True)
+        names = [os.path.basename(f) for f in made]
+        manifest = read_manifest(outdir)
+        pooled = make_gdx(data, outdir, parameters=parameters, backend='numpy', delta=True, workers=2, skip=False)
+        pooledNames = [os.path.basename(f) for f in pooled]
+
+        data = RunData(data)
+        shared = {'data': data, 'modes': symbol_modes(data, True), 'parameters': parameters}
+        default = validate_run(-1, shared)
+        run3 = validate_run(3, shared)
+        run4 = validate_run(4, shared)
+        tests = (
+            "default == []", # the default data are valid
+            "run3 == []", # and so is a run that only changes a weight
+            "len(run4) == 1 and run4[0].startswith('cntEffOOB')", # but not run 4
+            "names == ['data_all.npz', 'data_run1.npz', 'data_run2.npz', 'data_run3.npz']", # run 4 is not written
+            "pooledNames == names", # by the workers either
+            "'data_run4.npz' not in manifest", # nor recorded
+            "not os.path.exists(os.path.join(outdir, 'data_run4.npz'))", # and its old gdx is deleted
+        )
+        return check(tests, locals(), verbose)
+    finally:
+        shutil.rmtree(folder, True)
+
+
+
+# ~~ test_dominance() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_dominance(verbose=False):
+    """TEST_DOMINANCE() tests the dominance presolve (dominated_candidates())."""
+    import shutil, tempfile
+    from make_gdx import RunData, symbol_modes, dominated_candidates
+    folder = tempfile.mkdtemp()
+    try:
+        parameters, data = network(folder)
+        data = RunData(data)
+        shared = {'data': data, 'modes': symbol_modes(data, True), 'parameters': parameters}
+        default = dominated_candidates(-1, shared)
+        run2 = dominated_candidates(2, shared)
+        tests = (
+            "default[2] == 4", # all candidates are counted
+            "default[0] == set([('2', 'removal'), ('4', 'removal')])", # no effect, or over the budget of 10
+            "default[1] == set([('2', 'removal')])", # over budget only
+            "run2[0] == set([('4', 'removal')])", # barrier 2 fits the budget of 20
+            "run2[1] == set()",
+        )
+        return check(tests, locals(), verbose)
+    finally:
+        shutil.rmtree(folder, True)
+
+
+
+# ~~ test_table_io() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_table_io(verbose=False):
+    """
+    TEST_TABLE_IO() tests that chunked reads of table_io.py give the rows of
+    a single csv.reader, with and without quoted fields that span lines
+    """
+    import csv, os, shutil, tempfile
+    from table_io import read_rows, read_columns, TIO_FLT
+    folder = tempfile.mkdtemp()
+    try:
+        plain = os.path.join(folder, 'plain.csv')
+        with open(plain, 'wb') as fh:
+            fh.write(TST_TABLE + '\n'.join('%i,1,0,1,%i,1,1,0,0,1,1,0' % (i, i) for i in xrange(5, 200)) + '\n')
+        quoted = os.path.join(folder, 'quoted.csv')
+        with open(quoted, 'wb') as fh:
+            fh.write('"ID","Note, with comma","Value"\n')
+            for i in xrange(200):
+                fh.write('%i,"line one\nline ""two"" of %i",%i.5\n' % (i, i, i) if i % 7 == 0 else '%i,plain %i,%i\n' % (i, i, i))
+        def reader(path):
+            with open(path, 'rb') as fh: rows = list(csv.reader(fh))
+            return (rows[0], rows[1:])
+        plainRows = [read_rows(plain, workers, 64) for workers in (1, 2)]
+        quotedRows = [read_rows(quoted, workers, 64) for workers in (1, 2)]
+        both = read_rows([plain, quoted], 2, 64)
+        header, columns = read_columns(quoted, ['Value', 'Note, with comma'], {'Value': TIO_FLT}, 2, 64)
+        expected = reader(quoted)
+        tests = (
+            "[r == reader(plain) for r in plainRows] == [True, True]", # split at line breaks
+            "[r == expected for r in quotedRows] == [True, True]", # parsed in one piece
+            "both == [reader(plain), expected]",
+            "header == expected[0]",
+            "columns['Value'].tolist() == [float(row[2]) for row in expected[1]]",
+            "columns['Note, with comma'] == [row[1] for row in expected[1]]",
+        )
+        return check(tests, locals(), verbose)
+    finally:
+        shutil.rmtree(folder, True)
+
+
+
+# ~~ __test__() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def __test__(verbose=False):
+    """__TEST__() runs all tests and returns the number that failed."""
+    failures = 0
+    for test in (
+        test_read_gms, test_make_gdx, test_features, test_validate, test_dominance,
+        test_table_io
+    ):
+        failures += test(verbose)
+    if failures > 0: print '%i test(s) failed.' % failures
+    else: print 'All tests passed.'
+    return failures
+
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(1 if __test__('-v' in sys.argv[1:]) > 0 else 0)
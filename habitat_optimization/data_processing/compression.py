@@ -0,0 +1,286 @@
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+# Description:
+#       This script compresses the files made by make_gdx.py. Compression is
+#   done by a Compressor, which can hand the work to background threads so
+#   that the next GDX is built while the last one is being compressed (zlib
+#   and bz2 release the interpreter lock while they compress). Where the
+#   writer of a file can write to an open file object (e.g. the symbol
+#   archives of the 'numpy' backend of gdx_io.py), the data are written to
+#   memory and compressed from there, so the uncompressed file is never put
+#   on disk.
+#       Three codecs are provided:
+#           'zip'   a zip archive holding the file (ZIP_DEFLATED). Python
+#                   2.7's zipfile always uses zlib's default level.
+#           'gzip'  a gzip stream of the file, at the requested level
+#           'bz2'   a bzip2 stream of the file, at the requested level
+
+# codecs
+CMP_COD_ZIP = 'zip'
+CMP_COD_GZP = 'gzip'
+CMP_COD_BZ2 = 'bz2'
+CMP_EXT = {CMP_COD_ZIP: '.zip', CMP_COD_GZP: '.gz', CMP_COD_BZ2: '.bz2'}
+CMP_DEF_COD = CMP_COD_ZIP
+CMP_DEF_LVL = 6
+CMP_DEF_THR = 1
+CMP_BUF = 1024*1024 # bytes read at a time when compressing a file
+
+
+
+# ~~ compressed_name() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def compressed_name(infile, codec):
+    """
+    COMPRESSED_NAME() returns the name of the compressed file made from
+    [infile]. Zip archives replace the file extension (data_run1.zip) and
+    the other codecs append to it (data_run1.gdx.gz).
+    """
+    import os
+    codec = check_codec(codec)
+    if codec == CMP_COD_ZIP: return os.path.splitext(infile)[0] + CMP_EXT[codec]
+    else: return infile + CMP_EXT[codec]
+
+
+
+# ~~ check_codec() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def check_codec(codec):
+    """CHECK_CODEC() returns the lower-case codec name, or raises ValueError."""
+    if codec.lower() not in CMP_EXT:
+        raise ValueError('Unknown compression codec %s. Use one of %s.' % (
+            codec, ', '.join(sorted(CMP_EXT.keys()))
+        ))
+    return codec.lower()
+
+
+
+# ~~ compress_file() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def compress_file(infile, outfile, codec=CMP_DEF_COD, level=CMP_DEF_LVL, remove=True):
+    """
+    COMPRESS_FILE() compresses a file on disk
+
+    INPUTS:
+        infile      = file to compress
+        outfile     = compressed file to create (see compressed_name())
+        codec       = (optional) one of CMP_EXT. Default is CMP_DEF_COD.
+        level       = (optional) compression level (1-9). Default is
+            CMP_DEF_LVL.
+        remove      = (optional) if True, [infile] is deleted once it has been
+            compressed. Default is True.
+
+    OUTPUTS:
+        (uncompressed bytes, compressed bytes, seconds)
+    """
+
+    import os, shutil, time
+
+    start = time.time()
+    codec = check_codec(codec)
+    if codec == CMP_COD_ZIP:
+        import zipfile
+        zh = zipfile.ZipFile(outfile, 'w', zipfile.ZIP_DEFLATED, True)
+        try: zh.write(infile, os.path.basename(infile))
+        finally: zh.close()
+    else:
+        with open(infile, 'rb') as fi:
+            fo = open_compressed(outfile, codec, level)
+            try: shutil.copyfileobj(fi, fo, CMP_BUF)
+            finally: fo.close()
+    stats = (os.path.getsize(infile), os.path.getsize(outfile), time.time()-start)
+
+    if remove:
+        try: os.remove(infile)
+        except: print 'WARNING: Could not delete %s.' % infile
+
+    return stats
+
+
+
+# ~~ compress_writer() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def compress_writer(write, arcname, outfile, codec=CMP_DEF_COD, level=CMP_DEF_LVL):
+    """
+    COMPRESS_WRITER() compresses the data of a writer without putting the
+    uncompressed file on disk
+
+    INPUTS:
+        write       = function taking an open (binary) file object and
+            writing the uncompressed data to it
+        arcname     = name of the uncompressed file (e.g. inside a zip)
+        outfile     = compressed file to create (see compressed_name())
+        codec       = (optional) see compress_file()
+        level       = (optional) see compress_file()
+
+    OUTPUTS:
+        (uncompressed bytes, compressed bytes, seconds)
+
+    NOTES:
+        o the data are collected in memory and compressed from there, since
+          zip archives need to know the size of an entry before it is
+          written and writers (e.g. NumPy's savez) may need to seek in the
+          file they write to
+    """
+
+    import os, time, cStringIO
+
+    start = time.time()
+    codec = check_codec(codec)
+    buf = cStringIO.StringIO()
+    write(buf)
+    data = buf.getvalue()
+    buf.close()
+    if codec == CMP_COD_ZIP:
+        import zipfile
+        zh = zipfile.ZipFile(outfile, 'w', zipfile.ZIP_DEFLATED, True)
+        info = zipfile.ZipInfo(arcname, time.localtime(start)[:6])
+        info.external_attr = 0644 << 16
+        try: zh.writestr(info, data, zipfile.ZIP_DEFLATED)
+        finally: zh.close()
+    else:
+        fo = open_compressed(outfile, codec, level)
+        try:
+            for i in xrange(0, len(data), CMP_BUF): fo.write(data[i:i+CMP_BUF])
+        finally: fo.close()
+    return (len(data), os.path.getsize(outfile), time.time()-start)
+
+
+
+# ~~ open_compressed() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def open_compressed(outfile, codec, level=CMP_DEF_LVL):
+    """OPEN_COMPRESSED() opens a gzip or bz2 stream for writing."""
+    codec = check_codec(codec)
+    if codec == CMP_COD_GZP:
+        import gzip
+        return gzip.GzipFile(outfile, 'wb', level)
+    elif codec == CMP_COD_BZ2:
+        import bz2
+        return bz2.BZ2File(outfile, 'wb', 0, level)
+    else: raise ValueError('Cannot stream to a %s archive' % codec)
+
+
+
+# ~~ decompress_file() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def decompress_file(infile, outdir=None):
+    """
+    DECOMPRESS_FILE() restores the file compressed into [infile] (codec taken
+    from the extension) to [outdir] (default the directory of [infile]) and
+    returns its path
+    """
+
+    import os, shutil
+
+    if outdir is None: outdir = os.path.dirname(os.path.abspath(infile))
+    root, extension = os.path.splitext(infile)
+    if extension.lower() == CMP_EXT[CMP_COD_ZIP]:
+        import zipfile
+        zh = zipfile.ZipFile(infile, 'r')
+        try:
+            name = zh.namelist()[0]
+            zh.extract(name, outdir)
+        finally: zh.close()
+        return os.path.join(outdir, name)
+    elif extension.lower() == CMP_EXT[CMP_COD_GZP]:
+        import gzip
+        fi = gzip.GzipFile(infile, 'rb')
+    elif extension.lower() == CMP_EXT[CMP_COD_BZ2]:
+        import bz2
+        fi = bz2.BZ2File(infile, 'rb')
+    else: raise ValueError('Unknown compressed file type %s' % infile)
+    outfile = os.path.join(outdir, os.path.basename(root))
+    try:
+        with open(outfile, 'wb') as fo: shutil.copyfileobj(fi, fo, CMP_BUF)
+    finally: fi.close()
+    return outfile
+
+
+
+# ~~ COMPRESSOR ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class Compressor(object):
+    """
+    Compression stage of make_gdx(). Jobs (compress_file() or
+    compress_writer() calls) are run by [threads] background threads, or
+    right away when threads is 0. The queue of waiting jobs is bounded so
+    that the GDX builder can only get a few runs ahead of compression.
+    Totals of uncompressed and compressed bytes and of time spent
+    compressing are kept in self.stats.
+    """
+
+    def __init__(self, codec=CMP_DEF_COD, level=CMP_DEF_LVL, threads=CMP_DEF_THR):
+        import threading, Queue
+        self.codec = check_codec(codec)
+        self.level = level
+        self.stats = [0, 0, 0.] # uncompressed bytes, compressed bytes, seconds
+        self.errors = []
+        self.lock = threading.Lock()
+        self.threads = []
+        self.queue = Queue.Queue(max(1, 2*threads))
+        for i in xrange(threads):
+            thread = threading.Thread(target=self.work)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def work(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is None: break
+                self.run(*job)
+            finally: self.queue.task_done()
+
+    def run(self, func, args):
+        try: stats = func(*args)
+        except Exception as e:
+            with self.lock: self.errors.append(e)
+            return
+        with self.lock:
+            for i in xrange(3): self.stats[i] += stats[i]
+
+    def compress_file(self, infile, outfile):
+        """COMPRESS_FILE() compresses (and then deletes) a file on disk."""
+        self.submit(compress_file, (infile, outfile, self.codec, self.level))
+
+    def compress_writer(self, write, arcname, outfile):
+        """COMPRESS_WRITER() compresses the data written by write(fh)."""
+        self.submit(compress_writer, (write, arcname, outfile, self.codec, self.level))
+
+    def submit(self, func, args):
+        self.check()
+        if len(self.threads) == 0: self.run(func, args)
+        else: self.queue.put((func, args))
+
+    def check(self):
+        """CHECK() re-raises the first error raised by a job."""
+        with self.lock:
+            if len(self.errors) > 0: raise self.errors[0]
+
+    def pop_stats(self):
+        """POP_STATS() returns and resets the totals."""
+        with self.lock:
+            stats = tuple(self.stats)
+            self.stats = [0, 0, 0.]
+        return stats
+
+    def close(self):
+        """CLOSE() waits for all jobs to finish and stops the threads."""
+        for thread in self.threads: self.queue.put(None)
+        for thread in self.threads: thread.join()
+        self.threads = []
+        self.check()
+
+
+
+# ~~ report() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def report(stats, files=None):
+    """
+    REPORT() formats (uncompressed bytes, compressed bytes, seconds) totals
+    as a message on compression ratio and throughput
+    """
+    size, compressed, seconds = stats
+    mb = 1024.*1024.
+    seconds = max(seconds, 1e-9)
+    if files is None: msg = 'Compressed '
+    else: msg = 'Compressed %i files, ' % files
+    return msg + ''.join((
+        '%.2f MB to %.2f MB ' % (size/mb, compressed/mb),
+        '(%.1f%%) in %.2f s: ' % (100.*compressed/max(size, 1), seconds),
+        '%.2f MB/s uncompressed, %.2f MB/s compressed' % (size/mb/seconds, compressed/mb/seconds)
+    ))
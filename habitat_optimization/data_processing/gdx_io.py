@@ -0,0 +1,294 @@
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+# Description:
+#       This script provides reading and writing of GAMS symbol data (sets,
+#   parameters, scalars and variable levels) so that make_gdx.py and
+#   gdx_to_csv.py do not need to talk to the GAMS Python API directly.
+#   Symbol records are held as NumPy arrays.
+#       Two formats are provided:
+#           'gams'  GDX files, through the GAMS Python API (requires a local
+#                   GAMS installation). Records are written in bulk with the
+#                   low-level GDX API: the labels of all symbols are
+#                   registered once and records are written by label number.
+#           'numpy' symbol archives (.npz), with NumPy only. Archives are
+#                   NOT GDX files: a model cannot load them and they do not
+#                   replace the GDXs GAMS writes (e.g. results.gdx). They
+#                   let data preparation run on machines without GAMS, and
+#                   are converted to GDX with convert() (or by running this
+#                   script) on a machine with GAMS before a model uses them.
+
+# Symbol
+GIO_KND_SET = 'set'
+GIO_KND_PAR = 'parameter'
+GIO_KND_VAR = 'variable'
+GIO_KND_EQU = 'equation'
+
+# backends
+GIO_EXT_GDX = '.gdx'
+GIO_EXT_NPZ = '.npz'
+GIO_BCK_GMS = 'gams'
+GIO_BCK_NPY = 'numpy'
+GIO_PRD = 'gdx_io' # producer recorded in written GDXs
+GIO_NPZ_HDR = 'symbols'
+GIO_NPZ_KEY = 'k%i'
+GIO_NPZ_VAL = 'v%i'
+
+
+
+# ~~ SYMBOL ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class Symbol(object):
+    """
+    A GAMS symbol and its records, where keys is an (n x dimension) array
+    of record index strings and values is an array of the n record values
+    (zeros for sets, levels for variables and equations).
+    """
+
+    import numpy
+
+    def __init__(self, name, kind, dimension, keys=None, values=None):
+        numpy = self.numpy
+        self.name = name
+        self.kind = kind
+        self.dimension = dimension
+        if values is None: values = numpy.zeros(0 if keys is None else len(keys))
+        self.values = numpy.asarray(values, dtype=float).reshape(-1)
+        if (keys is None) or (dimension == 0) or (len(keys) == 0):
+            self.keys = numpy.empty((len(self.values), dimension), dtype=str)
+        else:
+            self.keys = numpy.asarray(keys, dtype=str).reshape((-1, dimension))
+        assert len(self.keys) == len(self.values), 'Keys and values differ in length'
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return '%s <%s>' % (self.__class__.__name__, self.name)
+
+    def records(self):
+        """Generator over (keys list, value) pairs."""
+        for keys, value in zip(self.keys.tolist(), self.values.tolist()):
+            yield (keys, value)
+
+
+
+# ~~ GAMSBACKEND ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class GamsBackend(object):
+    """
+    Reads and writes GDX files with the GAMS Python API, writing through
+    its low-level GDX module (gdxcc). The workspace is created once and
+    reused for every file.
+    """
+
+    import numpy
+    extension = GIO_EXT_GDX
+
+    def __init__(self):
+        import gams
+        try: import gdxcc
+        except ImportError: from gams.core import gdx as gdxcc # newer GAMS releases
+        self.gams = gams
+        self.gdxcc = gdxcc
+        self.workspace = gams.GamsWorkspace()
+
+    def write(self, symbols, outname):
+        """
+        WRITE() writes Symbols (sets and parameters) to [outname] (without
+        extension) and returns the path of the written file. The labels of
+        all symbols are registered in order of first appearance (the order
+        GAMS gives them), then the records of each symbol are written by
+        label number, sorted as the GDX format requires.
+        """
+        numpy = self.numpy
+        gdxcc = self.gdxcc
+        outfile = outname + self.extension
+
+        # label numbers, counting from 1 in order of first appearance
+        keys = [s.keys.reshape(-1) for s in symbols if s.keys.size > 0]
+        if len(keys) > 0: keys = numpy.concatenate(keys)
+        else: keys = numpy.empty(0, dtype=str)
+        labels, first, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+        order = numpy.argsort(first, kind='mergesort')
+        numbers = numpy.empty(len(labels), dtype=int)
+        numbers[order] = numpy.arange(1, len(labels) + 1)
+        numbers = numbers[inverse]
+
+        handle = gdxcc.new_gdxHandle_tp()
+        rc, message = gdxcc.gdxCreateD(handle, self.workspace.system_directory, gdxcc.GMS_SSSIZE)
+        if not rc: raise IOError('Cannot load the GDX library: %s' % message)
+        try:
+            rc, error = gdxcc.gdxOpenWrite(handle, outfile, GIO_PRD)
+            if not rc: raise IOError('Cannot write %s (GDX error %i)' % (outfile, error))
+            gdxcc.gdxUELRegisterRawStart(handle)
+            for label in labels[order].tolist(): gdxcc.gdxUELRegisterRaw(handle, label)
+            gdxcc.gdxUELRegisterDone(handle)
+
+            start = 0
+            values = [0.] * gdxcc.GMS_VAL_MAX
+            for symbol in symbols:
+                if symbol.kind == GIO_KND_SET: kind = gdxcc.GMS_DT_SET
+                elif symbol.kind == GIO_KND_PAR: kind = gdxcc.GMS_DT_PAR
+                else: raise ValueError('Cannot write %s %s' % (symbol.kind, symbol.name))
+                size = symbol.keys.size
+                index = numbers[start:start+size].reshape((len(symbol), symbol.dimension))
+                start += size
+                if symbol.dimension > 0: rows = numpy.lexsort(index.T[::-1])
+                else: rows = numpy.arange(len(symbol))
+                gdxcc.gdxDataWriteRawStart(handle, symbol.name, '', symbol.dimension, kind, 0)
+                for key, value in zip(index[rows].tolist(), symbol.values[rows].tolist()):
+                    values[gdxcc.GMS_VAL_LEVEL] = value
+                    gdxcc.gdxDataWriteRaw(handle, key, values)
+                gdxcc.gdxDataDone(handle)
+            if gdxcc.gdxClose(handle) <> 0:
+                raise IOError('Cannot write %s: %s' % (
+                    outfile, gdxcc.gdxErrorStr(handle, gdxcc.gdxGetLastError(handle))[1]
+                ))
+        finally:
+            gdxcc.gdxFree(handle)
+        return outfile
+
+    def read(self, infile):
+        """READ() returns a list of Symbols read from the GDX [infile]."""
+        gams = self.gams
+        database = self.workspace.add_database_from_gdx(infile)
+        symbols = []
+        for dbVar in database:
+            if isinstance(dbVar, gams.GamsSet):
+                kind = GIO_KND_SET
+                values = None
+            elif isinstance(dbVar, gams.GamsParameter):
+                kind = GIO_KND_PAR
+                values = [record.value for record in dbVar]
+            elif isinstance(dbVar, gams.GamsVariable):
+                kind = GIO_KND_VAR
+                values = [record.level for record in dbVar]
+            else:
+                kind = GIO_KND_EQU
+                values = [record.level for record in dbVar]
+            keys = [record.keys for record in dbVar]
+            symbols.append(Symbol(dbVar.name, kind, dbVar.dimension, keys, values))
+        database.clear()
+        del database
+        return symbols
+
+
+
+# ~~ NUMPYBACKEND ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class NumpyBackend(object):
+    """
+    Reads and writes symbol archives (.npz) with NumPy only. Each symbol's
+    keys and values are stored as two arrays, and a header array lists the
+    name, kind and dimension of each symbol. Archives are not GDX files
+    (see convert()).
+    """
+
+    import numpy
+    extension = GIO_EXT_NPZ
+
+    def write(self, symbols, outname):
+        """
+        WRITE() writes Symbols to [outname] (without extension) and returns
+        the path of the written file.
+        """
+        outfile = outname + self.extension
+        with open(outfile, 'wb') as fh:
+            self.write_file(symbols, fh)
+        return outfile
+
+    def write_file(self, symbols, fh):
+        """WRITE_FILE() writes Symbols to the open (binary) file object fh."""
+        numpy = self.numpy
+        arrays = {}
+        header = []
+        for i in xrange(len(symbols)):
+            symbol = symbols[i]
+            header.append((symbol.name, symbol.kind, str(symbol.dimension)))
+            arrays[GIO_NPZ_KEY % i] = symbol.keys
+            arrays[GIO_NPZ_VAL % i] = symbol.values
+        arrays[GIO_NPZ_HDR] = numpy.array(header, dtype=str).reshape((-1, 3))
+        numpy.savez(fh, **arrays)
+
+    def read(self, infile):
+        """READ() returns a list of Symbols read from the archive [infile]."""
+        archive = self.numpy.load(infile)
+        symbols = []
+        try:
+            header = archive[GIO_NPZ_HDR].tolist()
+            for i in xrange(len(header)):
+                name, kind, dimension = header[i]
+                symbols.append(Symbol(
+                    name, kind, int(dimension), archive[GIO_NPZ_KEY % i],
+                    archive[GIO_NPZ_VAL % i]
+                ))
+        finally:
+            archive.close()
+        return symbols
+
+
+
+GIO_BCK = {GIO_BCK_GMS: GamsBackend, GIO_BCK_NPY: NumpyBackend}
+
+
+# ~~ get_backend() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def get_backend(name):
+    """
+    GET_BACKEND() returns a new backend instance given its name (see GIO_BCK
+    at top of script)
+    """
+    try: return GIO_BCK[name.lower()]()
+    except KeyError:
+        raise ValueError('Unknown GDX backend %s. Use one of %s.' % (
+            name, ', '.join(sorted(GIO_BCK.keys()))
+        ))
+
+
+
+# ~~ read_gdx() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def read_gdx(infile, backend=None):
+    """
+    READ_GDX() reads all symbols from a GDX or symbol archive. Reading a
+    GDX needs GAMS.
+
+    INPUTS:
+        infile      = path to the file to read
+        backend     = (optional) backend instance or name to read with.
+            Default is None, which picks the backend from the file extension.
+
+    OUTPUTS:
+        list of Symbols
+    """
+    if backend is None:
+        if infile.lower().endswith(GIO_EXT_NPZ): backend = GIO_BCK_NPY
+        else: backend = GIO_BCK_GMS
+    if isinstance(backend, basestring): backend = get_backend(backend)
+    return backend.read(infile)
+
+
+
+# ~~ convert() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def convert(infile, outfile):
+    """
+    CONVERT() converts between GDX files and symbol archives, with formats
+    taken from the file extensions (e.g. to turn an archive made without
+    GAMS into the GDX loaded by the model). Variables and equations are not
+    converted. Returns the path of the written file.
+    """
+    import os
+    symbols = [
+        s for s in read_gdx(infile) if s.kind in (GIO_KND_SET, GIO_KND_PAR)
+    ]
+    if outfile.lower().endswith(GIO_EXT_NPZ): backend = get_backend(GIO_BCK_NPY)
+    else: backend = get_backend(GIO_BCK_GMS)
+    outname = outfile
+    if outname.lower().endswith(backend.extension):
+        outname = outname[:-len(backend.extension)]
+    return backend.write(symbols, os.path.abspath(outname))
+
+
+
+if __name__ == '__main__':
+
+    # convert a file given on the command line, e.g.
+    #   python gdx_io.py data_run1.npz data_run1.gdx
+    import sys
+    print convert(sys.argv[1], sys.argv[2])
@@ -13,13 +13,14 @@
 #   never, would interal function constants need to be changed.
 
 # gdx_to_csv()
-INP_KWD_VAL = 'value'
-INP_KWD_LVL = 'level'
 OUT_KWD_PAR = 'symbol'
 OUT_KWD_VAL = 'value'
 OUT_KWD_DIM = 'd%i'
 OUT_KWD_FIL = 'file'
 
+# concatenate_csvs()
+OUT_DEF_WRK = 1
+
 # ~~ make_header ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 def make_header(ndim):
     """Short function shared between functions here to make file headers."""
@@ -32,7 +33,8 @@ def gdx_to_csv(inGDX, outCSV):
     GDX_TO_CSV() converts a GDX to CSV
     
     INPUTS:
-        inGDX   = absolute path to input GDX from which CSV should be made
+        inGDX   = absolute path to input GDX (or gdx_io symbol archive) from
+            which CSV should be made
         outCSV  = absolute path of output CSV to write
         
     OUTPUTS:
@@ -46,29 +48,73 @@ def gdx_to_csv(inGDX, outCSV):
     """
     
     # IMPORTS
-    import gams, csv
+    from gdx_io import read_gdx
     
     
     # LOAD DATA
     
-    # set up database
-    workspace = gams.GamsWorkspace()
-    database = workspace.add_database_from_gdx(inGDX)
+    # load data from the file (backend is chosen from the file extension)
+    return symbols_to_csv(read_gdx(inGDX), outCSV)
+    
+    
+# ~~ scenarios_to_csvs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def scenarios_to_csvs(inGDX, outCSVs):
+    """
+    SCENARIOS_TO_CSVS() converts the results GDX of Habitat_Opt_Scenarios.gms,
+    where the first index of every symbol is the scenario, to one CSV per
+    scenario formatted as by gdx_to_csv()
+    
+    INPUTS:
+        inGDX   = absolute path to input GDX (or gdx_io symbol archive)
+        outCSVs = {scenario name: absolute path of output CSV to write}
+        
+    OUTPUTS:
+        list of the CSVs written, in the order of the scenario names.
+        Symbols without an index (e.g. solve_time) are written to every CSV.
+    """
+    
+    # IMPORTS
+    from gdx_io import read_gdx, Symbol
+    
+    symbols = read_gdx(inGDX)
+    written = []
+    for scenario in sorted(outCSVs.keys()):
+        scenarioSymbols = []
+        for symbol in symbols:
+            if symbol.dimension == 0:
+                scenarioSymbols.append(symbol)
+                continue
+            keep = symbol.keys[:,0] == scenario
+            scenarioSymbols.append(Symbol(
+                symbol.name, symbol.kind, symbol.dimension-1,
+                symbol.keys[keep,1:], symbol.values[keep]
+            ))
+        written.append(symbols_to_csv(scenarioSymbols, outCSVs[scenario]))
+    return written
+    
+    
+# ~~ symbols_to_csv() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def symbols_to_csv(symbols, outCSV):
+    """
+    SYMBOLS_TO_CSV() writes gdx_io symbols to CSV, as part of gdx_to_csv()
+    """
+    
+    # IMPORTS
+    import csv
+    from gdx_io import GIO_KND_SET
     
-    # load data from database
+    # format records as rows
     data = []
-    maxDim = max([p.dimension for p in database])
-    for parameter in database:
-        for record in parameter:
+    maxDim = max([s.dimension for s in symbols])
+    for symbol in symbols:
+        for keys, value in symbol.records():
             row = ['' for i in xrange(maxDim+2)]
-            row[0] = parameter.name
-            row[1:len(record.keys)+1] = record.keys
+            row[0] = symbol.name
+            row[1:len(keys)+1] = keys
             
-            # some records have a 'value' while others have a 'level',
-            #   both of which are the value. So take either one if it
-            #   has it.
-            if hasattr(record, INP_KWD_VAL): row[-1] = str(record.value)
-            elif hasattr(record, INP_KWD_LVL): row[-1] = str(record.level)
+            # parameters have a 'value' while variables have a 'level',
+            #   both of which are the value. Sets have neither.
+            if symbol.kind <> GIO_KND_SET: row[-1] = str(value)
             data.append(row)
             
     # WRITE OUTPUT
@@ -82,7 +128,7 @@ def gdx_to_csv(inGDX, outCSV):
     
     
 # ~~ concatenate_csvs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-def concatenate_csvs(csvs, outCSV):
+def concatenate_csvs(csvs, outCSV, workers=OUT_DEF_WRK):
     """
     CONCATENATE_CSVS() concatenates multiple CSVs as returned by gdx_to_csv()
     into a single file
@@ -90,6 +136,8 @@ def concatenate_csvs(csvs, outCSV):
     INPUTS:
         csvs    = paths to csvs to be concatenated
         outCSV  = path to output CSV to create
+        workers = (optional) number of processes reading the csvs (see
+            table_io.py). Default is OUT_DEF_WRK.
     
     OUTPUTS:
         outCSV, which will have the same format as returned by gdx_to_csv(),
@@ -103,12 +151,13 @@ def concatenate_csvs(csvs, outCSV):
     
     # imports
     import csv, os
+    from table_io import read_rows
     
     # read csvs
     names = set()
     data = []
     maxDim = 0
-    for csvFile in csvs:
+    for csvFile, (header, rows) in zip(csvs, read_rows(list(csvs), workers)):
     
         # check for duplicate names
         csvName = os.path.splitext(os.path.basename(csvFile))[0]
@@ -121,9 +170,8 @@ def concatenate_csvs(csvs, outCSV):
         names.add(csvName)
         
         # get data from the file
-        reader = csv.reader(open(csvFile, 'r'))
-        maxDim = max(maxDim, len(reader.next())-2)
-        data.extend([[csvName] + row for row in reader])
+        maxDim = max(maxDim, len(header)-2)
+        data.extend([[csvName] + row for row in rows])
         
     # write output csv
     writer = csv.writer(open(outCSV, 'wb'))
@@ -37,6 +37,17 @@ GMS_KWD_LOD = '$load'
 GMS_KWD_STR = "'"
 GMS_TYP = {GMS_KWD_SET: str, GMS_KWD_PAR: float, GMS_KWD_SCA: float}
 
+# gms_lines()
+GMS_DOL = '$' # starts the dollar control options below
+GMS_DOL_INC = ('$include', '$batinclude')
+GMS_DOL_DEF = ('$set', '$setglobal', '$setlocal')
+GMS_DOL_DRP = ('$drop', '$dropglobal', '$droplocal')
+GMS_DOL_IF = '$if'
+GMS_DOL_IFT = '$ifthen'
+GMS_DOL_ELS = '$else'
+GMS_DOL_EIF = '$endif'
+GMS_DOL_NOT = 'not'
+
 # load_data()
 LOD_KWD_RUN = 'Run'
 LOD_KWD_PAR = 'Symbol'
@@ -53,24 +64,107 @@ LOD_KWD_RDF = ''
 LOD_DEF_RUN = 1 
 LOD_KWD_RNG = '-'
 LOD_KWD_SRG = ':'
+LOD_KWD_FAC = '@'
+LOD_KWD_LVL = ';'
+LOD_GRD_CRT = 'cartesian'
+LOD_GRD_ZIP = 'zip'
+LOD_DEF_GRD = LOD_GRD_CRT
+LOD_DEF_STR = False
+LOD_DEF_WRK = 1
+LOD_DEF_CCH = False
 
 
 # prune_barriers()
 PRN_DEF_CAN = None
 PRN_DEF_RUT = '-1'
+PRN_DEF_WRK = 1
 PRN_TRU = {
         '0': False, '1': True, 'true': True, 'false': False, 'no': False, 
         'yes': True, 'n': False, 'y': True
 }
 
 # make_gdx()
-MAK_ZIP = '.zip'
-MAK_GDX = '.gdx'
 MAK_DEF_DDN = 'data_all'
 MAK_DEF_RDN = 'data_run'
 MAK_DEF_ZIP = False
 MAK_DEF_SKP = False
 MAK_KWD_RDF = 'None'
+MAK_DEF_WRK = 1
+MAK_DEF_BCK = 'gams'
+MAK_DEF_DLT = False
+MAK_DEF_ZLV = 6
+MAK_DEF_ZTH = 1
+MAK_MOD_DEF = 'default'
+MAK_MOD_RUN = 'run'
+MAK_MOD_BTH = 'both'
+MAK_MOD_DLT = 'delta'
+MAK_MAN = 'gdx_manifest.json'
+MAK_MAN_VER = 1
+MAK_MAN_KVR = 'version'
+MAK_MAN_KFL = 'files'
+MAK_PRE_GLD = 'guilds'
+MAK_PRE_DOM = 'dominance'
+MAK_PRE = (MAK_PRE_GLD, MAK_PRE_DOM)
+MAK_PRE_KEY = ('guildMap', 'dominated') # shared entries made by presolve
+MAK_DEF_PRE = ()
+MAK_DEF_VAL = True
+MAK_DEF_DMN = None
+MAK_DEF_SCN = False
+MAK_DEF_SDN = 'data_scenarios'
+MAK_DEF_FEA = True
+MAK_FEA = 'gdx_features.json' # size features of each GDX, see run_features()
+
+# presolve
+PRE_GLD = 'Guilds'
+PRE_T2G = 'TargetToGuild'
+PRE_GBN = 'GuildsBeneficiary'
+PRE_GCN = 'GuildsControl'
+PRE_PPS = 'ProjectsPassability'
+PRE_PBN = 'ProjectsBenefit'
+PRE_P2B = 'ProjectToBudget'
+PRE_CAN = 'isCandidate'
+PRE_CST = 'cost'
+PRE_BUD = 'budget'
+PRE_PCH = 'passChange'
+PRE_BCH = 'benefitMaxChange'
+PRE_WGT = 'weight'
+PRE_OB2 = 'obj2Weight'
+PRE_BMB = 'benefitMaxBase'
+PRE_PBS = 'passBase'
+PRE_RUT = 'isRoot'
+PRE_DWN = 'Downstream'
+
+# run_features()
+FEA_BAR = 'Barriers'
+FEA_CAN = 'candidates' # candidate actions left after presolve
+FEA_NBR = 'barriers'
+FEA_GLD = 'guilds' # guilds left after presolve
+FEA_TGT = 'tightness' # total budget over the total cost of the candidates
+FEA_SCN = 'scenarios' # runs solved in the GDX (more than 1 for scenarios)
+
+# validate_run()
+VAL_TOL = 0.00001 # as in the abort checks of Habitat_Opt.gms
+VAL_IDS = 10 # number of offending records listed per problem
+
+# active_domains(), as declared in Habitat_Opt.gms with its domains option (set
+#   by Habitat_Opt_Domains.gms)
+DMN_ACT = 'ActiveActions'
+DMN_PAS = 'ActivePass'
+DMN_BEN = 'ActiveBenefit'
+DMN_DWN = 'ActiveDownstream'
+DMN_PDN = 'ActivePassDownstream'
+DMN_DIM = {DMN_ACT: 2, DMN_PAS: 3, DMN_BEN: 3, DMN_DWN: 2, DMN_PDN: 4}
+DMN_SRC = ( # symbols from which the domains are derived
+    PRE_CAN, PRE_PPS, PRE_PBN, PRE_PCH, PRE_BCH, PRE_T2G, PRE_DWN, PRE_RUT
+)
+
+# find_scenarios(), as declared in Habitat_Opt_Scenarios.gms
+SCN_SET = 'Scenarios'
+SCN_CAP = 'cap'
+SCN_SYM = (PRE_BUD, SCN_CAP, PRE_WGT, PRE_OB2) # symbols that may vary by scenario
+SCN_DIM = {PRE_BUD: 1, SCN_CAP: 1, PRE_WGT: 1, PRE_OB2: 0} # their dimensions in the model
+SCN_FMT = 'scen_%s' # name of the scenario parameter of each of SCN_SYM
+SCN_MIN = 2 # fewest runs worth batching
 
 
     
@@ -121,11 +215,74 @@ class Scalar(Parameter):
         Parameter.__init__(*inputs)
 
         
+# ~~ gms_lines() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def gms_lines(gmsFile, defined=None):
+    """
+    GMS_LINES() yields the lines of a GAMS model file as GAMS compiles them,
+    for read_gms(). Files named by $include or $batinclude are read in their
+    place (from the folder of [gmsFile]), and lines under $if or $ifthen
+    (to $else or $endif) are kept or dropped by whether a compile-time
+    variable is set ($set). Other conditions are taken to hold. The dollar
+    control options handled here are not yielded.
+
+    INPUTS:
+        gmsFile     = path to the GAMS model file
+        defined     = (optional) set of the compile-time variables that are
+            set (lower case), updated as they are set or dropped. Default
+            is none.
+    """
+    import os
+    if defined is None: defined = set()
+    folder = os.path.dirname(os.path.abspath(gmsFile))
+
+    # whether a condition holds, and the statement after it
+    def condition(text):
+        words = text.split(None, 1) + ['']
+        negate = words[0].lower() == GMS_DOL_NOT
+        if negate: words = words[1].split(None, 1) + ['']
+        kind = words[0].lower()
+        words = words[1].split(None, 1) + ['', '']
+        if kind == GMS_KWD_SET: return ((words[0].lower() in defined) <> negate, words[1].strip())
+        return (True, words[1].strip())
+
+    # the lines of a line that is kept
+    def compile_line(line):
+        words = line.split(None, 1) + ['']
+        keyword = words[0].lower()
+        if keyword in GMS_DOL_DEF: defined.add(words[1].split()[0].lower())
+        elif keyword in GMS_DOL_DRP: defined.discard(words[1].split()[0].lower())
+        elif keyword in GMS_DOL_INC:
+            name = words[1].split()[0].strip('"' + GMS_KWD_STR)
+            return gms_lines(os.path.join(folder, name), defined)
+        elif keyword == GMS_DOL_IF:
+            holds, statement = condition(words[1])
+            if holds: return compile_line(statement + '\n')
+        else: return [line]
+        return []
+
+    # (condition holds, enclosing lines kept) of each open $ifthen
+    blocks = []
+    with open(gmsFile, 'r') as fh:
+        for line in fh:
+            kept = (len(blocks) == 0) or (blocks[-1][0] and blocks[-1][1])
+            words = line.split(None, 1) + ['']
+            keyword = words[0].lower().split('.')[0] # without a $ifthen.tag
+            if not keyword.startswith(GMS_DOL):
+                if kept: yield line
+            elif keyword == GMS_DOL_IFT: blocks.append([condition(words[1])[0], kept])
+            elif keyword == GMS_DOL_ELS: blocks[-1][0] = not blocks[-1][0]
+            elif keyword == GMS_DOL_EIF: blocks.pop()
+            elif kept:
+                for compiled in compile_line(line): yield compiled
+
+
+
 # ~~ read_gms() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 def read_gms(gmsFile):
     """
     READ_GMS() loads parameters from a GAMS model file to specify necessary
-    inputs from user specified data.
+    inputs from user specified data. The file is read as GAMS compiles it
+    (see gms_lines()).
     
     INPUTS:
         gmsFile     = path to the GAMS model file
@@ -133,93 +290,93 @@ def read_gms(gmsFile):
     OUTPUTS:
         dictionary of parameters/sets/aliases/scalars
     """
-    with open(gmsFile, 'r') as fh:
-    
-        parameters = {}
-        externalParameters = set()
-        for line in fh:
-            stripLine = line.strip()
+    lines = gms_lines(gmsFile)
+
+    parameters = {}
+    externalParameters = set()
+    for line in lines:
+        stripLine = line.strip()
+        
+        # find sets (assumes one set per line after keyword)
+        if stripLine.startswith(GMS_KWD_SET):
+            if stripLine.endswith(GMS_KWD_END):
+                newLine = stripLine.split(' ', 1)[-1].strip()
+            else: newLine = lines.next().strip()
+            while True:
+                
+                # process the current set
+                if newLine == '': continue
+                setName, remainder = newLine.split(GMS_KWD_OPN, 1)
+                setIndices = [s.strip() for s in remainder.split(GMS_KWD_CLS)[0].split(GMS_KWD_SEP)]
+                parameters[setName] = Set(setName, setIndices)
+                
+                # check if this is the last line of sets
+                if newLine.endswith(GMS_KWD_END): break
+                newLine = lines.next().strip()
+                
+        # find aliases
+        elif stripLine.startswith(GMS_KWD_ALS):
+            if stripLine.endswith(GMS_KWD_END):
+                newLine = stripLine.split(' ', 1)[-1].strip()
+            else: newLine = lines.next().strip()
+            while True:
+                
+                # process current alias
+                if newLine == '': continue
+                nameStr = newLine.split(GMS_KWD_OPN, 1)[1].rsplit(GMS_KWD_CLS, 1)[0]
+                names = [s.strip() for s in nameStr.split(GMS_KWD_SEP)]
+                for alias in names[1:]:
+                    parameters[alias] = parameters[names[0]]
+
+                # check if this is the last line of sets
+                if newLine.endswith(GMS_KWD_END): break
+                newLine = lines.next().strip()
+                
+        # find parameters
+        elif stripLine.startswith(GMS_KWD_PAR):
+            if stripLine.endswith(GMS_KWD_END):
+                newLine = stripLine.split(' ', 1)[-1].strip()
+            else: newLine = lines.next().strip()
+            while True:
             
-            # find sets (assumes one set per line after keyword)
-            if stripLine.startswith(GMS_KWD_SET):
-                if stripLine.endswith(GMS_KWD_END):
-                    newLine = stripLine.split(' ', 1)[-1].strip()
-                else: newLine = fh.next().strip()
-                while True:
-                    
-                    # process the current set
-                    if newLine == '': continue
-                    setName, remainder = newLine.split(GMS_KWD_OPN, 1)
-                    setIndices = [s.strip() for s in remainder.split(GMS_KWD_CLS)[0].split(GMS_KWD_SEP)]
-                    parameters[setName] = Set(setName, setIndices)
+                # process the current parameter
+                if newLine == '': continue
+                paramStr, remainder = newLine.split(' ', 1)
+                if GMS_KWD_OPN not in paramStr: # zero dimension parameters
+                    parameters[paramStr] = Parameter(paramStr, [])
                     
-                    # check if this is the last line of sets
-                    if newLine.endswith(GMS_KWD_END): break
-                    newLine = fh.next().strip()
-                    
-            # find aliases
-            elif stripLine.startswith(GMS_KWD_ALS):
-                if stripLine.endswith(GMS_KWD_END):
-                    newLine = stripLine.split(' ', 1)[-1].strip()
-                else: newLine = fh.next().strip()
-                while True:
-                    
-                    # process current alias
-                    if newLine == '': continue
-                    nameStr = newLine.split(GMS_KWD_OPN, 1)[1].rsplit(GMS_KWD_CLS, 1)[0]
-                    names = [s.strip() for s in nameStr.split(GMS_KWD_SEP)]
-                    for alias in names[1:]:
-                        parameters[alias] = parameters[names[0]]
-
-                    # check if this is the last line of sets
-                    if newLine.endswith(GMS_KWD_END): break
-                    newLine = fh.next().strip()
-                    
-            # find parameters
-            elif stripLine.startswith(GMS_KWD_PAR):
-                if stripLine.endswith(GMS_KWD_END):
-                    newLine = stripLine.split(' ', 1)[-1].strip()
-                else: newLine = fh.next().strip()
-                while True:
+                else: # other parameters
+                    paramName, remainder = paramStr.split(GMS_KWD_OPN, 1)
+                    paramIndices = [s.strip() for s in remainder.split(GMS_KWD_CLS)[0].split(GMS_KWD_SEP)]
+                    parameters[paramName] = Parameter(paramName, paramIndices)
                 
-                    # process the current parameter
-                    if newLine == '': continue
-                    paramStr, remainder = newLine.split(' ', 1)
-                    if GMS_KWD_OPN not in paramStr: # zero dimension parameters
-                        parameters[paramStr] = Parameter(paramStr, [])
-                        
-                    else: # other parameters
-                        paramName, remainder = paramStr.split(GMS_KWD_OPN, 1)
-                        paramIndices = [s.strip() for s in remainder.split(GMS_KWD_CLS)[0].split(GMS_KWD_SEP)]
-                        parameters[paramName] = Parameter(paramName, paramIndices)
-                    
-                    # check if this is the last line of parameters
-                    if newLine.endswith(GMS_KWD_END): break
-                    newLine = fh.next().strip()
-                    
-            # find scalars
-            elif stripLine.startswith(GMS_KWD_SCA):
-                if stripLine.endswith(GMS_KWD_END):
-                    newLine = stripLine.split(' ', 1)[-1].strip()
-                else: newLine = fh.next().strip()
-                while True:
+                # check if this is the last line of parameters
+                if newLine.endswith(GMS_KWD_END): break
+                newLine = lines.next().strip()
                 
-                    # process the current scalar
-                    if newLine == '': continue
-                    scalarName = newLine.split()[0]
-                    parameters[scalarName] = Scalar(scalarName)
-                    
-                    # check if this is the last line of scalars
-                    if newLine.endswith(GMS_KWD_END): break
-                    newLine = fh.next().strip()
-                    
-                    
-            # find which parameters are to be loaded from gdx (assumes that
-            #   $load statement comes only after $GDXIN)
-            elif stripLine.startswith(GMS_KWD_LOD):
-                _, remainder = stripLine.split(' ', 1)
-                externalParameters.update([s.strip() for s in remainder.split(GMS_KWD_SEP)])
+        # find scalars
+        elif stripLine.startswith(GMS_KWD_SCA):
+            if stripLine.endswith(GMS_KWD_END):
+                newLine = stripLine.split(' ', 1)[-1].strip()
+            else: newLine = lines.next().strip()
+            while True:
+            
+                # process the current scalar
+                if newLine == '': continue
+                scalarName = newLine.split()[0]
+                parameters[scalarName] = Scalar(scalarName)
+                
+                # check if this is the last line of scalars
+                if newLine.endswith(GMS_KWD_END): break
+                newLine = lines.next().strip()
                 
+                
+        # find which parameters are to be loaded from gdx (assumes that
+        #   $load statement comes only after $GDXIN)
+        elif stripLine.startswith(GMS_KWD_LOD):
+            _, remainder = stripLine.split(' ', 1)
+            externalParameters.update([s.strip() for s in remainder.split(GMS_KWD_SEP)])
+            
     # define externality of parameters
     for parameter in parameters:
         if parameter in externalParameters:
@@ -262,6 +419,9 @@ def prune_barriers(
             root_value: downstream ID value in [downstreamColumn] to indicate
                 a barrier is a root (i.e. has no downstream barriers). Default
                 is PRN_DEF_RUT
+                
+            workers: number of processes reading chunks of [tableFile]
+                (see table_io.py). Default is PRN_DEF_WRK.
         
     OUTPUTS:
         path to [outputFile]
@@ -269,9 +429,13 @@ def prune_barriers(
     
     # imports
     import csv
+    from table_io import read_rows
     
     # update options
-    P = {'candidate_columns': PRN_DEF_CAN, 'root_value': PRN_DEF_RUT}
+    P = {
+        'candidate_columns': PRN_DEF_CAN, 'root_value': PRN_DEF_RUT,
+        'workers': PRN_DEF_WRK
+    }
     for k in options:
         if k.lower() in P: P[k.lower()] = options[k]
     if not isinstance(P['candidate_columns'], (list, tuple, set)):
@@ -281,10 +445,10 @@ def prune_barriers(
     candidate = lambda x: any([PRN_TRU[v.lower()] for v in x])
     
     # load data
-    reader = csv.reader(open(tableFile, 'r'))
-    columns = reader.next()
+    columns, rows = read_rows(tableFile, P['workers'])
     c2I = dict((columns[i], i) for i in xrange(len(columns)))
-    data = dict((row[c2I[bidColumn]], row) for row in reader)
+    data = dict((row[c2I[bidColumn]], row) for row in rows)
+    del rows
     
     # take care of the easy case (no candidate columns given)
     if P['candidate_columns'][0] is None:
@@ -337,13 +501,17 @@ def prune_barriers(
 
     
 # ~~ load_data() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-def load_data(tableFile, settingsFile, parameters):    
+def load_data(tableFile, settingsFile, parameters, **options):
     """
     LOAD_DATA() loads input data and formats it for creation of a gdx.
     
     INPUTS:
         tableFile       = Excel CSV spreadsheet where each row is a barrier and 
-            columns are barrier attribute data
+            columns are barrier attribute data. May instead be a dictionary
+            mapping column names to sequences (lists or arrays) of values,
+            one per barrier (e.g. from make_columns() of
+            s1_prepare_data.py), in which case the columns are used as they
+            are, without writing and parsing a CSV.
             
         settingsFile    = Excel CSV file with parameters not indexed by barrier 
             and column designations in tableFile. Required columns are 
@@ -355,9 +523,34 @@ def load_data(tableFile, settingsFile, parameters):
                     dimension of the parameter (see Notes)
                     
         parameters      = parameter dictionary as returned by read_gms()
+        
+        ** options      = (optional) keyword arguments, including:
+        
+            grid: how the factors in settingsFile (see Notes) are combined
+                into runs. LOD_GRD_CRT makes a run for every combination of
+                factor levels, and LOD_GRD_ZIP combines the i-th levels of
+                all factors into the i-th run (all factors must then have
+                the same number of levels). Default is LOD_DEF_GRD.
+                
+            stream: if True, the parameters of each run are not created
+                here. Instead a RunStream is returned that keeps the rows of
+                each run and creates their parameters one run at a time
+                as make_gdx() writes them, so that memory does not grow
+                with the number of runs. Default is LOD_DEF_STR.
+                
+            workers: number of processes reading chunks of tableFile
+                (see table_io.py). Default is LOD_DEF_WRK.
+                
+            cache: if True, tableFile is read through a cache of its
+                columns kept next to it and rebuilt when its contents change
+                (see table_io.cached_columns()), so that later calls only
+                read the columns the definitions use. Default is
+                LOD_DEF_CCH.
                     
     OUTPUTS:
-        dictionary of parameters with data, formatted for make_gdx()
+        dictionary of parameters with data, formatted for make_gdx(), or a
+        RunStream if streaming, or a ScenarioPlanner (over either) if
+        settingsFile defines factors
         
     NOTES:
         o An example of a row in the settingsFile that indicates a set defined
@@ -385,11 +578,34 @@ def load_data(tableFile, settingsFile, parameters):
         o In the input settingsFile, the order of indices defined for a
           parameter must match the ordering in the GAMS model. Currently
           this function does not rigorously check for compatibility
+          
+        o Rows whose run begins with LOD_KWD_FAC define a factor of a
+          scenario grid instead of a run, e.g.
+          
+            "@budget","budget(main)","1000:5000:5","no"
+            "@species","weight(Fish1)","1;2","no"
+            "@species","passChange(Barriers,removal,Fish1)","PC1;PC1_LOW","yes"
+            
+          where the levels of a factor are separated by LOD_KWD_LVL (or
+          given as a value range), rows of the same factor are varied
+          together and must have the same number of levels, and different
+          factors are combined according to the grid option. The example
+          makes 10 runs, numbered after the last explicitly defined run.
+          Runs of the grid take data not given by the factors from the
+          defaults and are only created when make_gdx() asks for them.
     """
     
     # imports
     import csv
     
+    # update options
+    P = {
+        'grid': LOD_DEF_GRD, 'stream': LOD_DEF_STR, 'workers': LOD_DEF_WRK,
+        'cache': LOD_DEF_CCH
+    }
+    for k in options:
+        if k.lower() in P: P[k.lower()] = options[k]
+    
     # barrier aliases for tracking which data come from data table
     barrierAliases = set([k for k in parameters if parameters[k] is parameters[EXC_BAR_NAM]])
     
@@ -411,6 +627,18 @@ def load_data(tableFile, settingsFile, parameters):
         indices = [s.strip() for s in remainder.rsplit(LOD_KWD_CLS, 1)[0].split(LOD_KWD_SEP)]
         return (paramName, indices)
         
+    def str2levels(string):
+        s = string.strip()
+        if s.count(LOD_KWD_SRG) == 2:
+            try: start, stop, count = [float(v) for v in s.split(LOD_KWD_SRG)]
+            except:
+                raise ValueError('Value range must be composed of numbers: %s' % s)
+            assert int(count) == count, 'Value range count must be an integer: %s' % s
+            if count == 1: return [start]
+            increment = (stop - start) / (count - 1)
+            return [start+increment*v for v in xrange(int(count))]
+        else: return [str2values(v) for v in s.split(LOD_KWD_LVL)]
+        
     # test for whether a symbol is table.csv or definitions.csv sourced
     def is_table_sourced(string):
         return LOD_KWD_SRC.get(string.lower(), None)
@@ -429,10 +657,43 @@ def load_data(tableFile, settingsFile, parameters):
         'User specified that the %s column for %s is not a ',
         'column name in the table CSV but %s appears as an index.'
     ])
+    factors = {} # rows of each factor of the scenario grid
+    factorOrder = []
+    sharedColumns = set() # table columns kept whole (e.g. factor levels)
     for row in reader:
         
-        # get information on this parameter
+        # factor rows define the levels of a symbol in the scenario grid,
+        #   and are expanded into runs only when the runs are created
         r += 1
+        runString = row[c2I[LOD_KWD_RUN]].strip()
+        if runString.startswith(LOD_KWD_FAC):
+            factor = runString[len(LOD_KWD_FAC):].strip()
+            parameter, indices = str2param(row[c2I[LOD_KWD_PAR]])
+            duplicateTup = (LOD_KWD_FAC, parameter, str(indices))
+            if duplicateTup in duplicateCheck:
+                msg = ''.join([
+                    'A symbol + indices combination may only belong to one ',
+                    'factor. Check row %i.' % r
+                ])
+                raise ValueError(msg)
+            else: duplicateCheck.add(duplicateTup)
+            levels = str2levels(row[c2I[LOD_KWD_VAL]])
+            fromTable = len(barrierAliases.intersection(indices + [parameter])) > 0
+            if fromTable:
+                if not is_table_sourced(row[c2I[LOD_KWD_VIC]]):
+                    err = srcErrStr % (LOD_KWD_VAL, row[c2I[LOD_KWD_PAR]], EXC_BAR_NAM)
+                    raise AssertionError(err)
+                sharedColumns.update(levels)
+            if factor not in factors:
+                factorOrder.append(factor)
+                factors[factor] = []
+            elif len(factors[factor][0][2]) <> len(levels):
+                msg = 'Rows of factor %s must have the same number of levels. Check row %i.'
+                raise ValueError(msg % (factor, r))
+            factors[factor].append((parameter, indices, levels, fromTable))
+            continue
+        
+        # get information on this parameter
         try: runStart, runStop = str2run(row[c2I[LOD_KWD_RUN]])
         except ValueError:
             msg = ''.join([
@@ -508,19 +769,32 @@ def load_data(tableFile, settingsFile, parameters):
             
         i += runCount
         
-    # read in data from table file based on definitions
-    reader = csv.reader(open(tableFile, 'r'))
-    columns = reader.next()
-    c2I = dict((columns[i], i) for i in xrange(len(columns)))
-    for row in reader:
-        for i in inTable:
-            entryColumn = data[i][3]
-            value = row[c2I[entryColumn]]
-            data[i][4].append(value)
+    # when streaming, each table column is kept once and shared by all rows
+    #   that use it
+    rowsInTable = inTable
+    if P['stream']:
+        sharedColumns.update([data[i][3] for i in inTable])
+        rowsInTable = ()
+        
+    # read in the table columns used by the definitions (unless the
+    #   columns were given directly as a dictionary)
+    if not isinstance(tableFile, dict):
+        from table_io import read_columns, cached_columns
+        used = sharedColumns.union([data[i][3] for i in rowsInTable])
+        if P['cache']: read = cached_columns
+        else: read = read_columns
+        tableFile = read(tableFile, used, workers=P['workers'])[1]
+    def column(k):
+        values = tableFile[k]
+        if hasattr(values, 'tolist'): return values.tolist() # arrays
+        else: return list(values)
+    for i in rowsInTable: data[i][4] = column(data[i][3])
+    tableColumns = dict((k, column(k)) for k in sharedColumns)
 
     # add data to parameter objects, converting to the proper data format
     #   as we go
     outParams = {}
+    streamRows = {}
     for paramKey in parameters:
         if not parameters[paramKey].external: continue
         
@@ -531,8 +805,17 @@ def load_data(tableFile, settingsFile, parameters):
         if len(paramNames) > 0: paramName = paramNames[0]
         else: continue
         
-        # process one dimension of the data for the current parameter
+        # when streaming, keep the rows of each run to be made into
+        #   parameters later
         dataIndices = data2Param[paramName]
+        if P['stream']:
+            runRows = streamRows[paramName] = {}
+            for i in dataIndices:
+                run, _, subIndices, valOrCol, _ = data[i]
+                runRows.setdefault(run, []).append((subIndices, valOrCol, i in inTable))
+            continue
+        
+        # process one dimension of the data for the current parameter
         pParent = parameters[paramName]
         outParams[paramName] = {}
         for i in dataIndices:
@@ -547,101 +830,65 @@ def load_data(tableFile, settingsFile, parameters):
                 )
             parameter = outParams[paramName][run]
             
-            # convert values to correct format
+            # add the values to the parameter
             if len(noneOrVal) == 0: values = valOrCol
             else: values = noneOrVal
-            if isinstance(values, (list, tuple)):
-                values = [parameter.dtype(s) for s in values]
-            else: values = parameter.dtype(values)
-                
-            # add data to parameter data dictionary
-            subdict = parameter.data
-            for j in xrange(parameter.ndim-1):
-                index = subIndices[j]
-                if index not in subdict: subdict[index] = {}
-                subdict = subdict[index]
-            if subIndices[-1] is None: parameter.data = values
-            else: subdict[subIndices[-1]] = values
+            fill_parameter(parameter, subIndices, values)
             
         # update all aliases as well
         for k in aliases: outParams[k] = outParams[paramName]
-
-    return outParams
+        
+    # collect the runs for make_gdx(). Without factors or streaming, all
+    #   runs are already expanded
+    if P['stream']: runData = RunStream(streamRows, tableColumns, parameters)
+    elif len(factors) == 0: return outParams
+    else: runData = RunData(outParams)
+    if len(factors) == 0: return runData
     
+    # otherwise the runs of the factor grid are numbered after the
+    #   explicitly defined runs and are only created as they are needed
+    explicitRuns = [row[0] for row in data if type(row[0]) is int]
+    if len(explicitRuns) == 0: firstRun = LOD_DEF_RUN
+    else: firstRun = max(explicitRuns) + 1
+    factors = [(name, factors[name]) for name in factorOrder]
+    return ScenarioPlanner(
+        runData, factors, tableColumns, parameters, P['grid'], firstRun
+    )
     
     
-# ~~ make_gdx() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-def make_gdx(
-    data, outputDirectory, defGDXName=MAK_DEF_DDN, runGDXPref=MAK_DEF_RDN,
-    parameters=None, zip=MAK_DEF_ZIP, skip=MAK_DEF_SKP
-):
+    
+# ~~ fill_parameter() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def fill_parameter(parameter, subIndices, values):
+    """
+    FILL_PARAMETER() converts values to the data type of a parameter and
+    adds them to the parameter's data dictionary at the given indices, as
+    part of load_data()
     """
-    MAKE_GDX() uses data loaded by load_data() to make gdx gams databases
-    for individual model runs, where there is one gdx shared across all runs
-    and a series of gdx's, one for each run
     
-    INPUTS:
-        data                = data dictionary as returned by load_data()
-        outputDirectory     = directory where gdx's should be saved
-        defGDXName          = (optional) name of the GDX to be created that 
-            contains data not changing across runs. Default is MAK_DEF_DDN
-            (see top of script for constants)
-        runGDXPref          = (optional) name prefixfor run-specific gdx file
-            names, without the extension. The run number is appended to each file
-            name. Default is MAK_DEF_RDN.
-        parameters          = (optional) GMS model parameters as returned by
-            read_gms(). If supplied, this function will attempt to fill inany
-            missing, necessary data definitions not in data{} with empty
-            data expected by GAMS. Default is None, which will result in this
-            being skipped and probable failure of GAMS execution when data
-            are missing.
-        zip                 = (optional) if True, each output GDX is zipped
-            to reduce file size. Default is MAK_DEF_ZIP.
-        skip                = (optional) if True, skips runs for which a file
-            already exists that matches the output file name (could be .zip or
-            .gdx). Default is MAK_DEF_SKP
+    # convert values to correct format
+    if isinstance(values, (list, tuple)):
+        values = [parameter.dtype(s) for s in values]
+    else: values = parameter.dtype(values)
+        
+    # add data to parameter data dictionary
+    subdict = parameter.data
+    for j in xrange(parameter.ndim-1):
+        index = subIndices[j]
+        if index not in subdict: subdict[index] = {}
+        subdict = subdict[index]
+    if subIndices[-1] is None: parameter.data = values
+    else: subdict[subIndices[-1]] = values
     
-    OUTPUTS:
-        list of paths to the saved gdx files
-    """
     
-    import os, zipfile, gams
     
-    # dictionary traversion for traversing over parameter definitions
-    #   dictionary and getting all values
-    class Node(object):
-        def __init__(self, nodeData, key=None, parent=None):
-            self.parent = parent
-            self.children = []
-            self.key = key
-            if isinstance(nodeData, dict):
-                for k in nodeData:
-                    self.children.append(Node(nodeData[k], k, self))
-            else:
-                self.children.append(nodeData)
-                
-        def trace_up(self):
-            keys = []
-            cur = self
-            while cur.parent is not None:
-                keys.append(cur.key)
-                cur = cur.parent
-            return keys[::-1]
-        
-        def traverse(self):
-            stack = [self]
-            while len(stack) > 0:
-                cur = stack.pop()
-                for child in cur.children:
-                    if isinstance(child, Node):
-                        stack.append(child)
-                    else:
-                        yield (cur.trace_up(), child)
-                        
-    # get list of indices for run identities
-    runIndices = set()
-    for k in data:
-        runIndices.update(data[k].keys())
+# ~~ default_run() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def default_run(runIndices):
+    """
+    DEFAULT_RUN() picks the run whose data are the defaults from the set of
+    run indices found in the data, and returns (default run, sorted list of
+    the other run indices)
+    """
+    runIndices = set(runIndices)
     try:
         runIndices.remove(MAK_KWD_RDF)
         defRun = MAK_KWD_RDF
@@ -651,198 +898,1987 @@ def make_gdx(
             'Could not find the default run index %s. ' % str(MAK_KWD_RDF),
             'Assuming default values should be taken from run %i.' % defRun
         ))
-    runIndices = [-1] + sorted(runIndices) # append one for the default gdx
-    
-    # get list of parameters that dont change across runs so we know which to
-    #   put in default vs run-specific gdxs
-    #   NOTE: Because GAMS gives zero-dimensional parameters (scalars) a value
-    #   of zero (rather than empty), do not include those in this list.
-    parDefOnly = set()
-    for k in data:
-        if (len(data[k]) == 1) and (data[k][data[k].keys()[0]].ndim <> 0):
-            parDefOnly.add(k)
-            
-    print ''.join((
-        'Remember, if you specify some dimensions of a symbol to change over ',
-        'runs, you must also specify those dimensions that do not change ',
-        'over runs (i.e. that you wish to use only default values). This ',
-        'is a current limitation of the code that is difficult to fix.'
-    ))
-
-            
-    # ~~ MAKE GDXS ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-    outfiles = []
-    for run in runIndices:
-    
-        # check if this run gdx already exists, and skip if it does
-        if skip:
-            if run == -1: outname = os.path.join(outputDirectory, defGDXName)
-            else: outname = os.path.join(outputDirectory, '%s%i' % (runGDXPref, run))
-            if zip: outfile = outname + MAK_ZIP
-            else: outfile = outname + MAK_GDX
-            if os.path.exists(outfile):
-                print ''.join((
-                    'WARNING: Found GDX for Run %i. Skipping creation. ' % run,
-                    'To avoid this, set skip=False'
-                ))
-                continue
+    return (defRun, sorted(runIndices))
+    
+    
+    
+# ~~ RUNDATA ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class RunData(object):
+    """
+    Access to the symbol data of each run for make_gdx(), wrapping the data
+    dictionary returned by load_data() (data[symbol][run] = Parameter). Runs
+    that do not define a symbol take it from the default run, and run -1
+    refers to the default data.
+    """
+    
+    def __init__(self, data):
+        self.data = data
+        runIndices = set()
+        for k in data:
+            runIndices.update(data[k].keys())
+        self.defRun, self.runIndices = default_run(runIndices)
         
-        # add parameters to the database
-        workspace = gams.GamsWorkspace()
-        database = workspace.add_database()
-        dbVars = {}
-        for pName in data:
+    def __contains__(self, symbol):
+        return symbol in self.data
         
-            # initialize the parameter in the database
-            if run == -1: parameter = data[pName][defRun]
-            else:
-                try: parameter = data[pName][run]
-                except KeyError: parameter = data[pName][defRun]
-            if pName <> parameter.loadname: continue # avoid duplicate entries for aliases
-            if isinstance(parameter, Set): 
-                dbVars[pName] = database.add_set(parameter.name, parameter.ndim)
-            elif isinstance(parameter, (Parameter, Scalar)): 
-                dbVars[pName] = database.add_parameter(parameter.name, parameter.ndim)
+    def __iter__(self):
+        for run in self.runs():
+            yield (run, self.run_symbols(run))
+        
+    def runs(self):
+        """RUNS() returns the run indices (not including the default)."""
+        return iter(self.runIndices)
+        
+    def symbols(self):
+        """SYMBOLS() returns the names of all symbols with data."""
+        return self.data.keys()
+        
+    def get(self, symbol, run):
+        """GET() returns the Parameter defining a symbol for a run."""
+        runs = self.data[symbol]
+        if run == -1: return runs[self.defRun]
+        else: return runs.get(run, runs[self.defRun])
+        
+    def has(self, symbol, run):
+        """HAS() checks whether a run defines a symbol itself."""
+        return (run <> -1) and (run in self.data[symbol])
+        
+    def varies(self, symbol):
+        """VARIES() checks whether any run defines a symbol."""
+        return len(self.data[symbol]) > 1
+        
+    def run_symbols(self, run):
+        """RUN_SYMBOLS() returns {symbol: Parameter} of symbols a run defines."""
+        return dict(
+            (k, self.get(k, run)) for k in self.symbols() if self.has(k, run)
+        )
+        
+    def cached(self, symbol, run, build):
+        """
+        CACHED() returns build(symbol, run), keeping the Parameters built for
+        the last run asked for until another run is asked for
+        """
+        if run <> self.cacheRun:
+            self.cache = {}
+            self.cacheRun = run
+        if symbol not in self.cache:
+            self.cache[symbol] = build(symbol, run)
+        return self.cache[symbol]
+        
+        
+        
+# ~~ RUNSTREAM ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class RunStream(RunData):
+    """
+    RunData that keeps the definitions rows of each run rather than their
+    Parameters (see the stream option of load_data()). The default
+    Parameters are built once and shared by all runs, each table column is
+    held once however many runs use it, and the Parameters of other runs
+    are built one run at a time as make_gdx() asks for them.
+    """
+    
+    def __init__(self, rows, columns, parameters):
+        self.rows = rows # symbol -> run -> [(indices, values or column, fromTable), ...]
+        self.columns = columns # table column name -> column values
+        self.parameters = parameters
+        
+        # map aliases to the symbol their rows are kept under
+        self.canonical = {}
+        for symbol in rows:
+            for k in parameters:
+                if parameters[k] is parameters[symbol]: self.canonical[k] = symbol
                 
-            # # for the default gdx, skip parameters that will be in the run-specific gdxs
-            # #   and vice-versa for run-specific gdxs
-            # if (run == -1) and (pName not in parDefOnly): continue
-            # elif (run <> -1) and (pName in parDefOnly): continue
-            
-            # loop over parameter data, adding records to the database as we go
-            node = Node(parameter.data)
-            for indices, values in node.traverse():
+        # build the default parameters
+        runIndices = set()
+        for symbol in rows:
+            runIndices.update(rows[symbol].keys())
+        self.defRun, self.runIndices = default_run(runIndices)
+        self.defaults = dict(
+            (symbol, self.build(symbol, self.defRun)) for symbol in rows
+            if self.defRun in rows[symbol]
+        )
+        self.cacheRun = None
+        self.cache = {}
+        
+    def __contains__(self, symbol):
+        return symbol in self.canonical
+        
+    def symbols(self):
+        return self.canonical.keys()
+        
+    def get(self, symbol, run):
+        symbol = self.canonical[symbol]
+        if (run == -1) or (run == self.defRun) or (run not in self.rows[symbol]):
+            return self.defaults[symbol]
+        return self.cached(symbol, run, self.build)
+        
+    def build(self, symbol, run):
+        """BUILD() creates the Parameter of a symbol from a run's rows."""
+        parent = self.parameters[symbol]
+        parameter = parent.__class__(
+            parent.name, parent.indices, parent.description, parent.loadname
+        )
+        for indices, values, fromTable in self.rows[symbol][run]:
+            if fromTable: values = self.columns[values]
+            fill_parameter(parameter, indices, values)
+        return parameter
+        
+    def has(self, symbol, run):
+        return (run <> -1) and (run in self.rows[self.canonical[symbol]])
+        
+    def varies(self, symbol):
+        return len(self.rows[self.canonical[symbol]]) > 1
+        
+        
+        
+# ~~ SCENARIOPLANNER ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class ScenarioPlanner(RunData):
+    """
+    RunData for a grid of scenarios defined by factors (see load_data()),
+    laid over the explicitly defined runs of another RunData (base). Runs of
+    the grid are numbered from firstRun after the explicit runs and are
+    expanded one at a time as make_gdx() asks for them, so only the factor
+    levels and the table columns they refer to are held in memory.
+    """
+    
+    def __init__(
+        self, base, factors, columns, parameters, grid=LOD_DEF_GRD,
+        firstRun=LOD_DEF_RUN
+    ):
+        self.base = base
+        self.defRun = base.defRun
+        self.factors = factors # [(factor name, [(symbol, indices, levels, fromTable), ...]), ...]
+        self.columns = columns # table column name -> column values
+        self.grid = grid.lower()
+        self.firstRun = firstRun
+        self.sizes = [len(rows[0][2]) for name, rows in factors]
+        if self.grid == LOD_GRD_ZIP:
+            if len(set(self.sizes)) > 1:
+                msg = 'All factors of a %s grid must have the same number of levels: %s'
+                raise ValueError(msg % (LOD_GRD_ZIP, dict(zip([f[0] for f in factors], self.sizes))))
+            self.size = self.sizes[0]
+        elif self.grid == LOD_GRD_CRT:
+            self.size = 1
+            for n in self.sizes: self.size *= n
+        else:
+            raise ValueError('Unknown grid %s. Use %s or %s.' % (grid, LOD_GRD_CRT, LOD_GRD_ZIP))
             
-                # check that indices are elements of sets (or are themselves
-                #   sets) that have been defined
-                if isinstance(parameter.data, dict):
-                    for i in xrange(parameter.ndim):
-                        index = indices[i]
-                        if index not in data: # skip indices that are sets
-                            indexSet = data[parameter.indices[i]].get(
-                                run, data[parameter.indices[i]][defRun]
-                            )
-                            setElements = indexSet.data
-                            if index not in indexSet.data:
-                                msg = ''.join((
-                                    'Supplied index \'%s\' for run ' % index,
-                                    '%s, symbol \'%s\', but ' % (str(run), pName),
-                                    '\'%s\' is not a member of \'%s\'.' % (index, indexSet.name)
-                                ))
-                                raise ValueError(msg)
-                                
-                # for the default gdx, skip parameters that will be in the run-specific gdxs
-                #   and vice-versa for run-specific gdxs
-                if (run == -1) and (pName not in parDefOnly): break
-                elif (run <> -1) and (pName in parDefOnly): break
-                
-                # for parameters with multiple values, add each record
-                #   individually
-                if isinstance(values, (list, tuple, set)):
-                
-                    # for one-dimensional parameters (Sets only)
-                    if (parameter.ndim == 1) and isinstance(parameter, Set):
-                        for v in values:
-                            dbVars[parameter.name].add_record(v)
-                    
-                    # for multi-dimensional Sets and Parameters
-                    else:
-                    
-                        # get the individual indices for the set over which records
-                        #   have been defined
-                        for i in xrange(len(indices)):
-                            index = indices[i]
-                            if index in data:
-                                if run == -1: indexParameter = data[index][defRun]
-                                else:
-                                    try: indexParameter = data[index][run]
-                                    except KeyError: indexParameter = data[index][defRun]
-                                break
-                                
-                        # add values individually
-                        for j in xrange(len(values)):
-                            
-                            # define the set of indices specific to this entry
-                            index = indexParameter.data[j]
-                            valueIndices = [x for x in indices]
-                            valueIndices[i] = index
-                            
-                            # add the entry to the database
-                            v = values[j]
-                            if isinstance(parameter, Set):
-                                dbVars[parameter.name].add_record(valueIndices[:-1] + [v])
-                            else:
-                                dbVars[parameter.name].add_record(valueIndices).value = v
-
-                # for Sets not fitting in above
-                elif isinstance(parameter, Set):
+        # map each symbol (and its aliases) to the factor rows that change it
+        self.canonical = {}
+        self.factorRows = {}
+        self.parents = {}
+        for f in xrange(len(factors)):
+            name, rows = factors[f]
+            for symbol, indices, levels, fromTable in rows:
+                if symbol not in base:
+                    msg = 'Symbol %s of factor %s needs a default definition.'
+                    raise ValueError(msg % (symbol, name))
+                for k in parameters:
+                    if parameters[k] is parameters[symbol]: self.canonical[k] = symbol
+                self.parents[symbol] = parameters[symbol]
+                self.factorRows.setdefault(symbol, []).append((f, indices, levels, fromTable))
                 
-                    # 1-dimensional Sets where the set elements are defined as
-                    #   values, but only a single element was given
-                    if parameter.ndim == 1:
-                        dbVars[parameter.name].add_record(values)
-                        
-                    # Sets with multiple dimensions and explicit indices that
-                    #   dont have multiple values
-                    else:
-                        dbVars[parameter.name].add_record(indices)
-                                
-                # for zero-dimensional parameters for which we add a single
-                #   value
-                elif parameter.ndim == 0:
-                    dbVars[parameter.name].add_record().value = values
-                    
-                # for 1+ dimensional values that are explicitly indexed
-                else:
-                    dbVars[parameter.name].add_record(indices).value = values
-                    
+        self.cacheRun = None
+        self.cache = {}
         
-        # add empty parameters for data not supplied by the user
-        if parameters is not None:
-            added = set()
-            for pName in parameters:
-                parameter = parameters[pName]
-                if parameter.external and (parameter.loadname not in dbVars):
-                    if parameter in added: continue
-                    if isinstance(parameter, Set): 
-                        dbVars[pName] = database.add_set(parameter.loadname, parameter.ndim)
-                        added.add(parameter)
-                    elif isinstance(parameter, (Parameter, Scalar)): 
-                        dbVars[pName] = database.add_parameter(parameter.loadname, parameter.ndim)
-                        added.add(parameter)
-            
-                    
-        # write the gdx for this run    
-        if run == -1: outname = os.path.join(outputDirectory, defGDXName)
-        else: outname = os.path.join(outputDirectory, '%s%i' % (runGDXPref, run))
-        try: database.export(outname)
-        except: 
-            print 'Unable to create GDX file %s' % outname
-            
-        if zip:
-        
-            # compress to zip
-            outfile = outname + MAK_ZIP
-            outgdx = outname + MAK_GDX
-            zh = zipfile.ZipFile(outfile, "w")
-            zh.write(outgdx, os.path.basename(outgdx), zipfile.ZIP_DEFLATED)
-            zh.close()
-            
-            # delete the gdx
-            try: os.remove(outgdx)
-            except: print 'WARNING: Could not delete %s.' % outgdx
+    def __contains__(self, symbol):
+        return symbol in self.base
         
-        else: outfile = outname + MAK_GDX
-        outfiles.append(outfile)
+    def __len__(self):
+        return len(self.base.runIndices) + self.size
         
-        # try to clear up some memory
-        database.clear()
-        del database, workspace
+    def runs(self):
+        import itertools
+        return itertools.chain(
+            self.base.runs(), xrange(self.firstRun, self.firstRun+self.size)
+        )
         
+    def symbols(self):
+        return self.base.symbols()
         
-    return outfiles
-    
-    
+    def planned(self, run):
+        """PLANNED() checks whether a run belongs to the factor grid."""
+        if not isinstance(run, (int, long)): return False
+        return (self.firstRun <= run < self.firstRun+self.size)
+        
+    def levels(self, run):
+        """LEVELS() returns the level index of each factor for a grid run."""
+        i = run - self.firstRun
+        if self.grid == LOD_GRD_ZIP: return [i]*len(self.sizes)
+        levels = []
+        for n in self.sizes[::-1]: # first factor changes slowest
+            levels.append(i % n)
+            i //= n
+        return levels[::-1]
+        
+    def scenario(self, run):
+        """SCENARIO() returns {factor name: level index} for a grid run."""
+        return dict(zip([f[0] for f in self.factors], self.levels(run)))
+        
+    def get(self, symbol, run):
+        canonical = self.canonical.get(symbol, None)
+        if (canonical is None) or (not self.planned(run)):
+            return self.base.get(symbol, run)
+        return self.cached(canonical, run, self.expand)
+        
+    def expand(self, symbol, run):
+        """
+        EXPAND() creates the Parameter of a symbol for a grid run from its
+        factor levels, taking the dimensions not set by the factors from
+        the symbol's default data
+        """
+        import copy
+        parent = self.parents[symbol]
+        parameter = parent.__class__(
+            parent.name, parent.indices, parent.description, parent.loadname
+        )
+        parameter.data = copy.deepcopy(self.base.get(symbol, -1).data)
+        levels = self.levels(run)
+        for f, indices, values, fromTable in self.factorRows[symbol]:
+            value = values[levels[f]]
+            if fromTable: value = self.columns[value]
+            fill_parameter(parameter, indices, value)
+        return parameter
+        
+    def has(self, symbol, run):
+        if self.planned(run): return symbol in self.canonical
+        return self.base.has(symbol, run)
+        
+    def varies(self, symbol):
+        return (symbol in self.canonical) or self.base.varies(symbol)
+        
+        
+        
+# ~~ NODE ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class Node(object):
+    """
+    dictionary traversion for traversing over parameter definitions
+    dictionary and getting all values
+    """
+    def __init__(self, nodeData, key=None, parent=None):
+        self.parent = parent
+        self.children = []
+        self.key = key
+        if isinstance(nodeData, dict):
+            for k in nodeData:
+                self.children.append(Node(nodeData[k], k, self))
+        else:
+            self.children.append(nodeData)
+
+    def trace_up(self):
+        keys = []
+        cur = self
+        while cur.parent is not None:
+            keys.append(cur.key)
+            cur = cur.parent
+        return keys[::-1]
+
+    def traverse(self):
+        stack = [self]
+        while len(stack) > 0:
+            cur = stack.pop()
+            for child in cur.children:
+                if isinstance(child, Node):
+                    stack.append(child)
+                else:
+                    yield (cur.trace_up(), child)
+
+
+
+# ~~ gdx_name() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def gdx_name(run, outputDirectory, defGDXName, runGDXPref):
+    """
+    GDX_NAME() returns the output file name (without extension) of the default
+    GDX (run == -1) or of a run-specific GDX, as used by make_gdx()
+    """
+    import os
+    if run == -1: return os.path.join(outputDirectory, defGDXName)
+    else: return os.path.join(outputDirectory, '%s%i' % (runGDXPref, run))
+
+
+
+# ~~ gdx_hash() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def gdx_hash(run, shared):
+    """
+    GDX_HASH() calculates a hash of the symbol data that go into the default
+    GDX (run == -1) or a run-specific GDX, without building the GDX. The
+    hash covers the data of every symbol written to the GDX (plus the
+    default data delta records are compared against), the data of the sets
+    those symbols are indexed over, and the names of the empty symbols
+    added for missing data.
+
+    INPUTS:
+        run         = run index to hash. -1 indicates the default GDX
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+
+    OUTPUTS:
+        hexadecimal hash string
+    """
+
+    import hashlib
+
+    data = shared['data']
+    modes = shared['modes']
+    parameters = shared['parameters']
+    get_parameter = data.get
+
+    # update the hash with nested data in an order-independent way
+    def update(h, value):
+        if isinstance(value, dict):
+            h.update('{')
+            for k in sorted(value.keys()):
+                h.update(repr(k) + ':')
+                update(h, value[k])
+            h.update('}')
+        else: h.update(repr(value))
+
+    # update the hash with a symbol's data as taken from a run
+    def update_symbol(h, pName, source):
+        parameter = get_parameter(pName, source)
+        h.update(repr((pName, parameter.__class__.__name__, parameter.ndim)))
+        update(h, parameter.data)
+        for index in parameter.indices:
+            if index in data: update(h, get_parameter(index, source).data)
+
+    h = hashlib.sha1()
+    h.update(repr((MAK_MAN_VER, run <> -1)))
+    h.update(repr(sorted(shared.get('guildMap', {}).items())))
+    h.update(repr(sorted(shared.get('dominated', {}).get(run, ()))))
+    inGDX = set()
+    for pName in sorted(data.symbols()):
+        parameter = get_parameter(pName, run)
+        if pName <> parameter.loadname: continue
+        inGDX.add(pName)
+        mode = modes[pName]
+        h.update(repr(mode))
+        if run == -1:
+            if mode <> MAK_MOD_RUN: update_symbol(h, pName, -1)
+        elif mode == MAK_MOD_DLT:
+            if data.has(pName, run):
+                update_symbol(h, pName, run)
+                update_symbol(h, pName, -1)
+        elif mode <> MAK_MOD_DEF: update_symbol(h, pName, run)
+
+    # active-domain sets, hashed by the data they are derived from
+    if 'domains' in shared:
+        inGDX.update(DMN_DIM.keys())
+        h.update(repr((sorted(DMN_DIM.keys()), shared['domains'])))
+        if (run == -1) == (shared['domains'] == MAK_MOD_DEF):
+            for pName in DMN_SRC:
+                if pName not in data: continue
+                update_symbol(h, pName, run)
+                if run <> -1: update_symbol(h, pName, -1)
+
+    # empty symbols added for data not supplied by the user
+    if parameters is not None:
+        empty = set(
+            parameters[k].loadname for k in parameters
+            if parameters[k].external and (parameters[k].loadname not in inGDX)
+        )
+        h.update(repr(sorted(empty)))
+
+    return h.hexdigest()
+
+
+
+# ~~ read_manifest() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def read_manifest(outputDirectory):
+    """
+    READ_MANIFEST() reads the manifest of GDX content hashes written by
+    make_gdx() to [outputDirectory]. Returns None if there is no manifest.
+    """
+    import os, json
+    manifestFile = os.path.join(outputDirectory, MAK_MAN)
+    if not os.path.exists(manifestFile): return None
+    with open(manifestFile, 'r') as fh:
+        manifest = json.load(fh)
+    if manifest.get(MAK_MAN_KVR, None) <> MAK_MAN_VER: return None
+    return manifest[MAK_MAN_KFL]
+
+
+
+# ~~ write_manifest() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def write_manifest(outputDirectory, files):
+    """
+    WRITE_MANIFEST() writes the manifest of GDX content hashes, where [files]
+    maps output file names (without directory) to hashes from gdx_hash()
+    """
+    import os, json
+    manifestFile = os.path.join(outputDirectory, MAK_MAN)
+    tempFile = manifestFile + '.tmp'
+    with open(tempFile, 'w') as fh:
+        json.dump(
+            {MAK_MAN_KVR: MAK_MAN_VER, MAK_MAN_KFL: files}, fh, indent=1,
+            sort_keys=True
+        )
+    if os.path.exists(manifestFile): os.remove(manifestFile)
+    os.rename(tempFile, manifestFile)
+    return manifestFile
+
+
+
+# ~~ run_features() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def run_features(run, shared):
+    """
+    RUN_FEATURES() returns the size features of the model of a run, which
+    run_schedule.py uses to predict how long the run takes to solve:
+
+        o FEA_CAN, the number of candidate actions (binaries) left after
+          presolve
+        o FEA_NBR, the number of barriers
+        o FEA_GLD, the number of guilds left after presolve
+        o FEA_TGT, the budget tightness, i.e. the total budget over the
+          total cost of the candidate actions (1 or more when every
+          candidate can be afforded)
+
+    INPUTS:
+        run         = run index. -1 indicates the default data
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+
+    OUTPUTS:
+        dictionary of {feature name: value}
+    """
+
+    import numpy
+
+    data = shared['data']
+
+    def records(pName):
+        if pName not in data: return (numpy.empty((0, 1), dtype=object), numpy.zeros(0))
+        keys, values = effective_records(pName, run, shared)
+        return (numpy.asarray(keys), numpy.asarray(values, dtype=float))
+
+    # candidates that are not dominated, and their costs, taken in order
+    #   when the costs have the same keys (as when both come from a table)
+    dominated = shared.get('dominated', {}).get(run, set())
+    keys, values = records(PRE_CAN)
+    isCandidate = values <> 0
+    if (len(dominated) > 0) and (len(keys) > 0):
+        isCandidate &= numpy.array([tuple(k) not in dominated for k in keys.tolist()], dtype=bool)
+    costKeys, costValues = records(PRE_CST)
+    if (costKeys.shape == keys.shape) and (costKeys == keys).all(): cost = costValues
+    else: cost = lookup_records(costKeys, costValues, keys)
+    totalCost = cost[isCandidate].clip(min=0.).sum()
+    totalBudget = records(PRE_BUD)[1].sum()
+    if totalCost > 0: tightness = float(totalBudget / totalCost)
+    else: tightness = 1.
+    guilds = set(records(PRE_GLD)[0].reshape(-1).tolist())
+    guildMap = shared.get('guildMap', {})
+    return {
+        FEA_CAN: int(isCandidate.sum()),
+        FEA_NBR: len(records(FEA_BAR)[0]),
+        FEA_GLD: len(set(guildMap.get(g, g) for g in guilds)),
+        FEA_TGT: tightness,
+        FEA_SCN: 1,
+    }
+
+
+
+# ~~ job_features() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def job_features(job, shared):
+    """
+    JOB_FEATURES() returns run_features() for a job of make_gdx(), which is
+    a run index, or a tuple of scenario runs for the scenario GDX (whose
+    size is that of its first run, solved FEA_SCN times)
+    """
+    if not isinstance(job, tuple): return run_features(job, shared)
+    features = run_features(job[0], shared)
+    features[FEA_SCN] = len(job)
+    return features
+
+
+
+# ~~ read_features() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def read_features(outputDirectory):
+    """
+    READ_FEATURES() reads the size features written by make_gdx() to
+    [outputDirectory], as {output file name: features} (see run_features()).
+    Returns an empty dictionary if there are none.
+    """
+    import os, json
+    featureFile = os.path.join(outputDirectory, MAK_FEA)
+    if not os.path.exists(featureFile): return {}
+    with open(featureFile, 'r') as fh:
+        return dict((str(k), v) for k, v in json.load(fh).iteritems())
+
+
+
+# ~~ write_features() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def write_features(outputDirectory, features):
+    """
+    WRITE_FEATURES() writes the size features of the GDXs, where [features]
+    maps output file names (without directory) to run_features() results
+    """
+    import os, json
+    featureFile = os.path.join(outputDirectory, MAK_FEA)
+    tempFile = featureFile + '.tmp'
+    with open(tempFile, 'w') as fh:
+        json.dump(features, fh, indent=1, sort_keys=True)
+    if os.path.exists(featureFile): os.remove(featureFile)
+    os.rename(tempFile, featureFile)
+    return featureFile
+
+
+
+# ~~ symbol_records() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def symbol_records(pName, source, shared):
+    """
+    SYMBOL_RECORDS() builds the records of a symbol from the data of one run
+    (or the default data), as part of make_gdx()
+
+    INPUTS:
+        pName       = name of the symbol in the data dictionary
+        source      = run index from which to take the data. -1 indicates
+            the default data
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+
+    OUTPUTS:
+        (keys, values) where keys is an (n x ndim) array of record indices
+        and values is an array of the n record values (zeros for Sets)
+    """
+
+    import numpy
+
+    data = shared['data']
+    parameter = data.get(pName, source)
+
+    # chunks of records, as (keys, values) arrays
+    chunks = []
+    add = chunks.append
+
+    # loop over parameter data, adding records as we go
+    node = Node(parameter.data)
+    for indices, values in node.traverse():
+
+        # check that indices are elements of sets (or are themselves
+        #   sets) that have been defined
+        if isinstance(parameter.data, dict):
+            for i in xrange(parameter.ndim):
+                index = indices[i]
+                if index not in data: # skip indices that are sets
+                    indexSet = data.get(parameter.indices[i], source)
+                    if index not in indexSet.data:
+                        msg = ''.join((
+                            'Supplied index \'%s\' for run ' % index,
+                            '%s, symbol \'%s\', but ' % (str(source), pName),
+                            '\'%s\' is not a member of \'%s\'.' % (index, indexSet.name)
+                        ))
+                        raise ValueError(msg)
+
+        # for parameters with multiple values, add the records
+        #   all at once
+        if isinstance(values, (list, tuple, set)):
+
+            # for one-dimensional parameters (Sets only)
+            if (parameter.ndim == 1) and isinstance(parameter, Set):
+                add((numpy.array(list(values), dtype=object).reshape((-1, 1)), None))
+
+            # for multi-dimensional Sets and Parameters
+            else:
+
+                # get the individual indices for the set over which records
+                #   have been defined
+                for i in xrange(len(indices)):
+                    index = indices[i]
+                    if index in data:
+                        indexParameter = data.get(index, source)
+                        break
+
+                # define the set of indices specific to each entry
+                n = len(values)
+                keys = numpy.empty((n, len(indices)), dtype=object)
+                keys[:] = indices
+                keys[:,i] = indexParameter.data[:n]
+
+                # add the entries
+                if isinstance(parameter, Set):
+                    keys = numpy.hstack((
+                        keys[:,:-1], numpy.array(values, dtype=object).reshape((-1, 1))
+                    ))
+                    add((keys, None))
+                else:
+                    add((keys, values))
+
+        # for Sets not fitting in above
+        elif isinstance(parameter, Set):
+
+            # 1-dimensional Sets where the set elements are defined as
+            #   values, but only a single element was given
+            if parameter.ndim == 1:
+                add(([[values]], None))
+
+            # Sets with multiple dimensions and explicit indices that
+            #   dont have multiple values
+            else:
+                add(([indices], None))
+
+        # for zero-dimensional parameters for which we add a single
+        #   value
+        elif parameter.ndim == 0:
+            add((None, [values]))
+
+        # for 1+ dimensional values that are explicitly indexed
+        else:
+            add(([indices], [values]))
+
+    # combine the chunks
+    ndim = parameter.ndim
+    keys = []
+    values = []
+    for chunkKeys, chunkValues in chunks:
+        if chunkKeys is None: chunkKeys = numpy.empty((len(chunkValues), ndim), dtype=object)
+        else: chunkKeys = numpy.asarray(chunkKeys, dtype=object).reshape((-1, ndim))
+        if chunkValues is None: chunkValues = numpy.zeros(len(chunkKeys))
+        keys.append(chunkKeys)
+        values.append(numpy.asarray(chunkValues, dtype=float))
+    if len(keys) == 0:
+        keys, values = (numpy.empty((0, ndim), dtype=object), numpy.zeros(0))
+    else: keys, values = (numpy.concatenate(keys), numpy.concatenate(values))
+
+    # apply the reductions of any presolve steps
+    return presolve_records(pName, source, keys, values, shared)
+
+
+
+# ~~ presolve_records() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def presolve_records(pName, source, keys, values, shared):
+    """
+    PRESOLVE_RECORDS() applies the reductions found by the presolve steps
+    of make_gdx() (see MAK_PRE at top of script) to the records of a symbol
+    built by symbol_records()
+    """
+
+    import numpy
+
+    # merged guilds are renamed to the guild kept in their place, and the
+    #   records that then repeat are dropped
+    guildMap = shared.get('guildMap', None)
+    if guildMap and (pName in shared['guildDims']) and (len(keys) > 0):
+        d = shared['guildDims'][pName]
+        keys = keys.copy()
+        keys[:,d] = [guildMap.get(g, g) for g in keys[:,d]]
+        joined = ['\x00'.join(row) for row in keys.tolist()]
+        _, first = numpy.unique(joined, return_index=True)
+        first.sort()
+        keys = keys[first]
+        values = values[first]
+
+    # dominated candidate actions are dropped
+    dominated = shared.get('dominated', None)
+    if dominated and (pName == PRE_CAN) and (len(keys) > 0):
+        runDominated = dominated.get(source, set())
+        keep = numpy.array([tuple(k) not in runDominated for k in keys.tolist()], dtype=bool)
+        keys = keys[keep]
+        values = values[keep]
+
+    return (keys, values)
+
+
+
+# ~~ guild_dimensions() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def guild_dimensions(data, parameters):
+    """
+    GUILD_DIMENSIONS() finds the symbols that are indexed by (or are) the
+    guild set PRE_GLD and returns {symbol: position of the guild index}, or
+    None if a symbol has more than one guild index
+    """
+    guildSet = parameters[PRE_GLD]
+    dims = {}
+    for pName in data.symbols():
+        parameter = data.get(pName, -1)
+        if pName <> parameter.loadname: continue
+        if parameters.get(pName, None) is guildSet: positions = [0]
+        else:
+            positions = [
+                i for i in xrange(parameter.ndim)
+                if parameters.get(parameter.indices[i], None) is guildSet
+            ]
+        if len(positions) > 1:
+            print 'Symbol %s has more than one %s index. Guilds will not be collapsed.' % (pName, PRE_GLD)
+            return None
+        elif len(positions) == 1: dims[pName] = positions[0]
+    return dims
+
+
+
+# ~~ collapse_guilds() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def collapse_guilds(shared, runs):
+    """
+    COLLAPSE_GUILDS() is a presolve step of make_gdx() that merges
+    passability guilds whose data are the same in every run. Two guilds
+    are merged when every symbol indexed by guild other than PRE_T2G (i.e.
+    passBase, passChange, and membership of the guild subsets) has the same
+    records for both. cumPass and the constraints linking actions to it are
+    then created once for the merged guilds, and PRE_T2G maps the targets
+    of all of them to the guild kept, so the optimum does not change.
+    Guilds that share a target are not merged, since the target would then
+    be counted fewer times in the objective.
+
+    INPUTS:
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+        runs        = run indices (not including the default)
+
+    OUTPUTS:
+        dictionary mapping each merged guild to the guild kept in its place
+    """
+
+    import hashlib
+
+    data = shared['data']
+    dims = shared['guildDims']
+    mapName = [k for k in dims if shared['parameters'].get(k, None) is shared['parameters'][PRE_T2G]]
+
+    # hash the records of each guild, over all runs
+    hashes = {}
+    guilds = [] # in order of appearance, starting with the guild set
+    targets = {} # targets of each guild
+    symbols = sorted(dims, key=lambda k: (k <> PRE_GLD, k))
+    for run in [-1] + list(runs):
+        for pName in symbols:
+            if (run <> -1) and (not data.has(pName, run)): continue
+            keys, values = symbol_records(pName, run, shared)
+            d = dims[pName]
+            if pName in mapName:
+                for row in keys.tolist():
+                    targets.setdefault(row[d], set()).update(row[:d] + row[d+1:])
+                continue
+            slices = {}
+            for row, value in zip(keys.tolist(), values.tolist()):
+                g = row[d]
+                if g not in hashes:
+                    hashes[g] = hashlib.sha1()
+                    guilds.append(g)
+                slices.setdefault(g, []).append((row[:d] + row[d+1:], value))
+            for g in guilds:
+                hashes[g].update(repr((pName, run, sorted(slices.get(g, [])))))
+
+    # merge guilds with the same hash that do not share targets
+    groups = {}
+    for g in guilds:
+        groups.setdefault(hashes[g].hexdigest(), []).append(g)
+    guildMap = {}
+    for h in groups: # members are in order of appearance, so the first is kept
+        kept = [] # (guild kept, targets of the guilds merged into it)
+        for g in groups[h]:
+            gTargets = targets.get(g, set())
+            for keptGuild, keptTargets in kept:
+                if keptTargets.isdisjoint(gTargets):
+                    guildMap[g] = keptGuild
+                    keptTargets.update(gTargets)
+                    break
+            else: kept.append((g, set(gTargets)))
+
+    print 'Collapsed %i %s into %i.' % (len(guilds), PRE_GLD, len(guilds)-len(guildMap))
+    return guildMap
+
+
+
+# ~~ dominated_candidates() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def dominated_candidates(run, shared):
+    """
+    DOMINATED_CANDIDATES() finds the candidate actions (PRE_CAN) of a run
+    that can never be part of an optimal solution. Since the effects of the
+    projects done at a barrier add up, a project is only dominated when
+    doing nothing at the barrier is at least as good:
+    
+        o its cost is non-negative and none of its effects (passChange of
+          passability projects, benefitMaxChange of benefit projects) can
+          improve the objective or the caps, i.e. every effect is zero or
+          lowers passability/benefit of beneficiary guilds or raises it for
+          control guilds (when obj2Weight <= 0), or
+          
+        o its cost is larger than a budget it draws on, and no candidate
+          drawing on that budget has a negative cost
+          
+    Guilds and targets whose preferred direction is unclear (e.g. negative
+    weights, a guild that is both beneficiary and control, or targets with
+    negative benefitMaxBase or benefitMaxChange records, for which lower
+    passability can raise the objective) keep every project with a nonzero
+    effect on them.
+
+    INPUTS:
+        run         = run index. -1 indicates the default data
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+
+    OUTPUTS:
+        (set of dominated (barrier, project) tuples, the subset of them that
+        is dominated only by its cost exceeding a budget, number of
+        candidates)
+    """
+
+    data = shared['data']
+
+    # records of a symbol as GAMS sees them in this run, as lists
+    def records(pName):
+        if pName not in data: return ([], [])
+        keys, values = effective_records(pName, run, shared)
+        return (keys.tolist(), values.tolist())
+
+    def members(pName):
+        return set(tuple(k) if len(k) > 1 else k[0] for k in records(pName)[0])
+
+    # candidates, costs and budgets
+    keys, values = records(PRE_CAN)
+    candidates = [tuple(k) for k, v in zip(keys, values) if v <> 0]
+    cost = dict((tuple(k), v) for k, v in zip(*records(PRE_CST)))
+    budget = dict((k[0], v) for k, v in zip(*records(PRE_BUD)))
+    projectBudgets = {}
+    for p, b in members(PRE_P2B): projectBudgets.setdefault(p, []).append(b)
+    negativeBudgets = set()
+    for c in candidates:
+        if cost.get(c, 0.) < 0: negativeBudgets.update(projectBudgets.get(c[1], ()))
+
+    # direction in which passability of each guild (and benefit of each
+    #   target) is better: 1, -1, 0 (does not matter) or None (unclear)
+    obj2Weight = records(PRE_OB2)[1]
+    if len(obj2Weight) == 0: obj2Weight = 0.
+    else: obj2Weight = obj2Weight[0]
+    weight = dict((k[0], v) for k, v in zip(*records(PRE_WGT)))
+    beneficiary = members(PRE_GBN)
+    control = members(PRE_GCN)
+    guildTargets = {}
+    targetGuilds = {}
+    for t, g in members(PRE_T2G):
+        guildTargets.setdefault(g, set()).add(t)
+        targetGuilds.setdefault(t, set()).add(g)
+    negative = set(k[1] for k, v in zip(*records(PRE_BMB)) if v < 0)
+    negative.update(k[2] for k, v in zip(*records(PRE_BCH)) if v < 0)
+    guildDir = {}
+    for g in guildTargets:
+        directions = set()
+        if g in beneficiary: directions.add(1)
+        if g in control: directions.add(-1 if obj2Weight <= 0 else None)
+        if min([weight.get(t, 0.) for t in guildTargets[g]]) < 0: directions.add(None)
+        if len(guildTargets[g] & negative) > 0: directions.add(None)
+        if len(directions) == 0: guildDir[g] = 0
+        elif len(directions) == 1: guildDir[g] = directions.pop()
+        else: guildDir[g] = None
+    targetDir = {}
+    for t in targetGuilds:
+        directions = set(guildDir[g] for g in targetGuilds[t]) - set([0])
+        if t in negative: targetDir[t] = None
+        elif len(directions) == 0: targetDir[t] = 0
+        elif len(directions) == 1: targetDir[t] = directions.pop()
+        else: targetDir[t] = None
+
+    def helps(value, direction):
+        if direction is None: return value <> 0
+        return value*direction > 0
+
+    # candidates with an effect that could help
+    helpful = set()
+    passProjects = members(PRE_PPS)
+    for k, v in zip(*records(PRE_PCH)):
+        if (k[1] in passProjects) and helps(v, guildDir.get(k[2], None)):
+            helpful.add((k[0], k[1]))
+    benefitProjects = members(PRE_PBN)
+    for k, v in zip(*records(PRE_BCH)):
+        if (k[1] in benefitProjects) and helps(v, targetDir.get(k[2], None)):
+            helpful.add((k[0], k[1]))
+
+    dominated = set()
+    overBudget = set()
+    for c in candidates:
+        cCost = cost.get(c, 0.)
+        if cCost < 0: continue
+        if c not in helpful: dominated.add(c)
+        else:
+            for b in projectBudgets.get(c[1], ()):
+                if (b in budget) and (b not in negativeBudgets) and (cCost > budget[b]):
+                    dominated.add(c)
+                    overBudget.add(c)
+                    break
+
+    return (dominated, overBudget, len(candidates))
+
+
+
+# ~~ find_dominated() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def find_dominated(shared, runs):
+    """
+    FIND_DOMINATED() is a presolve step of make_gdx() that finds the
+    dominated candidate actions of the default data and of every run (see
+    dominated_candidates()), reporting how many binaries are eliminated
+    from each run, by dominance and by exceeding a budget. Returns {run:
+    set of dominated (barrier, project)}.
+    """
+    dominated = {}
+    for run in [-1] + list(runs):
+        dominated[run], overBudget, count = dominated_candidates(run, shared)
+        if run == -1: name = 'Default data'
+        else: name = 'Run %s' % str(run)
+        print '%s: eliminated %i of %i candidate actions (%i by dominance, %i over budget).' % (
+            name, len(dominated[run]), count, len(dominated[run]) - len(overBudget),
+            len(overBudget)
+        )
+    return dominated
+
+
+
+# ~~ effective_records() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def effective_records(pName, run, shared):
+    """
+    EFFECTIVE_RECORDS() returns the (keys, values) records of a symbol as
+    GAMS sees them in a run, i.e. with the records of a delta run laid over
+    the default records (see symbol_modes())
+    """
+
+    import numpy
+
+    data = shared['data']
+    keys, values = symbol_records(pName, run, shared)
+    if run == -1: return (keys, values)
+    if (shared['modes'].get(pName, None) <> MAK_MOD_DLT) and (pName not in shared.get('overlay', ())):
+        return (keys, values)
+    if not data.has(pName, run): return (keys, values)
+    defKeys, defValues = symbol_records(pName, -1, shared)
+    if (len(keys) == 0) or (len(defKeys) == 0): return (numpy.concatenate((defKeys, keys)), numpy.concatenate((defValues, values)))
+    keep = ~numpy.in1d(join_keys(defKeys), join_keys(keys))
+    return (
+        numpy.concatenate((defKeys[keep], keys)),
+        numpy.concatenate((defValues[keep], values))
+    )
+
+
+
+# ~~ validate_run() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def validate_run(run, shared):
+    """
+    VALIDATE_RUN() checks the data of a run before its GDX is written, so
+    that runs that would fail are caught before they are sent to the
+    cluster. The checks are
+    
+        o the abort checks of Habitat_Opt.gms: cntHabMag (|benefitMaxBase|
+          smaller than |benefitMaxChange|) and cntEffOOB (passBase plus all
+          passChange of passability projects outside [0, 1])
+        o that the indices of every record are members of the sets the
+          symbol is declared over (GAMS would otherwise drop the record
+          without saying so)
+        o that every barrier that is not a root has exactly one downstream
+          barrier, that roots have none, and that following downstream
+          barriers from every barrier reaches a root
+
+    The default data (run -1) get every check. A run gets only the checks
+    that involve a symbol the run defines itself (see RunData.has()), since
+    the others were passed by the default data. Records are checked as
+    given, before any presolve reductions.
+
+    INPUTS:
+        run         = run index to check, -1 for the default data
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+
+    OUTPUTS:
+        list of messages describing the problems found (empty if the run is
+        valid)
+    """
+
+    import numpy
+
+    data = shared['data']
+    shared = dict((k, v) for k, v in shared.iteritems() if k not in MAK_PRE_KEY)
+    problems = []
+
+    # whether a check involving these symbols is needed for this run
+    def changed(*pNames):
+        if run == -1: return True
+        return any((pName in data) and data.has(pName, run) for pName in pNames)
+
+    # records of a symbol, where records with explicit indices that are not
+    #   in their sets make symbol_records() raise a ValueError
+    def records(pName):
+        if pName not in data: return (numpy.empty((0, 0), dtype=str), numpy.zeros(0))
+        try: keys, values = effective_records(pName, run, shared)
+        except ValueError as e:
+            problems.append(str(e))
+            ndim = data.get(pName, run).ndim
+            return (numpy.empty((0, ndim), dtype=str), numpy.zeros(0))
+        return (numpy.asarray(keys, dtype=str), values)
+
+    def report(msg, ids):
+        ids = [str(tuple(k)) if isinstance(k, (list, tuple)) else str(k) for k in ids]
+        more = ''
+        if len(ids) > VAL_IDS: more = ', ... (%i more)' % (len(ids) - VAL_IDS)
+        problems.append('%s (%i): %s%s' % (msg, len(ids), ', '.join(ids[:VAL_IDS]), more))
+
+    # cntHabMag
+    if changed(PRE_BMB, PRE_BCH):
+        baseKeys, baseValues = records(PRE_BMB)
+        changeKeys, changeValues = records(PRE_BCH)
+    else: changeKeys = []
+    if len(changeKeys) > 0:
+        base = lookup_records(baseKeys, baseValues, changeKeys[:,[0,2]])
+        bad = numpy.abs(base) < numpy.abs(changeValues)
+        if bad.any():
+            report(
+                'cntHabMag: |%s| < |%s| for barrier/project/target' % (PRE_BMB, PRE_BCH),
+                changeKeys[bad].tolist()
+            )
+
+    # cntEffOOB
+    if changed(PRE_PBS, PRE_PCH, PRE_PPS):
+        baseKeys, baseValues = records(PRE_PBS)
+        changeKeys, changeValues = records(PRE_PCH)
+        passProjects = records(PRE_PPS)[0]
+        if len(changeKeys) > 0:
+            inPP = numpy.in1d(changeKeys[:,1], passProjects.reshape(-1))
+            changeKeys = changeKeys[inPP][:,[0,2]]
+            changeValues = changeValues[inPP]
+        else: changeKeys = changeKeys.reshape((0, 2))
+        allKeys = numpy.concatenate((baseKeys.reshape((-1, 2)), changeKeys))
+        allValues = numpy.concatenate((baseValues, changeValues))
+    else: allKeys = []
+    if len(allKeys) > 0:
+        _, first, inverse = numpy.unique(join_keys(allKeys), return_index=True, return_inverse=True)
+        possible = numpy.bincount(inverse, weights=allValues)
+        bad = (possible > 1 + VAL_TOL) | (possible < -VAL_TOL)
+        if bad.any():
+            report(
+                'cntEffOOB: possible passability outside [0, 1] for barrier/guild',
+                allKeys[first[bad]].tolist()
+            )
+
+    # roots and downstream barriers (a check of the indices of PRE_DWN below
+    #   also means this one ran, so roots are set when they are needed)
+    if changed(EXC_BAR_NAM, PRE_RUT, PRE_DWN):
+        barriers = numpy.unique(records(EXC_BAR_NAM)[0].reshape(-1))
+        rootKeys, rootValues = records(PRE_RUT)
+        roots = numpy.unique(rootKeys[rootValues <> 0].reshape(-1))
+        downKeys = records(PRE_DWN)[0].reshape((-1, 2))
+        fromRoot = numpy.in1d(downKeys[:,0], roots)
+        bad = fromRoot & numpy.in1d(downKeys[:,1], barriers)
+        if bad.any():
+            report('Root barriers with a downstream barrier', downKeys[bad].tolist())
+        links = downKeys[~fromRoot]
+        nonRoots = barriers[~numpy.in1d(barriers, roots)]
+        missing = nonRoots[~numpy.in1d(nonRoots, links[:,0])]
+        if len(missing) > 0:
+            report('Barriers that are not roots but have no downstream barrier', missing.tolist())
+        linked, counts = numpy.unique(links[:,0], return_counts=True)
+        if (counts > 1).any():
+            report('Barriers with more than one downstream barrier', linked[counts > 1].tolist())
+        if len(barriers) > 0:
+
+            # follow downstream barriers by doubling the number of steps taken,
+            #   where roots (and barriers without a valid link) point to themselves
+            parent = numpy.arange(len(barriers))
+            valid = numpy.in1d(links[:,0], barriers) & numpy.in1d(links[:,1], barriers)
+            parent[numpy.searchsorted(barriers, links[valid,0])] = numpy.searchsorted(barriers, links[valid,1])
+            for i in xrange(int(numpy.ceil(numpy.log2(len(barriers)))) + 1):
+                parent = parent[parent]
+            isRoot = numpy.in1d(barriers, roots)
+            bad = ~isRoot[parent] & ~numpy.in1d(barriers, missing)
+            if bad.any():
+                report('Barriers whose downstream barriers never reach a root', barriers[bad].tolist())
+
+    # index membership
+    members = {}
+    for pName in data.symbols():
+        parameter = data.get(pName, run)
+        if pName <> parameter.loadname: continue
+        if not changed(pName, *[index for index in parameter.indices if index is not None]): continue
+        keys = records(pName)[0]
+        if len(keys) == 0: continue
+        if pName == PRE_DWN: keys = keys[~numpy.in1d(keys[:,0], roots)] # not used by the model
+        for i in xrange(parameter.ndim):
+            index = parameter.indices[i]
+            if (index is None) or (index not in data): continue
+            if data.get(index, run).ndim <> 1: continue
+            if index not in members: members[index] = records(index)[0].reshape(-1)
+            bad = ~numpy.in1d(keys[:,i], members[index])
+            if bad.any():
+                report(
+                    '%s: indices not in %s' % (pName, index),
+                    numpy.unique(keys[bad,i]).tolist()
+                )
+
+    return problems
+
+
+
+# ~~ validate_runs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def validate_runs(shared, runs):
+    """
+    VALIDATE_RUNS() checks every run with validate_run(), reports the
+    problems found, and returns the set of invalid runs. make_gdx() checks
+    the default data here, and the runs in write_job() as they are written.
+    """
+    invalid = set()
+    for run in runs:
+        problems = validate_run(run, shared)
+        if len(problems) == 0: continue
+        invalid.add(run)
+        print 'Run %s is invalid and will not be written:\n    %s' % (
+            str(run), '\n    '.join(problems)
+        )
+    if len(invalid) > 0:
+        print '%i invalid runs will not be written.' % len(invalid)
+    return invalid
+
+
+
+# ~~ active_domains() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def active_domains(run, shared):
+    """
+    ACTIVE_DOMAINS() builds the sparse sets over which Habitat_Opt_Domains.gms
+    generates its variables and equations, so that model generation scales
+    with the candidate actions rather than with the full cross product of
+    barriers, projects and guilds:
+
+        DMN_ACT(J,P)        candidate actions (isCandidate nonzero, after
+            any dominance presolve)
+        DMN_PAS(J,P,G)      candidate passability projects with a nonzero
+            passChange for the guild
+        DMN_BEN(J,P,G)      candidate benefit projects with a nonzero
+            benefitMaxChange for a target of the guild
+        DMN_DWN(J,K)        Downstream pairs of barriers that are not roots
+        DMN_PDN(J,K,P,G)    DMN_PAS records of non-root barriers, joined
+            with their downstream barrier
+
+    The records left out are those that the model either fixes to zero
+    (non-candidates) or that have a coefficient of zero, so the optimum is
+    the same as that of Habitat_Opt.gms.
+
+    INPUTS:
+        run         = run index. -1 indicates the default data
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+
+    OUTPUTS:
+        dictionary mapping each set name in DMN_DIM to an (n x ndim) array of
+        record indices
+    """
+
+    import numpy
+
+    data = shared['data']
+
+    # records of a symbol as GAMS sees them in this run
+    def records(pName, ndim):
+        if pName not in data: return (numpy.empty((0, ndim), dtype=str), numpy.zeros(0))
+        keys, values = effective_records(pName, run, shared)
+        return (numpy.asarray(keys, dtype=str).reshape((-1, ndim)), numpy.asarray(values))
+
+    def unique_rows(keys):
+        if len(keys) == 0: return keys
+        _, first = numpy.unique(join_keys(keys), return_index=True)
+        return keys[numpy.sort(first)]
+
+    # rows of keys, repeated once for each of the (n x 2) pairs whose first
+    #   index matches keys[:,column], and the second index of those pairs
+    def join(keys, column, pairs):
+        pairs = pairs[numpy.argsort(pairs[:,0], kind='mergesort')]
+        left = numpy.searchsorted(pairs[:,0], keys[:,column], 'left')
+        counts = numpy.searchsorted(pairs[:,0], keys[:,column], 'right') - left
+        rows = numpy.repeat(numpy.arange(len(keys)), counts)
+        offsets = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        return (rows, pairs[numpy.repeat(left, counts) + offsets, 1])
+
+    # candidate actions
+    keys, values = records(PRE_CAN, 2)
+    actions = unique_rows(keys[values <> 0])
+    isAction = lambda k: numpy.in1d(join_keys(k), join_keys(actions))
+
+    # passability projects with an effect
+    keys, values = records(PRE_PCH, 3)
+    keys = keys[values <> 0]
+    keys = keys[numpy.in1d(keys[:,1], records(PRE_PPS, 1)[0].reshape(-1))]
+    if len(actions) > 0: passKeys = unique_rows(keys[isAction(keys[:,:2])])
+    else: passKeys = keys[:0]
+
+    # benefit projects with an effect, mapped from targets to guilds
+    keys, values = records(PRE_BCH, 3)
+    keys = keys[values <> 0]
+    keys = keys[numpy.in1d(keys[:,1], records(PRE_PBN, 1)[0].reshape(-1))]
+    if len(actions) > 0: keys = keys[isAction(keys[:,:2])]
+    else: keys = keys[:0]
+    rows, guilds = join(keys, 2, records(PRE_T2G, 2)[0])
+    benKeys = unique_rows(numpy.column_stack((keys[rows,:2], guilds)).reshape((-1, 3)))
+
+    # downstream pairs of barriers that are not roots
+    keys, values = records(PRE_RUT, 1)
+    roots = keys[values <> 0].reshape(-1)
+    downKeys = records(PRE_DWN, 2)[0]
+    downKeys = unique_rows(downKeys[~numpy.in1d(downKeys[:,0], roots)])
+
+    # passability records joined with their downstream barrier
+    rows, downstream = join(passKeys, 0, downKeys)
+    passDownKeys = numpy.column_stack((
+        passKeys[rows,0], downstream, passKeys[rows,1], passKeys[rows,2]
+    )).reshape((-1, 4))
+
+    return {
+        DMN_ACT: actions, DMN_PAS: passKeys, DMN_BEN: benKeys,
+        DMN_DWN: downKeys, DMN_PDN: passDownKeys
+    }
+
+
+
+# ~~ find_scenarios() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def find_scenarios(shared, runs):
+    """
+    FIND_SCENARIOS() finds the runs that differ from the default data only
+    in the symbols of SCN_SYM (e.g. the runs of a budget sweep), so that
+    they can be solved as scenarios of a single GAMS process by
+    Habitat_Opt_Scenarios.gms instead of each getting its own GDX. When a
+    presolve step dropped candidates, only runs that dropped the same
+    candidates as the first such run are batched together.
+
+    INPUTS:
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+        runs        = run indices to consider
+
+    OUTPUTS:
+        list of scenario run indices, in run order (empty if there are
+        fewer than SCN_MIN)
+    """
+
+    data = shared['data']
+    dominated = shared.get('dominated', {})
+    symbols = [k for k in data.symbols() if k == data.get(k, -1).loadname]
+
+    scenarios = []
+    for run in runs:
+        if any([data.has(k, run) for k in symbols if k not in SCN_SYM]): continue
+        if len(scenarios) == 0: batchDominated = dominated.get(run, None)
+        elif dominated.get(run, None) <> batchDominated: continue
+        scenarios.append(run)
+
+    if len(scenarios) < SCN_MIN: return []
+    print 'Batching %i runs as scenarios of %s.' % (len(scenarios), SCN_SET)
+    return scenarios
+
+
+
+# ~~ scenario_symbols() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def scenario_symbols(scenarios, shared):
+    """
+    SCENARIO_SYMBOLS() builds the set SCN_SET of scenario (run) names and,
+    for each symbol of SCN_SYM, a parameter (named by SCN_FMT) with the
+    scenario as an extra first index holding the symbol's records in each
+    run, as GAMS would see them. Every SCN_SYM parameter is written, empty
+    if the symbol is not in the data, since the model loads them all.
+
+    OUTPUTS:
+        list of gdx_io.Symbol
+    """
+
+    import numpy
+    from gdx_io import Symbol, GIO_KND_SET, GIO_KND_PAR
+
+    data = shared['data']
+    names = [str(run) for run in scenarios]
+    symbols = [Symbol(SCN_SET, GIO_KND_SET, 1, numpy.array(names, dtype=object).reshape((-1, 1)))]
+    for pName in SCN_SYM:
+        if pName not in data:
+            symbols.append(Symbol(SCN_FMT % pName, GIO_KND_PAR, SCN_DIM[pName]+1))
+            continue
+        ndim = data.get(pName, -1).ndim
+        keys = []
+        values = []
+        for name, run in zip(names, scenarios):
+            runKeys, runValues = effective_records(pName, run, shared)
+            if ndim == 0: runKeys = numpy.empty((len(runValues), 0), dtype=object)
+            else: runKeys = numpy.asarray(runKeys, dtype=object).reshape((-1, ndim))
+            keys.append(numpy.hstack((numpy.array([[name]]*len(runKeys), dtype=object).reshape((-1, 1)), runKeys)))
+            values.append(runValues)
+        symbols.append(Symbol(
+            SCN_FMT % pName, GIO_KND_PAR, ndim+1, numpy.concatenate(keys),
+            numpy.concatenate(values)
+        ))
+    return symbols
+
+
+
+# ~~ scenario_hash() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def scenario_hash(scenarios, shared):
+    """
+    SCENARIO_HASH() is gdx_hash() for the scenario GDX, covering the base
+    data (taken from the first scenario) and the scenario records
+    """
+    import hashlib
+    h = hashlib.sha1()
+    h.update(gdx_hash(scenarios[0], shared))
+    for symbol in scenario_symbols(scenarios, shared):
+        h.update(repr((symbol.name, symbol.keys.tolist(), symbol.values.tolist())))
+    return h.hexdigest()
+
+
+
+# ~~ symbol_modes() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def symbol_modes(data, delta):
+    """
+    SYMBOL_MODES() decides for each symbol in the data dictionary how its
+    records are split between the default and run-specific GDXs:
+
+        MAK_MOD_DEF: only in the default GDX (symbol does not change across
+            runs)
+        MAK_MOD_RUN: only in the run GDXs, in full. Used for everything that
+            changes across runs when [delta] is False, and always for Sets
+            that change, since a run can not remove elements from a Set
+            loaded from the default GDX.
+        MAK_MOD_BTH: in the default GDX and in full in the run GDXs. Used for
+            zero-dimensional parameters, which GAMS would otherwise give a
+            value of zero (rather than empty).
+        MAK_MOD_DLT: in the default GDX, and the run GDXs contain only the
+            records whose values differ from the default. A run's records
+            are laid over the default records, so a run only needs to
+            define the dimensions that change. Symbols that a run sets to
+            zero where the default is not are switched to MAK_MOD_RUN (see
+            full_overrides()).
+
+    INPUTS:
+        data        = RunData
+        delta       = see make_gdx()
+
+    OUTPUTS:
+        dictionary mapping symbol name to one of the above modes
+    """
+    modes = {}
+    for k in data.symbols():
+        parameter = data.get(k, -1)
+        if (not data.varies(k)) and (parameter.ndim <> 0): modes[k] = MAK_MOD_DEF
+        elif not delta: modes[k] = MAK_MOD_RUN
+        elif isinstance(parameter, Set): modes[k] = MAK_MOD_RUN
+        elif parameter.ndim == 0: modes[k] = MAK_MOD_BTH
+        else: modes[k] = MAK_MOD_DLT
+    return modes
+
+
+
+# ~~ full_overrides() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def full_overrides(shared, runs):
+    """
+    FULL_OVERRIDES() switches to MAK_MOD_RUN the MAK_MOD_DLT symbols that
+    any of [runs] sets to zero where the default is not zero, as part of
+    make_gdx(). GAMS keeps no zero records, so the $loadm of a run GDX
+    could leave the default value in place. Returns the names of the
+    symbols switched, which are written to each run GDX as the run's
+    records laid over the default records (see effective_records()).
+    """
+    data = shared['data']
+    modes = shared['modes']
+    names = [pName for pName in sorted(modes.keys()) if modes[pName] == MAK_MOD_DLT]
+    defaults = dict((pName, symbol_records(pName, -1, shared)) for pName in names)
+    switched = []
+    for run in runs:
+        for pName in names:
+            if (pName in switched) or (not data.has(pName, run)): continue
+            keys, values = symbol_records(pName, run, shared)
+            keys, values = diff_records(keys, values, *defaults[pName])
+            zero = values == 0
+            if not zero.any(): continue
+            if lookup_records(defaults[pName][0], defaults[pName][1], keys[zero]).any():
+                modes[pName] = MAK_MOD_RUN
+                switched.append(pName)
+    if len(switched) > 0:
+        print 'Writing %s in full to the run GDXs, since runs set default values to zero.' % ', '.join(switched)
+    return switched
+
+
+
+# ~~ join_keys() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def join_keys(keys):
+    """
+    JOIN_KEYS() joins the indices of each record (rows of an n x ndim array)
+    into a single string for matching records
+    """
+    import numpy
+    k = numpy.asarray(keys, dtype=str)
+    if k.shape[1] == 0: return numpy.zeros(len(k), dtype=str)
+    joined = k[:,0]
+    for i in xrange(1, k.shape[1]):
+        joined = numpy.char.add(numpy.char.add(joined, '\x00'), k[:,i])
+    return joined
+
+
+
+# ~~ lookup_records() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def lookup_records(keys, values, queryKeys):
+    """
+    LOOKUP_RECORDS() returns the values of the records (keys, values) at
+    queryKeys, with zeros (as in GAMS) for records that do not exist
+    """
+    import numpy
+    out = numpy.zeros(len(queryKeys))
+    if (len(keys) == 0) or (len(queryKeys) == 0): return out
+    joined = join_keys(keys)
+    queryJoined = join_keys(queryKeys)
+    order = numpy.argsort(joined)
+    joined = joined[order]
+    values = numpy.asarray(values)[order]
+    pos = numpy.searchsorted(joined, queryJoined).clip(0, len(joined)-1)
+    found = joined[pos] == queryJoined
+    out[found] = values[pos[found]]
+    return out
+
+
+
+# ~~ diff_records() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def diff_records(keys, values, defKeys, defValues):
+    """
+    DIFF_RECORDS() returns the (keys, values) records of a run that are not
+    in the default records or that have a different value there
+    """
+
+    import numpy
+
+    if (len(keys) == 0) or (len(defKeys) == 0): return (keys, values)
+    runJoined = join_keys(keys)
+    defJoined = join_keys(defKeys)
+    order = numpy.argsort(defJoined)
+    defJoined = defJoined[order]
+    defValues = numpy.asarray(defValues)[order]
+    pos = numpy.searchsorted(defJoined, runJoined).clip(0, len(defJoined)-1)
+    same = (defJoined[pos] == runJoined) & (defValues[pos] == values)
+    return (keys[~same], values[~same])
+
+
+
+# ~~ gdx_symbols() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def gdx_symbols(run, shared, scenarios=None):
+    """
+    GDX_SYMBOLS() builds the symbols (with records as NumPy arrays) that go
+    into the default GDX or a run-specific GDX, as part of make_gdx()
+
+    INPUTS:
+        run         = run index to build symbols for. -1 indicates the
+            default GDX
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+        scenarios   = (optional) scenario runs (see find_scenarios()) to add
+            as scenario symbols, making the scenario GDX. [run] is then the
+            first of them. Default is None.
+
+    OUTPUTS:
+        list of gdx_io.Symbol
+    """
+
+    import numpy
+    from gdx_io import Symbol, GIO_KND_SET, GIO_KND_PAR
+
+    data = shared['data']
+    modes = shared['modes']
+    parameters = shared['parameters']
+
+    # default records are needed for every delta run, so keep them around
+    #   (per process) once they have been built
+    defCache = shared.setdefault('defaultRecords', {})
+    def default_records(pName):
+        if pName not in defCache:
+            defCache[pName] = symbol_records(pName, -1, shared)
+        return defCache[pName]
+
+    symbols = []
+    for pName in data.symbols():
+
+        # initialize the symbol
+        parameter = data.get(pName, run)
+        if pName <> parameter.loadname: continue # avoid duplicate entries for aliases
+        if isinstance(parameter, Set): kind = GIO_KND_SET
+        else: kind = GIO_KND_PAR
+
+        # get the records that belong in this gdx
+        mode = modes[pName]
+        if run == -1:
+            if mode == MAK_MOD_RUN: keys, values = (None, None)
+            else: keys, values = symbol_records(pName, -1, shared)
+        elif mode == MAK_MOD_DEF: keys, values = (None, None)
+        elif mode == MAK_MOD_DLT:
+            if not data.has(pName, run): keys, values = (None, None)
+            else:
+                keys, values = symbol_records(pName, run, shared)
+                defKeys, defValues = default_records(pName)
+                keys, values = diff_records(keys, values, defKeys, defValues)
+        elif pName in shared.get('overlay', ()): keys, values = effective_records(pName, run, shared)
+        else: keys, values = symbol_records(pName, run, shared)
+        symbols.append(Symbol(parameter.name, kind, parameter.ndim, keys, values))
+
+    # add the active-domain sets, which are in the default gdx when none of
+    #   the symbols they are derived from change across runs
+    if 'domains' in shared:
+        if (run == -1) == (shared['domains'] == MAK_MOD_DEF): domains = active_domains(run, shared)
+        else: domains = {}
+        for name in sorted(DMN_DIM.keys()):
+            symbols.append(Symbol(name, GIO_KND_SET, DMN_DIM[name], domains.get(name, None)))
+
+    if scenarios is not None: symbols.extend(scenario_symbols(scenarios, shared))
+
+    # add empty parameters for data not supplied by the user
+    if parameters is not None:
+        added = set(s.name for s in symbols)
+        for pName in parameters:
+            parameter = parameters[pName]
+            if parameter.external and (parameter.loadname not in added):
+                if isinstance(parameter, Set):
+                    symbols.append(Symbol(parameter.loadname, GIO_KND_SET, parameter.ndim))
+                elif isinstance(parameter, (Parameter, Scalar)):
+                    symbols.append(Symbol(parameter.loadname, GIO_KND_PAR, parameter.ndim))
+                added.add(parameter.loadname)
+
+    return symbols
+
+
+
+# ~~ write_gdx() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def write_gdx(run, shared, backend, compressor=None, scenarios=None):
+    """
+    WRITE_GDX() creates the GDX for a single run (or the default GDX), as
+    part of make_gdx()
+
+    INPUTS:
+        run         = run index to create the GDX for. -1 indicates the
+            default GDX
+        shared      = dictionary of data shared across all runs, as built by
+            make_gdx()
+        backend     = gdx_io backend instance with which to write the GDX. The
+            same backend may be reused across runs.
+
+        compressor  = (optional) compression.Compressor that compresses the
+            GDX when make_gdx() was asked to compress them. Default is None.
+        scenarios   = (optional) scenario runs from which to make the
+            scenario GDX (see gdx_symbols()). Default is None.
+
+    OUTPUTS:
+        path to the saved gdx (or compressed) file. If the gdx can not be
+        written, the error is raised and no file is left at that path.
+    """
+
+    import os
+    from compression import compressed_name
+
+    symbols = gdx_symbols(run, shared, scenarios)
+
+    # write the gdx for this run
+    if scenarios is not None:
+        outname = os.path.join(shared['outputDirectory'], shared['scenGDXName'])
+    else:
+        outname = gdx_name(
+            run, shared['outputDirectory'], shared['defGDXName'],
+            shared['runGDXPref']
+        )
+    outgdx = outname + backend.extension
+    if shared['zip'] is None:
+        try: backend.write(symbols, outname)
+        except:
+
+            # a partly written (or older) file must not be taken for this
+            #   run's gdx, e.g. by a later call with skip=True
+            print 'Unable to create GDX file %s' % outname
+            if os.path.isfile(outgdx): os.remove(outgdx)
+            raise
+        return outgdx
+
+    # compress the gdx, writing straight into the compressed file when the
+    #   backend can write to a file object
+    outfile = compressed_name(outgdx, shared['zip'])
+    if hasattr(backend, 'write_file'):
+        write = lambda fh: backend.write_file(symbols, fh)
+        compressor.compress_writer(write, os.path.basename(outgdx), outfile)
+    else:
+        backend.write(symbols, outname)
+        compressor.compress_file(outgdx, outfile)
+
+    return outfile
+
+
+
+# ~~ write_job() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def write_job(job, shared, backend, compressor=None):
+    """
+    WRITE_JOB() runs write_gdx() for a job of make_gdx(), which is a run
+    index, or a tuple of scenario runs for the scenario GDX. When make_gdx()
+    validates, a run is first checked (see validate_run()), and None is
+    returned in place of the file of an invalid run.
+    """
+    if isinstance(job, tuple): return write_gdx(job[0], shared, backend, compressor, list(job))
+    if shared.get('validate', False) and (job <> -1):
+        problems = validate_run(job, shared)
+        if len(problems) > 0:
+            print 'Run %i is invalid and will not be written:\n    %s' % (
+                job, '\n    '.join(problems)
+            )
+            return None
+    return write_gdx(job, shared, backend, compressor)
+
+
+
+# per-process state of make_gdx() pool workers, set once by init_gdx_worker()
+#   so that the shared data are not sent along with every run
+_workerState = {}
+
+def init_gdx_worker(shared):
+    """Pool initializer for make_gdx() that keeps a long-lived backend."""
+    from gdx_io import get_backend
+    _workerState['shared'] = shared
+    _workerState['backend'] = get_backend(shared['backend'])
+    if shared['zip'] is not None:
+        from compression import Compressor
+        _workerState['compressor'] = Compressor(shared['zip'], shared['zipLevel'], 0)
+
+def run_gdx_worker(job):
+    """
+    Pool task for make_gdx() that creates the GDX for a single run (or the
+    scenario GDX, see write_job()). Workers compress their own GDXs (in
+    parallel with each other), and return the compression totals and the
+    size features of the GDX (see job_features()) along with the file
+    (None for an invalid run).
+    """
+    shared = _workerState['shared']
+    compressor = _workerState.get('compressor', None)
+    outfile = write_job(job, shared, _workerState['backend'], compressor)
+    if outfile is None: return (None, None, None)
+    if compressor is None: stats = None
+    else: stats = compressor.pop_stats()
+    if shared['features'] and (job <> -1): features = job_features(job, shared)
+    else: features = None
+    return (outfile, stats, features)
+
+
+
+# ~~ make_gdx() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def make_gdx(
+    data, outputDirectory, defGDXName=MAK_DEF_DDN, runGDXPref=MAK_DEF_RDN,
+    parameters=None, zip=MAK_DEF_ZIP, skip=MAK_DEF_SKP, workers=MAK_DEF_WRK,
+    backend=MAK_DEF_BCK, delta=MAK_DEF_DLT, zipLevel=MAK_DEF_ZLV,
+    zipThreads=MAK_DEF_ZTH, presolve=MAK_DEF_PRE, validate=MAK_DEF_VAL,
+    domains=MAK_DEF_DMN, scenarios=MAK_DEF_SCN, scenGDXName=MAK_DEF_SDN,
+    features=MAK_DEF_FEA
+):
+    """
+    MAKE_GDX() uses data loaded by load_data() to make gdx gams databases
+    for individual model runs, where there is one gdx shared across all runs
+    and a series of gdx's, one for each run
+
+    INPUTS:
+        data                = data dictionary, RunStream or ScenarioPlanner
+            as returned by load_data() (or another RunData)
+        outputDirectory     = directory where gdx's should be saved
+        defGDXName          = (optional) name of the GDX to be created that
+            contains data not changing across runs. Default is MAK_DEF_DDN
+            (see top of script for constants)
+        runGDXPref          = (optional) name prefixfor run-specific gdx file
+            names, without the extension. The run number is appended to each file
+            name. Default is MAK_DEF_RDN.
+        parameters          = (optional) GMS model parameters as returned by
+            read_gms(). If supplied, this function will attempt to fill inany
+            missing, necessary data definitions not in data{} with empty
+            data expected by GAMS. Default is None, which will result in this
+            being skipped and probable failure of GAMS execution when data
+            are missing.
+        zip                 = (optional) if True, each output GDX is zipped
+            to reduce file size. May also be the name of the compression
+            codec to use ('zip', 'gzip' or 'bz2', see compression.py).
+            Default is MAK_DEF_ZIP.
+        skip                = (optional) if True, skips runs for which a file
+            already exists that matches the output file name (could be .zip or
+            .gdx) and whose data are unchanged according to the manifest
+            of content hashes (MAK_MAN) in [outputDirectory]. If there is no
+            manifest, any existing file is skipped. Default is MAK_DEF_SKP
+        workers             = (optional) number of processes over which to
+            spread the creation of GDXs. Each worker receives the data once
+            when it starts (for free where processes are forked) and keeps
+            its own GDX backend (e.g. GAMS workspace) for all the runs it
+            creates. Default is MAK_DEF_WRK (i.e. no parallelism).
+        backend             = (optional) name of the gdx_io backend used to
+            write the files. 'gams' writes GDXs with the GAMS Python API and
+            'numpy' writes symbol archives (.npz) without needing GAMS.
+            Archives are not GDXs: they must be converted with
+            gdx_io.convert() on a machine with GAMS before the model can
+            load them. Default is MAK_DEF_BCK.
+        delta               = (optional) if True, the default GDX holds the
+            default data of every symbol and run-specific GDXs hold only the
+            records that differ from the default (merged in by the $loadm
+            statements of the model), with a run's data laid over the
+            default data. If False, symbols that change across runs are left
+            out of the default GDX and written in full to every run GDX.
+            See symbol_modes(). Default is MAK_DEF_DLT.
+        zipLevel            = (optional) compression level (1-9) of the gzip
+            and bz2 codecs. Default is MAK_DEF_ZLV.
+        zipThreads          = (optional) number of background threads that
+            compress GDXs while the next ones are built, when workers is 1.
+            With more workers, each worker compresses its own GDXs. Default
+            is MAK_DEF_ZTH.
+        presolve            = (optional) names of the presolve steps (see
+            MAK_PRE) that shrink the model before the GDXs are written,
+            without changing its optimum. MAK_PRE_GLD merges guilds that
+            have the same passability data (see collapse_guilds()), and
+            MAK_PRE_DOM drops candidate actions that can never be optimal
+            (see dominated_candidates()). Needs [parameters]. Default is
+            MAK_DEF_PRE (no presolve).
+        validate            = (optional) if True, the default data are
+            checked before any GDX is written, and each run (in the
+            symbols it defines itself) just before its GDX is written, by
+            the workers (see validate_run()). Invalid runs are reported and
+            not written (any GDX left from an earlier call is deleted). If
+            the default data are invalid, no run is written. Default is
+            MAK_DEF_VAL.
+        domains             = (optional) if True, the sparse active-domain
+            sets of Habitat_Opt_Domains.gms (see active_domains()) are added
+            to the GDXs. If None, they are added when [parameters] declare
+            them (i.e. were read from Habitat_Opt_Domains.gms). Default is
+            MAK_DEF_DMN.
+        scenarios           = (optional) if True, runs that differ from the
+            default data only in budget, cap, weight or obj2Weight (see
+            find_scenarios()) get no GDX of their own, but are written
+            together to a single scenario GDX to be solved in one GAMS
+            process by Habitat_Opt_Scenarios.gms. Default is MAK_DEF_SCN.
+        scenGDXName         = (optional) name of the scenario GDX, without
+            the extension. Default is MAK_DEF_SDN.
+        features            = (optional) if True, the size features of each
+            run GDX and the scenario GDX (see run_features()) are written
+            to MAK_FEA in [outputDirectory], for run_gams.py to schedule the
+            longest runs first. They are found along with each GDX (by the
+            workers), and kept from the last call for GDXs that are
+            skipped. Default is MAK_DEF_FEA.
+
+    OUTPUTS:
+        list of paths to the saved gdx files, in run order (followed by the
+        scenario GDX, if any)
+
+    NOTES:
+        o when workers > 1 on Windows, the calling script must be protected
+          by if __name__ == '__main__': (see multiprocessing documentation)
+    """
+
+    import os, itertools
+
+    # get run indices (generated as needed for planned scenarios)
+    if not isinstance(data, RunData): data = RunData(data)
+    runIndices = itertools.chain([-1], data.runs()) # -1 for the default gdx
+
+    # decide which symbols go in the default vs run-specific gdxs
+    modes = symbol_modes(data, delta)
+    if not delta:
+        print ''.join((
+            'Remember, if you specify some dimensions of a symbol to change over ',
+            'runs, you must also specify those dimensions that do not change ',
+            'over runs (i.e. that you wish to use only default values). Use ',
+            'delta=True to take unspecified dimensions from the defaults.'
+        ))
+
+    # compression codec, if any
+    from compression import CMP_DEF_COD, check_codec, compressed_name
+    if zip is True: zip = CMP_DEF_COD
+    elif not zip: zip = None
+    else: zip = check_codec(zip)
+
+    # data shared by all runs (handed to each worker only once)
+    shared = {
+        'data': data, 'modes': modes,
+        'parameters': parameters, 'outputDirectory': outputDirectory,
+        'defGDXName': defGDXName, 'runGDXPref': runGDXPref, 'zip': zip,
+        'zipLevel': zipLevel, 'backend': backend, 'validate': False
+    }
+
+    # check the default data before anything is written or changed by
+    #   presolve. Runs are checked as they are written (see write_job()),
+    #   in the symbols they change.
+    invalid = set()
+    if validate:
+        if len(validate_runs(shared, [-1])) > 0:
+            invalid = set(data.runs())
+            print 'The default data are invalid. No run will be written.'
+        else: shared['validate'] = True
+    valid_runs = lambda: itertools.ifilter(lambda run: run not in invalid, data.runs())
+
+    # $loadm can not be relied on to clear a default record that a delta
+    #   run sets to zero, so those symbols go in full to the run gdxs
+    if delta: shared['overlay'] = set(full_overrides(shared, valid_runs()))
+
+    # presolve
+    for step in presolve:
+        if step.lower() not in MAK_PRE:
+            raise ValueError('Unknown presolve step %s. Use one of %s.' % (step, ', '.join(MAK_PRE)))
+    presolve = [step.lower() for step in presolve]
+    if (len(presolve) > 0) and (parameters is None):
+        raise ValueError('parameters must be given to presolve')
+    if MAK_PRE_GLD in presolve:
+        shared['guildDims'] = guild_dimensions(data, parameters)
+        if shared['guildDims'] is not None:
+            shared['guildMap'] = collapse_guilds(shared, valid_runs())
+    if (MAK_PRE_DOM in presolve) and (PRE_CAN in data):
+        shared['dominated'] = find_dominated(shared, valid_runs())
+
+        # when runs drop different candidates, each run gdx needs its own
+        #   full set of candidates, since a run can not remove records
+        #   loaded from the default gdx
+        default = shared['dominated'][-1]
+        for run in shared['dominated']:
+            if shared['dominated'][run] <> default:
+                modes[PRE_CAN] = MAK_MOD_RUN
+                break
+
+    # active domains go in the run gdxs when any of the symbols they are
+    #   derived from change across runs
+    declared = (parameters is not None) and all(name in parameters for name in DMN_DIM)
+    if domains is None: domains = declared
+    elif (not domains) and declared:
+        print 'WARNING: The model declares the active-domain sets, but domains=False. They will be empty.'
+    if domains:
+        shared['domains'] = MAK_MOD_DEF
+        for pName in DMN_SRC:
+            if (pName in data) and (modes[pName] <> MAK_MOD_DEF):
+                shared['domains'] = MAK_MOD_RUN
+                break
+
+    # runs solved together as scenarios of a single gdx, checked here since
+    #   they share a gdx (and change only a few small symbols)
+    if scenarios: scenarios = find_scenarios(shared, valid_runs())
+    else: scenarios = []
+    if shared['validate'] and (len(scenarios) > 0):
+        invalid.update(validate_runs(shared, scenarios))
+        scenarios = [run for run in scenarios if run not in invalid]
+    shared['scenGDXName'] = scenGDXName
+    shared['features'] = features
+
+
+    # ~~ MAKE GDXS ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+    # hash the data going into each gdx and check them against the manifest
+    #   of existing gdxs, skipping those that are unchanged. Without a
+    #   manifest, fall back to skipping any gdx that already exists.
+    from gdx_io import GIO_BCK
+    if backend.lower() not in GIO_BCK:
+        raise ValueError('Unknown GDX backend %s' % backend)
+    extension = GIO_BCK[backend.lower()].extension
+    manifest = read_manifest(outputDirectory)
+    if features: oldSizes = read_features(outputDirectory)
+    else: oldSizes = {}
+    hashes = {}
+    sizes = {}
+    skipped = []
+    todo = []
+    todoFiles = []
+    scenarioRuns = set(scenarios)
+    if len(scenarios) > 0: jobs = itertools.chain(runIndices, [tuple(scenarios)])
+    else: jobs = runIndices
+    for run in jobs:
+        if isinstance(run, tuple): outname = os.path.join(outputDirectory, scenGDXName)
+        else: outname = gdx_name(run, outputDirectory, defGDXName, runGDXPref)
+        if zip is None: outfile = outname + extension
+        else: outfile = compressed_name(outname + extension, zip)
+        outkey = os.path.basename(outfile)
+        if (run in invalid) or (run in scenarioRuns):
+            if os.path.exists(outfile):
+                print 'Deleting %s left from an earlier call.' % outfile
+                os.remove(outfile)
+            if manifest is not None: manifest.pop(outkey, None)
+            continue
+        if isinstance(run, tuple):
+            hashes[outkey] = scenario_hash(scenarios, shared)
+            name = 'the scenarios'
+        else:
+            hashes[outkey] = gdx_hash(run, shared)
+            name = 'Run %i' % run
+        if skip and os.path.exists(outfile):
+            if manifest is None:
+                print ''.join((
+                    'WARNING: Found GDX for %s. Skipping creation. ' % name,
+                    'To avoid this, set skip=False'
+                ))
+                skipped.append((run, outkey))
+                continue
+            elif manifest.get(outkey, None) == hashes[outkey]:
+                print 'Data for %s are unchanged. Skipping creation.' % name
+                skipped.append((run, outkey))
+                continue
+        if manifest is not None: manifest.pop(outkey, None) # until it is written
+        todo.append(run)
+        todoFiles.append(outfile)
+
+    # size features of the skipped gdxs are those of the last call (found
+    #   here only if it did not have them)
+    if features:
+        for run, outkey in skipped:
+            if run == -1: continue
+            if outkey in oldSizes: sizes[outkey] = oldSizes[outkey]
+            else: sizes[outkey] = job_features(run, shared)
+
+    # create the gdxs, recording the hashes of those written (only) in the
+    #   manifest even if one of them fails. Runs found invalid as they are
+    #   written (see write_job()) are rejected.
+    outfiles = []
+    rejected = []
+    try:
+
+        # create the gdxs in a pool of worker processes, collecting them in
+        #   run order
+        if (workers > 1) and (len(todo) > 1):
+            import multiprocessing
+            pool = multiprocessing.Pool(
+                min(workers, len(todo)), init_gdx_worker, (shared,)
+            )
+            zipStats = [0, 0, 0.]
+            try:
+                for i, (outfile, stats, runSizes) in enumerate(pool.imap(run_gdx_worker, todo, chunksize=1)):
+                    if outfile is None: rejected.append(todoFiles[i])
+                    else: outfiles.append(outfile)
+                    if runSizes is not None: sizes[os.path.basename(outfile)] = runSizes
+                    if stats is not None:
+                        for i in xrange(3): zipStats[i] += stats[i]
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+
+        # or create them one at a time in this process, compressing in the
+        #   background
+        else:
+            from gdx_io import get_backend
+            from compression import Compressor
+            backend = get_backend(backend)
+            if zip is None: compressor = None
+            else: compressor = Compressor(zip, zipLevel, zipThreads)
+            done = outfiles if compressor is None else [] # compressed once closed
+            try:
+                for i, run in enumerate(todo):
+                    outfile = write_job(run, shared, backend, compressor)
+                    if outfile is None:
+                        rejected.append(todoFiles[i])
+                        continue
+                    done.append(outfile)
+                    if features and (run <> -1):
+                        sizes[os.path.basename(outfile)] = job_features(run, shared)
+            finally:
+                if compressor is not None: compressor.close()
+            if compressor is not None:
+                outfiles.extend(done)
+                zipStats = compressor.pop_stats()
+            del backend
+
+    finally:
+        if manifest is None: manifest = {}
+        for outfile in outfiles:
+            outkey = os.path.basename(outfile)
+            manifest[outkey] = hashes[outkey]
+        write_manifest(outputDirectory, manifest)
+
+    # remove what is left of the rejected runs from an earlier call
+    for outfile in rejected:
+        if os.path.exists(outfile):
+            print 'Deleting %s left from an earlier call.' % outfile
+            os.remove(outfile)
+    if len(rejected) > 0:
+        print '%i invalid runs were not written.' % len(rejected)
+
+    # report compression throughput
+    if (zip is not None) and (len(outfiles) > 0):
+        from compression import report
+        print report(zipStats, len(outfiles))
+    if features and (sizes <> oldSizes): write_features(outputDirectory, sizes)
+
+    return outfiles
+
+
 if __name__ == '__main__':
 
     # module imports
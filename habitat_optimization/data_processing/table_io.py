@@ -0,0 +1,339 @@
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+# Description:
+#       This script reads the CSV tables used by make_gdx.py and
+#   gdx_to_csv.py (e.g. table.csv with one row per barrier). Large files are
+#   split into chunks at line boundaries, the chunks are parsed in a pool of
+#   worker processes, and the results are put back together in file order.
+#   With one worker, the chunks are parsed one after the other in this
+#   process. The rows are those of a single csv.reader over the file, less
+#   its blank lines.
+#       Files are split at line breaks, which is only right where no quoted
+#   field spans lines (true of the tables written by make_table() and
+#   gdx_to_csv()). A split inside a quoted field leaves an odd number of
+#   quote characters before it (doubled quotes in a field count twice), so
+#   such a chunk is found by counting them, and the file is then parsed in
+#   one piece instead.
+#       Wide tables that are read again and again (e.g. table.csv, of which
+#   each definitions.csv uses a few columns) can be converted once into a
+#   cache of one NumPy file per column, kept next to the CSV and keyed by a
+#   hash of its contents. Later reads memory-map only the columns they need
+#   (see cached_columns()).
+
+# read_columns(), read_rows()
+TIO_DEF_WRK = 1
+TIO_DEF_CHK = 16*1024*1024 # bytes per chunk
+TIO_FLT = 'float' # column type parsed into a NumPy float array
+TIO_STR = 'str' # column type kept as a list of strings
+TIO_QUO = '"' # quote character of the csv module's default dialect
+
+# cached_columns()
+TIO_CCH_EXT = '.columns' # cache directory made next to the CSV
+TIO_CCH_HDR = 'header.json'
+TIO_CCH_COL = 'c%i.npy'
+TIO_CCH_BUF = 1024*1024 # bytes read at a time when hashing
+TIO_CCH_TMP = 'tmp' # prefix of caches being built
+TIO_CCH_HSH = r'^[0-9a-f]{40}$' # names of the caches (SHA-1 of the CSV)
+
+
+
+# ~~ read_header() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def read_header(csvFile):
+    """
+    READ_HEADER() returns (list of column names, byte offset of the first
+    row after the header) of a CSV
+    """
+    import csv
+    with open(csvFile, 'rb') as fh:
+        line = fh.readline()
+        while line.count(TIO_QUO) % 2 == 1: # a quoted name spans lines
+            more = fh.readline()
+            if more == '': break
+            line += more
+    header = csv.reader([line]).next() if line.strip() <> '' else []
+    return (header, len(line))
+
+
+
+# ~~ chunk_offsets() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def chunk_offsets(csvFile, start, chunkSize=TIO_DEF_CHK):
+    """
+    CHUNK_OFFSETS() splits a file from byte [start] to its end into
+    (start, stop) byte ranges of about [chunkSize] bytes that begin and end
+    at line boundaries
+    """
+    import os
+    size = os.path.getsize(csvFile)
+    offsets = []
+    with open(csvFile, 'rb') as fh:
+        while start < size:
+            fh.seek(min(start + max(1, chunkSize), size))
+            fh.readline()
+            stop = min(fh.tell(), size)
+            offsets.append((start, stop))
+            start = stop
+    return offsets
+
+
+
+# ~~ parse_chunk() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def parse_chunk(job):
+    """
+    PARSE_CHUNK() parses the rows in a byte range of a CSV. This is the
+    task run by the worker processes of read_columns() and read_rows().
+
+    INPUTS:
+        job         = (csvFile, start, stop, indices, types), where indices
+            are the positions of the columns to keep (None to keep whole
+            rows) and types are the TIO_FLT/TIO_STR type of each
+
+    OUTPUTS:
+        list of rows if indices is None, otherwise list of columns, one per
+        index, where TIO_FLT columns are NumPy float arrays. None if the
+        range ends inside a quoted field (see the Description), in which
+        case the file has to be parsed in one piece.
+    """
+    import csv, cStringIO, numpy
+    csvFile, start, stop, indices, types = job
+    with open(csvFile, 'rb') as fh:
+        fh.seek(start)
+        text = fh.read(stop - start)
+        last = fh.read(1) == ''
+    if (not last) and (text.count(TIO_QUO) % 2 == 1): return None
+    rows = [row for row in csv.reader(cStringIO.StringIO(text)) if len(row) > 0]
+    if indices is None: return rows
+    columns = []
+    for index, kind in zip(indices, types):
+        column = [row[index] for row in rows]
+        if kind == TIO_FLT: column = numpy.array(column).astype(float)
+        columns.append(column)
+    return columns
+
+
+
+# ~~ map_chunks() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def map_chunks(jobs, workers=TIO_DEF_WRK):
+    """
+    MAP_CHUNKS() runs parse_chunk() on each job, in a pool of [workers]
+    processes when workers > 1, and returns the results in job order. The
+    chunks of a file that was split inside a quoted field are replaced by
+    a single chunk of the whole file, parsed in this process, followed by
+    empty chunks.
+    """
+    import os
+    if (workers <= 1) or (len(jobs) <= 1): results = [parse_chunk(job) for job in jobs]
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(min(workers, len(jobs)))
+        try:
+            results = pool.map(parse_chunk, jobs, chunksize=1)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    # parse the files split inside a quoted field in one piece
+    for csvFile in set(jobs[i][0] for i in xrange(len(jobs)) if results[i] is None):
+        print 'Quoted fields of %s span lines. Parsing it in one piece.' % csvFile
+        mine = [i for i in xrange(len(jobs)) if jobs[i][0] == csvFile]
+        _, start, _, indices, types = jobs[mine[0]]
+        whole = parse_chunk((csvFile, start, os.path.getsize(csvFile), indices, types))
+        empty = parse_chunk((csvFile, start, start, indices, types))
+        results[mine[0]] = whole
+        for i in mine[1:]: results[i] = empty
+    return results
+
+
+
+# ~~ read_columns() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def read_columns(
+    csvFile, columns=None, types=None, workers=TIO_DEF_WRK,
+    chunkSize=TIO_DEF_CHK
+):
+    """
+    READ_COLUMNS() reads columns of a CSV with a header row
+
+    INPUTS:
+        csvFile     = path to the CSV
+        columns     = (optional) names of the columns to read. Default is
+            None, which reads every column.
+        types       = (optional) {column name: TIO_FLT or TIO_STR}. Columns
+            not listed are TIO_STR. Default is None (all TIO_STR).
+        workers     = (optional) number of processes parsing chunks of the
+            file. Default is TIO_DEF_WRK.
+        chunkSize   = (optional) approximate size of the chunks in bytes.
+            Default is TIO_DEF_CHK.
+
+    OUTPUTS:
+        (header, {column name: values}) where values are a list of strings
+        or a NumPy float array, in file order
+
+    NOTES:
+        o when workers > 1 on Windows, the calling script must be protected
+          by if __name__ == '__main__': (see multiprocessing documentation)
+    """
+
+    import numpy
+
+    header, start = read_header(csvFile)
+    if columns is None: columns = header
+    else: columns = list(columns)
+    if types is None: types = {}
+    c2I = dict((header[i], i) for i in xrange(len(header)))
+    for k in columns:
+        if k not in c2I: raise ValueError('Column %s not found in %s' % (k, csvFile))
+    indices = [c2I[k] for k in columns]
+    kinds = [types.get(k, TIO_STR) for k in columns]
+
+    # parse the chunks and join their pieces of each column
+    jobs = [
+        (csvFile, a, b, indices, kinds)
+        for a, b in chunk_offsets(csvFile, start, chunkSize)
+    ]
+    chunks = map_chunks(jobs, workers)
+    out = {}
+    for i in xrange(len(columns)):
+        if kinds[i] == TIO_FLT:
+            out[columns[i]] = numpy.concatenate([numpy.zeros(0)] + [c[i] for c in chunks])
+        else:
+            out[columns[i]] = [v for c in chunks for v in c[i]]
+    return (header, out)
+
+
+
+# ~~ read_rows() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def read_rows(csvFiles, workers=TIO_DEF_WRK, chunkSize=TIO_DEF_CHK):
+    """
+    READ_ROWS() reads the rows (as lists of strings) of one or more CSVs
+    with a header row. Chunks of all the files are parsed together, so many
+    small files are spread over the workers as well as a few large ones.
+
+    INPUTS:
+        csvFiles    = path to a CSV, or list of paths
+        workers     = (optional) see read_columns()
+        chunkSize   = (optional) see read_columns()
+
+    OUTPUTS:
+        (header, rows) for a single path, or a list of (header, rows), one
+        per file, for a list of paths
+    """
+
+    single = isinstance(csvFiles, basestring)
+    if single: csvFiles = [csvFiles]
+    headers = []
+    jobs = []
+    owners = []
+    for f in xrange(len(csvFiles)):
+        header, start = read_header(csvFiles[f])
+        headers.append(header)
+        for a, b in chunk_offsets(csvFiles[f], start, chunkSize):
+            jobs.append((csvFiles[f], a, b, None, None))
+            owners.append(f)
+    rows = [[] for f in csvFiles]
+    for f, chunk in zip(owners, map_chunks(jobs, workers)): rows[f].extend(chunk)
+    out = zip(headers, rows)
+    if single: return out[0]
+    else: return out
+
+
+
+# ~~ file_hash() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def file_hash(path):
+    """FILE_HASH() returns the SHA-1 hexadecimal hash of a file's contents."""
+    import hashlib
+    h = hashlib.sha1()
+    with open(path, 'rb') as fh:
+        while True:
+            block = fh.read(TIO_CCH_BUF)
+            if not block: break
+            h.update(block)
+    return h.hexdigest()
+
+
+
+# ~~ build_cache() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def build_cache(csvFile, cacheDir, workers=TIO_DEF_WRK):
+    """
+    BUILD_CACHE() parses every column of a CSV (see read_columns()) and
+    saves each as a NumPy file of fixed-width strings in [cacheDir], with
+    the header in TIO_CCH_HDR. The cache is written to a temporary
+    directory first, so an interrupted build leaves no partial cache. If
+    another process finished the same cache first, its cache is kept.
+    """
+    import json, os, shutil, tempfile, numpy
+    header, columns = read_columns(csvFile, workers=workers)
+    parent = os.path.dirname(os.path.abspath(cacheDir))
+    tempDir = tempfile.mkdtemp(prefix=TIO_CCH_TMP, dir=parent)
+    try:
+        for i in xrange(len(header)):
+            numpy.save(os.path.join(tempDir, TIO_CCH_COL % i), numpy.array(columns[header[i]], dtype=str))
+        with open(os.path.join(tempDir, TIO_CCH_HDR), 'w') as fh: json.dump(header, fh)
+        try: os.rename(tempDir, cacheDir)
+        except OSError:
+            if not os.path.exists(os.path.join(cacheDir, TIO_CCH_HDR)): raise
+            shutil.rmtree(tempDir, True)
+    except:
+        shutil.rmtree(tempDir, True)
+        raise
+
+
+
+# ~~ cached_columns() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def cached_columns(
+    csvFile, columns=None, types=None, workers=TIO_DEF_WRK, cacheRoot=None
+):
+    """
+    CACHED_COLUMNS() reads columns of a CSV like read_columns(), but through
+    a cache of the parsed columns. The first call for a given file content
+    parses the whole file and builds the cache (see build_cache()). Later
+    calls only hash the file and memory-map the columns asked for, without
+    tokenizing the CSV again.
+
+    INPUTS:
+        csvFile     = path to the CSV
+        columns     = (optional) see read_columns()
+        types       = (optional) see read_columns()
+        workers     = (optional) processes used to build the cache. See
+            read_columns().
+        cacheRoot   = (optional) directory holding the caches of this CSV.
+            Default is None, which uses the CSV path plus TIO_CCH_EXT. Caches
+            of earlier contents of the file are deleted when a new cache is
+            built. Caches other processes are still building are left alone.
+
+    OUTPUTS:
+        (header, {column name: values}), as from read_columns()
+    """
+
+    import json, os, re, shutil, numpy
+
+    if cacheRoot is None: cacheRoot = csvFile + TIO_CCH_EXT
+    digest = file_hash(csvFile)
+    cacheDir = os.path.join(cacheRoot, digest)
+    if not os.path.exists(cacheDir):
+        try: os.makedirs(cacheRoot)
+        except OSError:
+            if not os.path.isdir(cacheRoot): raise
+        print 'Building column cache of %s.' % csvFile
+        build_cache(csvFile, cacheDir, workers)
+
+        # delete the caches of earlier contents of the file
+        for name in os.listdir(cacheRoot):
+            if (name <> digest) and (re.match(TIO_CCH_HSH, name) is not None):
+                shutil.rmtree(os.path.join(cacheRoot, name), True)
+
+    # memory-map the columns asked for
+    with open(os.path.join(cacheDir, TIO_CCH_HDR), 'r') as fh:
+        header = [str(k) for k in json.load(fh)]
+    if columns is None: columns = header
+    if types is None: types = {}
+    c2I = dict((header[i], i) for i in xrange(len(header)))
+    out = {}
+    for k in columns:
+        if k not in c2I: raise ValueError('Column %s not found in %s' % (k, csvFile))
+        values = numpy.load(os.path.join(cacheDir, TIO_CCH_COL % c2I[k]), mmap_mode='r')
+        if types.get(k, TIO_STR) == TIO_FLT: out[k] = values.astype(float)
+        else: out[k] = values.tolist()
+    return (header, out)
@@ -0,0 +1,423 @@
+import os, sys
+sys.path = [os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_processing')] + sys.path
+
+# This file contains tests for the scripts that run the optimization
+
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+#
+#   usage: python __test__.py [-v]
+#
+#   The tests need neither GAMS nor a cluster: jobs are run by FakeBackend
+#   (see job_backends.py) or by small Python commands.
+
+
+
+# ~~ raises() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def raises(func, *args, **kwargs):
+    """RAISES() returns the exception raised by func(*args, **kwargs), or None."""
+    try: func(*args, **kwargs)
+    except Exception as e: return e
+    return None
+
+
+
+# ~~ check() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def check(tests, namespace, verbose=False):
+    """
+    CHECK() evaluates test expressions in [namespace] and returns the number
+    that failed
+    """
+    failures = 0
+    for test in tests:
+        try:
+            result = eval(test, globals(), namespace)
+            if result == True:
+                if verbose: print 'PASSED: %s' % test
+            else:
+                print 'FAILED: %s' % test
+                failures += 1
+        except Exception as e:
+            print 'FAILED with Exception (%s): %s' % (str(e), test)
+            failures += 1
+    return failures
+
+
+
+# ~~ test_plan_jobs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_plan_jobs(verbose=False):
+    """TEST_PLAN_JOBS() tests the ordering and time limits of plan_jobs()."""
+    from make_gdx import FEA_CAN, FEA_NBR, FEA_SCN
+    from run_schedule import plan_jobs, SCH_RES, SCH_SLV, SCH_MIN_FIT
+
+    jobs = [(name, None, []) for name in ('small', 'none', 'big', 'scen')]
+    features = {
+        'small': {FEA_CAN: 10, FEA_NBR: 100},
+        'big': {FEA_CAN: 10000, FEA_NBR: 100},
+        'scen': {FEA_CAN: 1000, FEA_NBR: 100, FEA_SCN: 3},
+    }
+    hashes = {'small': 'h1', 'big': 'h2', 'scen': 'h3'}
+
+    # without history or a margin, jobs are only ordered
+    plain, plainLimits = plan_jobs(jobs, features)
+
+    # measured run times order the jobs, and limits are floored at the
+    #   reslim of every solve of the model (of every scenario)
+    history = [('h1', None, 50000.), ('h2', None, 10.), ('h3', None, 20.)]
+    measured, limits = plan_jobs(jobs, features, hashes, history, margin=2.)
+
+    # a model fit to enough history predicts the jobs solved before too
+    fitted = [('old%i' % i, features['big'], 1e5) for i in xrange(SCH_MIN_FIT)]
+    _, fitLimits = plan_jobs(jobs, features, hashes, fitted, margin=1.)
+
+    tests = (
+        "[j[0] for j in plain] == ['big', 'scen', 'small', 'none']", # largest first, no features last
+        "plainLimits == {}", # no limits without a margin
+        "[j[0] for j in measured] == ['small', 'scen', 'big', 'none']", # measured times win
+        "limits['small'] == 2 * 50000.", # margin times the measured time
+        "limits['big'] == SCH_RES * SCH_SLV", # floored at the solves' reslim
+        "limits['scen'] == 3 * SCH_RES * SCH_SLV", # for each scenario
+        "'none' not in limits", # nothing to predict from
+        "sorted(fitLimits) == ['big', 'scen', 'small']", # fit from features
+        "fitLimits['big'] > fitLimits['small']",
+    )
+    return check(tests, locals(), verbose)
+
+
+
+# ~~ test_backends() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_backends(verbose=False):
+    """
+    TEST_BACKENDS() tests the job states read from sacct and the submit,
+    poll and retry loop of run_jobs(), driven through FakeBackend
+    """
+    import os
+    from job_backends import (
+        sacct_state, FakeBackend, run_jobs, JOB_STA_QUE, JOB_STA_RUN,
+        JOB_STA_DON, JOB_STA_CAN, JOB_SLM_FAI
+    )
+
+    # a job fails (as sacct reports a TIMEOUT) on its first two attempts,
+    #   another fails on every attempt, and a third succeeds at once
+    attempts = {}
+    def func(name, command, workdir):
+        attempts[name] = attempts.get(name, 0) + 1
+        with open(os.path.join(workdir, 'out.txt'), 'w') as fh: fh.write(command)
+        if name == 'slow' and attempts[name] < 3: return sacct_state('TIMEOUT', '0:15')[1]
+        if name == 'bad': return sacct_state('FAILED', '2:0')[1]
+        return None
+    finished = []
+    def retry(name, state, code, workdir):
+        finished.append((name, code, os.path.exists(os.path.join(workdir, 'out.txt'))))
+        if (code <> 0) and (attempts[name] < 3): return 0.
+        return None
+    jobs = [(name, 'echo %s' % name, []) for name in ('slow', 'bad', 'good')]
+    backend = FakeBackend(func)
+    results = sorted(r[:3] for r in run_jobs(backend, jobs, retry=retry))
+
+    # jobs left unfinished are cancelled when the loop is closed early
+    backend = FakeBackend()
+    loop = run_jobs(backend, jobs)
+    first = loop.next()
+    queued = [name for name in backend.jobs if name <> first[0]][0]
+    backend.jobs[queued][0] = JOB_STA_QUE
+    loop.close()
+    states = sorted(job[0] for job in backend.jobs.values())
+
+    tests = (
+        "sacct_state('COMPLETED', '0:0') == (JOB_STA_DON, 0)",
+        "sacct_state('COMPLETED', '3:0') == (JOB_STA_DON, 3)", # only COMPLETED keeps its exit code
+        "sacct_state('TIMEOUT', '0:0') == (JOB_STA_DON, JOB_SLM_FAI)", # a failure, not 0
+        "sacct_state('TIMEOUT', '0:15') == (JOB_STA_DON, -15)", # the signal is kept
+        "sacct_state('OUT_OF_MEMORY', '0:125') == (JOB_STA_DON, -125)",
+        "sacct_state('NODE_FAIL', '0:0') == (JOB_STA_DON, JOB_SLM_FAI)",
+        "sacct_state('PREEMPTED', '0:0')[1] <> 0",
+        "sacct_state('FAILED', '1:0') == (JOB_STA_DON, 1)",
+        "sacct_state('FAILED', '') == (JOB_STA_DON, JOB_SLM_FAI)",
+        "sacct_state('CANCELLED by 1234', '0:15') == (JOB_STA_CAN, None)",
+        "sacct_state('PENDING', '0:0') == (JOB_STA_QUE, None)",
+        "sacct_state('', '') == (JOB_STA_QUE, None)",
+        "sacct_state('COMPLETING', '0:0') == (JOB_STA_RUN, None)", # not done yet
+        "sacct_state('RUNNING', '0:0') == (JOB_STA_RUN, None)",
+        "attempts == {'slow': 3, 'bad': 3, 'good': 1}", # retried until accepted
+        "results == [('bad', JOB_STA_DON, 2), ('good', JOB_STA_DON, 0), ('slow', JOB_STA_DON, 0)]",
+        "[f[1] for f in finished if f[0] == 'slow'] == [-15, -15, 0]",
+        "[f[2] for f in finished] == [True] * 7", # outputs are there when collected
+        "states == [JOB_STA_CAN, JOB_STA_DON]", # the queued job is cancelled
+        "backend.jobs[queued][0] == JOB_STA_CAN",
+    )
+    return check(tests, locals(), verbose)
+
+
+
+# ~~ test_condor() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_condor(verbose=False):
+    """
+    TEST_CONDOR() tests the runs packed into Condor jobs by submit_all() and
+    pack_command(). condor_submit is not called: the packed jobs are run
+    with bash the way a node would run them, when bash is there.
+    """
+    import os, shutil, subprocess, tempfile
+    from job_backends import (
+        CondorBackend, InputStore, JOB_CLU_SCR, JOB_CND_LOG, JOB_CND_LST,
+        JOB_CND_PCK, JOB_CND_HRS, JOB_STA_DON
+    )
+
+    class Condor(CondorBackend):
+        def condor_submit(self, workdir, lines):
+            self.submitted = (workdir, lines)
+            return '9'
+
+    def node(packdir, inputs):
+        """runs a Condor job's script in a scratch directory, as a node would"""
+        scratch = tempfile.mkdtemp()
+        try:
+            for f in inputs: shutil.copy(f, scratch)
+            shutil.copy(os.path.join(packdir, JOB_CLU_SCR), scratch)
+            before = set(os.listdir(scratch))
+            with open(os.devnull, 'w') as null:
+                code = subprocess.call(['bash', JOB_CLU_SCR], cwd=scratch, stdout=null, stderr=null)
+            for f in set(os.listdir(scratch)) - before: shutil.copy(os.path.join(scratch, f), packdir)
+        finally:
+            shutil.rmtree(scratch, True)
+        with open(os.path.join(packdir, JOB_CND_LOG), 'w') as fh:
+            fh.write('000 (9.0.0)\n001 (9.0.0)\n005 (9.0.0) Job terminated.\n')
+            fh.write('\t(1) Normal termination (return value %i)\n' % code)
+
+    folder = tempfile.mkdtemp()
+    try:
+        shared = os.path.join(folder, 'data_all.gdx')
+        with open(shared, 'w') as fh: fh.write('shared\n')
+        runs = []
+        for name in ('run1', 'run2', 'run3'):
+            gdx = os.path.join(folder, 'data_%s.gdx' % name)
+            with open(gdx, 'w') as fh: fh.write(name + '\n')
+            code = 3 if name == 'run2' else 0
+            runs.append((name, 'cat data_%s.gdx data_all.gdx > results.gdx; exit %i' % (name, code), [shared, gdx]))
+
+        # three runs, two per Condor job
+        rundir = os.path.join(folder, 'runs')
+        backend = Condor(rundir, cpus=2, pack=2)
+        backend.limit('run3', 7200)
+        ids = backend.submit_all(runs)
+        with open(os.path.join(rundir, JOB_CND_LST), 'r') as fh: items = [l.split(' ') for l in fh.read().splitlines()]
+        packdir = os.path.join(os.path.abspath(rundir), JOB_CND_PCK % 'run1')
+        with open(os.path.join(packdir, JOB_CLU_SCR), 'r') as fh: script = fh.read()
+        lines = backend.submitted[1]
+
+        # run the packs, then collect each run from its pack
+        ran = os.name == 'posix'
+        if ran:
+            for item in items: node(item[0], item[3].split(','))
+        states = backend.poll()
+        collected = dict((name, backend.collect(name)) for name, command, inputs in runs)
+        outputs = {}
+        for name, (code, workdir) in collected.iteritems():
+            results = os.path.join(workdir, 'results.gdx')
+            if os.path.exists(results):
+                with open(results, 'r') as fh: outputs[name] = fh.read().split()
+
+        # with a store and a node cache, the input of every pack is fetched
+        #   on the node instead of being transferred
+        store = InputStore(os.path.join(folder, 'store'))
+        cached = Condor(os.path.join(folder, 'cached'), pack=2, store=store, nodeCache=os.path.join(folder, 'cache'))
+        cached.submit_all(runs)
+        with open(os.path.join(folder, 'cached', JOB_CND_LST), 'r') as fh: cachedItems = [l.split(' ') for l in fh.read().splitlines()]
+        with open(os.path.join(cached.jobs['run3'][2], JOB_CLU_SCR), 'r') as fh: cachedScript = fh.read()
+
+        tests = (
+            "ids == ['9.0', '9.0', '9.1']", # one cluster, two jobs
+            "[i[0] for i in items] == [packdir, os.path.join(os.path.abspath(rundir), 'run3')]",
+            "[i[1:3] for i in items] == [['2', str(JOB_CND_HRS)], ['2', '2']]", # hours fit the limits of all runs only
+            "[len(i[3].split(',')) for i in items] == [3, 2]", # each input once per pack
+            "script.count('mkdir run') == 2 and 'echo $? > exit.code' in script", # packed runs
+            "'queue packdir,cpus,hours,inputs from %s' % JOB_CND_LST in lines",
+            "'executable = $(packdir)/%s' % JOB_CLU_SCR in lines",
+            "not ran or (states == {'run1': (JOB_STA_DON, 0), 'run2': (JOB_STA_DON, 0), 'run3': (JOB_STA_DON, 0)})",
+            "not ran or ([collected[name][0] for name in ('run1', 'run2', 'run3')] == [0, 3, 0])", # codes of packed runs
+            "not ran or (outputs == {'run1': ['run1', 'shared'], 'run2': ['run2', 'shared'], 'run3': ['run3', 'shared']})",
+            "not ran or (sorted(os.listdir(collected['run1'][1])) == ['exit.code', 'results.gdx'])", # moved out of the pack
+            "[len(i[3].split(',')) for i in cachedItems] == [2, 1]", # the shared input is left out
+            "'data_all.gdx' not in ' '.join(i[3] for i in cachedItems)",
+            "'fetch ' in cachedScript and 'data_all.gdx' in cachedScript",
+        )
+        return check(tests, locals(), verbose)
+    finally:
+        shutil.rmtree(folder, True)
+
+
+
+# ~~ test_manifest() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_manifest(verbose=False):
+    """
+    TEST_MANIFEST() tests the states a run goes through in the manifest
+    (RunManifest.retry()), alone and as the retry function of run_jobs()
+    """
+    import os, shutil, tempfile
+    from run_manifest import RunManifest, RMF_STA_SUB, RMF_STA_DON, RMF_STA_FAI
+    from job_backends import FakeBackend, run_jobs, JOB_STA_DON, JOB_STA_CAN
+    from gams_runner import GRN_WIN, GRN_STP
+
+    folder = tempfile.mkdtemp()
+    try:
+        def attempt(name, results=True, files={}):
+            """makes the directory of an attempt of a run"""
+            workdir = tempfile.mkdtemp(dir=folder)
+            names = dict(files, **({'results.gdx': name} if results else {}))
+            for f, text in names.iteritems():
+                with open(os.path.join(workdir, f), 'w') as fh: fh.write(text + '\n')
+            return workdir
+        gdx = os.path.join(folder, 'data_run1.gdx')
+        with open(gdx, 'w') as fh: fh.write('run1\n')
+        job = ('run1', 'gams Habitat_Opt.gms', [gdx])
+        manifest = RunManifest(os.path.join(folder, 'manifest.sqlite'), tries=3, backoff=10.)
+        h = manifest.job_hash(job)
+
+        # a run that fails, leaves no results, then is cancelled, and is
+        #   given up on after its third attempt
+        manifest.submitted('run1', h, {'candidates': 4})
+        new = manifest.get('run1')
+        delays = [
+            manifest.retry('run1', JOB_STA_DON, 1, attempt('run1')),
+            manifest.retry('run1', JOB_STA_DON, 0, attempt('run1', False)),
+            manifest.retry('run1', JOB_STA_CAN, 0, attempt('run1')),
+        ]
+        failed = manifest.get('run1')
+        notKept = manifest.completed('run1', h)
+
+        # submitted again, it succeeds at once, stopped on a plateau by the
+        #   winner of a solver race
+        manifest.submitted('run1', h, {'candidates': 4})
+        restarted = manifest.get('run1')['attempts']
+        done = manifest.retry('run1', JOB_STA_DON, 0, attempt('run1', files={GRN_WIN: 'cplex', GRN_STP: 'plateau'}))
+        record = manifest.get('run1')
+        kept = manifest.completed('run1', h)
+        with open(kept, 'r') as fh: keptText = fh.read().strip()
+        history = manifest.history()
+        winners = manifest.winners()
+
+        # another input changes the hash, so the kept results are not used
+        with open(gdx, 'w') as fh: fh.write('run1 changed\n')
+        manifest.store = None
+        changed = manifest.job_hash(job)
+        stale = manifest.completed('run1', changed)
+
+        # driven by run_jobs(), a run that fails once is submitted again and
+        #   kept, and a run that always fails is given up on
+        manifest.tries, manifest.backoff = 2, 0.
+        tries = {}
+        def func(name, command, workdir):
+            tries[name] = tries.get(name, 0) + 1
+            if (name == 'run2') and (tries[name] == 1): return 1
+            if name == 'run3': return 2
+            with open(os.path.join(workdir, 'results.gdx'), 'w') as fh: fh.write(name + '\n')
+        jobs = [(name, 'gams', []) for name in ('run2', 'run3')]
+        for name, command, inputs in jobs: manifest.submitted(name, name)
+        results = sorted(r[:3] for r in run_jobs(FakeBackend(func), jobs, retry=manifest.retry))
+        driven = [(manifest.get(name)['status'], manifest.get(name)['attempts']) for name in ('run2', 'run3')]
+        summary = manifest.summary()
+        manifest.close()
+
+        tests = (
+            "new['status'] == RMF_STA_SUB and new['attempts'] == 0",
+            "delays == [10., 20., None]", # backoff doubles, then out of attempts
+            "failed['status'] == RMF_STA_FAI and failed['attempts'] == 3",
+            "failed['code'] == 0 and failed['output'] is None", # cancelled, not done
+            "notKept is None",
+            "restarted == 0", # a new submission counts attempts again
+            "done is None and record['status'] == RMF_STA_DON and record['attempts'] == 1",
+            "keptText == 'run1'", # a copy of its results
+            "record['solver'] == 'cplex' and record['stop_reason'] == 'plateau'",
+            "history == [(h, {'candidates': 4}, history[0][2])] and history[0][2] >= 0",
+            "winners == {'cplex': 1}",
+            "changed <> h and stale is None",
+            "results == [('run2', JOB_STA_DON, 0), ('run3', JOB_STA_DON, 2)]",
+            "tries == {'run2': 2, 'run3': 2}",
+            "driven == [(RMF_STA_DON, 2), (RMF_STA_FAI, 2)]",
+            "summary == {RMF_STA_DON: 2, RMF_STA_FAI: 1}",
+        )
+        return check(tests, locals(), verbose)
+    finally:
+        shutil.rmtree(folder, True)
+
+
+
+# ~~ test_gap_watch() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_gap_watch(verbose=False):
+    """
+    TEST_GAP_WATCH() tests the plateaus found by GapWatch in solver logs,
+    and that follow_log() leaves no stop file when it can not interrupt
+    """
+    import os, shutil, tempfile, cStringIO
+    from gams_runner import GapWatch, follow_log, GRN_STP
+
+    start = '--- Executing GUROBI (Solvelink=0): elapsed 0:00:01.250'
+    def gurobi(incumbent, bound):
+        return '  1234   567  %s  %s  50.0%%   5.2  10s' % (incumbent, bound)
+    def cplex(incumbent, bound):
+        return '   1500+  200        %s      %s     8431   12.50%%' % (incumbent, bound)
+
+    # the gap closes by 0.8 over the first window, then by 0.005 (less than
+    #   the rate) over the next
+    watch = GapWatch(10., 0.01)
+    fed = [
+        watch.feed(start, 0.),
+        watch.feed(gurobi('-', '200.0'), 0.), # no incumbent yet
+        watch.feed('Optimize a model with 10 rows', 1.),
+        watch.feed(gurobi('100.0', '200.0'), 1.),
+        watch.feed(gurobi('100.0', '150.0'), 6.),
+        watch.feed(gurobi('100.0', '120.0'), 11.),
+    ]
+    reason = watch.feed(gurobi('100.0', '119.5'), 21.)
+    after = watch.feed(gurobi('100.0', '119.5'), 40.) # once per job
+
+    # a new solve starts a new window
+    restarted = GapWatch(10., 0.01)
+    restarted.feed(cplex('100.0', '120.0'), 0.)
+    restarted.feed(start, 50.)
+    fresh = [restarted.feed(cplex('100.0', '120.0'), now) for now in (55., 60.)]
+    stalled = restarted.feed(cplex('100.0', '120.0'), 65.)
+
+    # a process that ended can not be interrupted, so its stop file goes
+    class Ended(object):
+        pid = -1
+        stdout = cStringIO.StringIO('\n'.join([start] + [gurobi('100.0', '120.0')]*3) + '\n')
+        def poll(self): return 0
+    folder = tempfile.mkdtemp()
+    try:
+        quiet = GapWatch(0., 0.01)
+        follow_log(Ended(), quiet, folder)
+        leftover = os.path.exists(os.path.join(folder, GRN_STP))
+    finally:
+        shutil.rmtree(folder, True)
+
+    tests = (
+        "fed == [None] * 6", # no plateau while the gap closes
+        "reason is not None and reason.startswith('plateau')",
+        "'closed by 0.005' in reason", # 0.2 to 0.195
+        "after is None",
+        "fresh == [None, None]", # the gap of the earlier solve is not used
+        "stalled is not None",
+        "quiet.reason is not None and not leftover",
+    )
+    return check(tests, locals(), verbose)
+
+
+
+# ~~ __test__() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def __test__(verbose=False):
+    """__TEST__() runs all tests and returns the number that failed."""
+    failures = 0
+    for test in (
+        test_plan_jobs, test_backends, test_condor, test_manifest, test_gap_watch
+    ):
+        failures += test(verbose)
+    if failures > 0: print '%i test(s) failed.' % failures
+    else: print 'All tests passed.'
+    return failures
+
+
+
+if __name__ == '__main__':
+    sys.exit(1 if __test__('-v' in sys.argv[1:]) > 0 else 0)
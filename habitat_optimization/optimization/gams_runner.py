@@ -0,0 +1,360 @@
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+# Description:
+#       This script runs the GAMS command of a job where the job runs (on
+#   this machine or a cluster node, see run_gams.py and job_backends.py).
+#   With --race, the model is solved by several solvers at once, each by
+#   its own GAMS process (with --solver, see Habitat_Opt_Solve.gms) in its own
+#   subdirectory. The first solver to reach optcr wins: the other GAMS
+#   processes are stopped, the winner's outputs are moved to the job's
+#   directory and its name is written to GRN_WIN, which run_manifest.py
+#   records. The job's inputs (including this script and
+#   solver_telemetry.py) must be in the job's directory.
+#       With --plateau, the log of each GAMS process is followed for the
+#   incumbent and best bound of the solver. When the relative gap closes by
+#   less than a rate over a window of time, the reason is written to
+#   GRN_STP and the solve is interrupted. The model (run with its --plateau
+#   option, see Habitat_Opt_Solve.gms) takes an interrupt for a plateau only if
+#   GRN_STP is there, in which case the solver returns its incumbent and
+#   the model skips its remaining solves. Other interrupts still abort the
+#   job. run_manifest.py records the reason. The interrupt is sent as
+#   Ctrl-C would to the process group of GAMS, so --plateau is refused
+#   where that is not possible (systems other than POSIX, e.g. Windows).
+#
+#   usage: python gams_runner.py [--race gurobi,cplex] [--plateau 900,0.001]
+#       gams Habitat_Opt.gms ...
+
+# race()
+GRN_RAC_FLG = '--race'
+GRN_RAC_PRE = 'race_' # subdirectory of each solver
+GRN_WIN = 'race.txt' # names the winning solver
+GRN_INT = 1. # seconds between checks of the GAMS processes
+GRN_KIL = 10. # seconds a stopped GAMS process gets before it is killed
+GRN_NRM = 1 # solver status of a normal completion (e.g. optcr reached)
+GRN_SOL = (1, 2, 8) # model statuses with a solution (optimal, locally optimal, integer)
+
+# GapWatch, solve()
+GRN_PLT_FLG = '--plateau' # window seconds,relative gap to close per window
+GRN_PLT_GMS = 'plateau' # model option for solves stopped on a plateau
+GRN_STP = 'stop.txt' # why a solve was stopped early (also read by the models)
+GRN_DEF_WIN = 900.
+GRN_DEF_RAT = 0.001
+GRN_LOG_PAT = ( # (incumbent, best bound) in the progress lines of the solvers
+    r'\s(\S+)\s+(\S+)\s+[\d.]+%\s+\S+\s+\d+s\s*$', # Gurobi: ... Incumbent BestBd Gap It/Node Time
+    r'\s(\S+)\s+(\S+)\s+(?:\d+\s+)?[\d.]+%\s*$', # CPLEX: ... Best Integer, Best Bound, ItCnt, Gap
+)
+
+
+
+# ~~ reached_optcr() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def reached_optcr(workdir):
+    """
+    REACHED_OPTCR() returns True if the last solve of the GAMS run in
+    [workdir] completed normally with a solution, i.e. it stopped because
+    the gap closed to optcr rather than at reslim (see solver_telemetry.py)
+    """
+    from solver_telemetry import run_telemetry
+    records = run_telemetry(workdir)
+    if len(records) == 0: return False
+    return (records[-1]['solver_status'] == GRN_NRM) and (records[-1]['model_status'] in GRN_SOL)
+
+
+
+# ~~ final_gap() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def final_gap(workdir):
+    """
+    FINAL_GAP() returns the relative gap of the last solve of the GAMS run
+    in [workdir], or None if it is not known
+    """
+    from solver_telemetry import run_telemetry
+    records = run_telemetry(workdir)
+    if len(records) == 0: return None
+    record = records[-1]
+    if record['gap'] is not None: return record['gap']
+    if (record['objective'] is None) or (record['best_bound'] is None): return None
+    return abs(record['best_bound'] - record['objective']) / max(abs(record['objective']), 1e-10)
+
+
+
+# ~~ GapWatch ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class GapWatch(object):
+    """
+    GapWatch follows the log lines of a GAMS process and tells when the
+    relative gap between the solver's incumbent and best bound has closed
+    by less than [rate] over the last [window] seconds of a solve. The
+    times are those at which the lines are read.
+    """
+
+    def __init__(self, window=GRN_DEF_WIN, rate=GRN_DEF_RAT):
+        self.window = window
+        self.rate = rate
+        self.gaps = [] # (seconds, gap) of the current solve
+        self.reason = None # why the solve was stopped, once it is
+
+    def feed(self, line, now=None):
+        """
+        FEED() reads a log line and returns the reason to stop the solve
+        if its gap reached a plateau, else None. A new solve (the line GAMS
+        writes when it starts the solver) starts a new window.
+        """
+        import re, time
+        from solver_telemetry import solve_start
+        if now is None: now = time.time()
+        if solve_start(line) is not None:
+            self.gaps = []
+            return None
+        if self.reason is not None: return None
+        for pattern in GRN_LOG_PAT:
+            match = re.search(pattern, line)
+            if match is not None: break
+        else: return None
+        try: incumbent, bound = [float(v) for v in match.groups()]
+        except ValueError: return None # no incumbent yet
+        gap = abs(bound - incumbent) / max(abs(incumbent), 1e-10)
+        if (len(self.gaps) > 0) and (now - self.gaps[0][0] < self.window):
+            self.gaps.append((now, gap))
+            return None
+
+        # the gap a window ago, dropping the older ones
+        while (len(self.gaps) > 1) and (now - self.gaps[1][0] >= self.window): self.gaps.pop(0)
+        self.gaps.append((now, gap))
+        if len(self.gaps) < 2: return None
+        closed = self.gaps[0][1] - gap
+        if closed >= self.rate: return None
+        self.reason = 'plateau: gap %.6g closed by %.6g in %.0f s (less than %.6g)' % (
+            gap, closed, now - self.gaps[0][0], self.rate
+        )
+        return self.reason
+
+
+
+# ~~ interrupt_gams() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def interrupt_gams(process):
+    """
+    INTERRUPT_GAMS() interrupts the solve of a GAMS process started by
+    start_gams() as Ctrl-C would, so that the solver returns its incumbent
+    and GAMS goes on. Returns False where this is not possible (Windows).
+    """
+    import os, signal
+    if (os.name <> 'posix') or (process.poll() is not None): return False
+    try: os.killpg(process.pid, signal.SIGINT)
+    except OSError: return False
+    return True
+
+
+
+# ~~ follow_log() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def follow_log(process, watch, workdir):
+    """
+    FOLLOW_LOG() echoes the output of a GAMS process started by
+    start_gams() with a GapWatch, and interrupts its solve when the watch
+    finds a plateau. The reason is written to GRN_STP in [workdir] before
+    the interrupt is sent, so that the model can tell it from other
+    interrupts, and removed if it could not be sent.
+    """
+    import os, sys
+    stopFile = os.path.join(workdir, GRN_STP)
+    for line in iter(process.stdout.readline, ''):
+        sys.stdout.write(line)
+        sys.stdout.flush()
+        reason = watch.feed(line)
+        if reason is None: continue
+        print 'Stopping the solve in %s on a %s.' % (os.path.abspath(workdir), reason)
+        with open(stopFile, 'w') as fh: fh.write(reason + '\n')
+        if not interrupt_gams(process): os.remove(stopFile)
+    process.stdout.close()
+
+
+
+# ~~ start_gams() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def start_gams(args, workdir, watch=None):
+    """
+    START_GAMS() starts a GAMS command (list of arguments) in [workdir], in
+    a process group of its own so that it can be stopped with the solver
+    it starts. With a GapWatch, the model is told of it (GRN_PLT_GMS) and
+    the output is followed by follow_log() in a thread. A GapWatch needs a
+    POSIX system to interrupt the solve (see interrupt_gams()).
+    """
+    import os, subprocess, threading
+    kwargs = {'cwd': workdir}
+    if os.name == 'posix': kwargs['preexec_fn'] = os.setsid
+    if watch is None: return subprocess.Popen(args, **kwargs)
+    if os.name <> 'posix':
+        raise RuntimeError('%s needs a POSIX system to interrupt GAMS, not %s.' % (GRN_PLT_FLG, os.name))
+    process = subprocess.Popen(
+        list(args) + ['--%s' % GRN_PLT_GMS, '1'], stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT, bufsize=1, **kwargs
+    )
+    thread = threading.Thread(target=follow_log, args=(process, watch, workdir))
+    thread.daemon = True
+    thread.start()
+    process.follower = thread
+    return process
+
+
+
+# ~~ stop_gams() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def stop_gams(process):
+    """
+    STOP_GAMS() stops a GAMS process started by start_gams(), first asking
+    it to stop, then killing it after GRN_KIL seconds
+    """
+    import os, signal, time
+    if process.poll() is not None: return
+    try:
+        if os.name == 'posix': os.killpg(process.pid, signal.SIGTERM)
+        else: process.terminate()
+        until = time.time() + GRN_KIL
+        while (process.poll() is None) and (time.time() < until): time.sleep(0.1)
+        if process.poll() is None:
+            if os.name == 'posix': os.killpg(process.pid, signal.SIGKILL)
+            else: process.kill()
+        process.wait()
+    except OSError: pass
+
+
+
+# ~~ solve() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def solve(args, plateau=None, workdir='.'):
+    """
+    SOLVE() runs a GAMS command (list of arguments) in [workdir] and
+    returns its return code. With [plateau] = (window seconds, rate), a
+    solve whose relative gap closes by less than rate over window is
+    stopped with its incumbent (see GapWatch).
+    """
+    import os, signal, time
+    if os.path.exists(os.path.join(workdir, GRN_STP)): os.remove(os.path.join(workdir, GRN_STP))
+    watch = None if plateau is None else GapWatch(*plateau)
+    process = start_gams(args, workdir, watch)
+
+    # stop the GAMS process if the job is cancelled
+    def cancel(signum, frame):
+        stop_gams(process)
+        raise SystemExit(128 + signum)
+    signal.signal(signal.SIGTERM, cancel)
+
+    try:
+        while process.poll() is None: time.sleep(GRN_INT)
+        if watch is not None: process.follower.join()
+        return process.returncode
+    finally:
+        stop_gams(process)
+
+
+
+# ~~ race() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def race(args, solvers, workdir='.', plateau=None):
+    """
+    RACE() solves a model with several solvers at once and keeps the
+    result of the first to reach optcr
+
+    INPUTS:
+        args        = GAMS command as a list of arguments, without --solver
+        solvers     = names of the GAMS solvers to race, e.g. ('gurobi',
+            'cplex')
+        workdir     = (optional) job directory holding the inputs, where the
+            winner's outputs are moved. Default is the current directory.
+        plateau     = (optional) (window seconds, rate) to stop the solves
+            whose gap stops closing (see solve()). Default is None.
+
+    OUTPUTS:
+        (winning solver, its return code). If no solver reaches optcr,
+        the one that finished with the smallest gap wins. If none left a
+        solution, the winner is None and the return code is that of the
+        last to fail.
+    """
+
+    import os, shutil, signal, time
+
+    # a directory per solver, with links to the inputs
+    workdir = os.path.abspath(workdir)
+    if os.path.exists(os.path.join(workdir, GRN_STP)): os.remove(os.path.join(workdir, GRN_STP))
+    inputs = [f for f in os.listdir(workdir) if os.path.isfile(os.path.join(workdir, f))]
+    dirs = {}
+    for solver in solvers:
+        dirs[solver] = os.path.join(workdir, GRN_RAC_PRE + solver)
+        if os.path.exists(dirs[solver]): shutil.rmtree(dirs[solver])
+        os.makedirs(dirs[solver])
+        for f in inputs:
+            try: os.symlink(os.path.join(workdir, f), os.path.join(dirs[solver], f))
+            except (AttributeError, OSError): shutil.copy2(os.path.join(workdir, f), dirs[solver])
+
+    # stop the GAMS processes if the job is cancelled
+    processes = {}
+    def cancel(signum, frame):
+        for process in processes.values(): stop_gams(process)
+        raise SystemExit(128 + signum)
+    signal.signal(signal.SIGTERM, cancel)
+
+    try:
+        for solver in solvers:
+            watch = None if plateau is None else GapWatch(*plateau)
+            processes[solver] = start_gams(list(args) + ['--solver', solver], dirs[solver], watch)
+
+        # wait for a winner, keeping the finished runs that did not reach
+        #   optcr in case there is none
+        winner = None
+        finished = {}
+        while (winner is None) and (len(finished) < len(solvers)):
+            time.sleep(GRN_INT)
+            for solver in solvers:
+                if solver in finished: continue
+                code = processes[solver].poll()
+                if code is None: continue
+                finished[solver] = code
+                if (code == 0) and reached_optcr(dirs[solver]):
+                    winner = solver
+                    break
+                print 'Solver %s finished without reaching optcr (return code %i).' % (solver, code)
+        for solver in solvers: stop_gams(processes[solver])
+
+        # or the finished run with the smallest gap
+        if winner is None:
+            gaps = [
+                (final_gap(dirs[solver]), solver) for solver in solvers
+                if (finished.get(solver, None) == 0)
+            ]
+            gaps = [g for g in gaps if g[0] is not None]
+            if len(gaps) > 0: winner = min(gaps)[1]
+        if winner is None:
+            print 'No solver found a solution.'
+            failed = [code for code in finished.values() if code <> 0]
+            return (None, failed[-1] if len(failed) > 0 else 1)
+
+        # keep the winner's outputs
+        print 'Solver %s won the race.' % winner
+        for f in os.listdir(dirs[winner]):
+            path = os.path.join(dirs[winner], f)
+            if os.path.islink(path) or (f in inputs): continue
+            target = os.path.join(workdir, f)
+            if os.path.isdir(target): shutil.rmtree(target)
+            elif os.path.exists(target): os.remove(target)
+            shutil.move(path, target)
+        with open(os.path.join(workdir, GRN_WIN), 'w') as fh: fh.write(winner + '\n')
+        return (winner, finished[winner])
+
+    finally:
+        for solver in solvers:
+            if solver in processes: stop_gams(processes[solver])
+            shutil.rmtree(dirs[solver], True)
+
+
+
+if __name__ == '__main__':
+    import sys
+    args = sys.argv[1:]
+    solvers = None
+    plateau = None
+    while (len(args) > 1) and (args[0] in (GRN_RAC_FLG, GRN_PLT_FLG)):
+        if args[0] == GRN_RAC_FLG: solvers = args[1].split(',')
+        else: plateau = tuple(float(v) for v in args[1].split(','))
+        args = args[2:]
+    if solvers is not None:
+        winner, code = race(args, solvers, plateau=plateau)
+    elif plateau is not None:
+        code = solve(args, plateau)
+    else:
+        import subprocess
+        code = subprocess.call(args)
+    sys.exit(code)
@@ -0,0 +1,961 @@
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+# Description:
+#       This script runs GAMS jobs through interchangeable backends, so that
+#   run_gams.py (on a workstation) and my_submit.py (on the cluster) share
+#   one code path. A job is (name, command, inputs), where command is run in
+#   a directory holding the input files under their base names and leaves
+#   its outputs (e.g. results.gdx) in that directory. Every backend has the
+#   same methods:
+#           submit(name, command, inputs)   starts (or queues) a job
+#           poll()                          {name: (state, return code)}
+#           cancel(names=None)              stops jobs (default all)
+#           collect(name)                   (return code, output directory)
+#           release(name)                   cleans up after a collected job
+#       Four backends are provided:
+#           'local'     runs jobs as processes on this machine, each in its
+#                       own scratch directory (tmpfs where available)
+#           'condor'    submits jobs to HTCondor, one directory per job,
+#                       with the same submit settings as condor_gams_submit.
+#                       Many jobs go in one submit description queued from a
+#                       run list, optionally packing several runs per job
+#           'slurm'     submits jobs to SLURM with sbatch, one directory per
+#                       job on the shared file system
+#           'fake'      runs jobs in-process by calling a Python function,
+#                       for trying out drivers without GAMS or a cluster
+#       run_jobs() drives any backend, handing back jobs as they finish, and
+#   reports the throughput of the backend.
+#       Inputs shared by many jobs (e.g. data_all.gdx) can be kept in an
+#   InputStore, which holds one copy of each file by content hash. Jobs then
+#   link to (or transfer) the stored copy instead of copying the file for
+#   every run, and Condor nodes can keep stored files in a local cache that
+#   later jobs on the node reuse.
+
+# job states
+JOB_STA_QUE = 'queued'
+JOB_STA_RUN = 'running'
+JOB_STA_DON = 'done'
+JOB_STA_CAN = 'cancelled'
+JOB_END = (JOB_STA_DON, JOB_STA_CAN)
+
+# backends
+JOB_BCK_LOC = 'local'
+JOB_BCK_CND = 'condor'
+JOB_BCK_SLM = 'slurm'
+JOB_BCK_FAK = 'fake'
+JOB_DEF_BCK = JOB_BCK_LOC
+
+# run_jobs()
+JOB_DEF_INT = None # seconds between polls, None for the backend's own
+
+# LocalBackend
+JOB_LOC_TMP = ('/dev/shm',) # tmpfs roots tried for the scratch directories
+JOB_LOC_PRE = 'gams_run_'
+JOB_LOC_INT = 0.2
+
+# InputStore
+JOB_STO_DIR = '../store'
+JOB_STO_BUF = 1024*1024 # bytes read at a time when hashing
+
+# CondorBackend and SlurmBackend
+JOB_CLU_DIR = '../runs'
+JOB_CLU_INT = 30.
+JOB_CLU_SCR = 'run.sh'
+JOB_CLU_OUT = 'gams.out'
+JOB_CLU_ERR = 'gams.err'
+JOB_CLU_ENV = ( # set in the job script before the command is run
+    'export PATH="/mnt/ws/progs/gams/current:$PATH"',
+    'export LD_LIBRARY_PATH="/mnt/ws/progs/gams/current:$LD_LIBRARY_PATH"',
+    'export GUROBI_HOME="/progs/gurobi/linux64"',
+    'export GRB_LICENSE_FILE="/progs/gurobi/gurobi.lic"',
+)
+JOB_CND_CMD = 'gams.cmd'
+JOB_CND_LST = 'runs.txt' # run list queued from by submit_all()
+JOB_CND_DEF_PCK = 1 # runs packed into each Condor job by submit_all()
+JOB_CND_PCK = 'pack_%s' # directory of a packed job, by its first run
+JOB_CND_SEP = '__' # joins run names to the outputs of packed runs
+JOB_CND_EXT = 'exit.code' # return code of each packed run
+JOB_CND_NCH = '/var/tmp/habitat_inputs' # node cache of shared stored inputs
+JOB_CND_HRS = 6 # +threshold_hours of a job without a time limit, doubled when escalated
+JOB_CND_LOG = 'gams.log'
+JOB_CND_ATT = ( # site settings of condor_gams_submit
+    'match_list_length = 5',
+    'Notification = NEVER',
+    '+InteractiveJob = FALSE',
+    '+Group = "WID"',
+    '+WIDsTheme = "Optimization"',
+    'skip_filechecks = true',
+)
+JOB_SLM_STA = { # sacct states, by the job state they map to (others are failures)
+    JOB_STA_QUE: ('', 'PENDING', 'REQUEUED', 'REQUEUE_FED', 'REQUEUE_HOLD', 'RESV_DEL_HOLD', 'SUSPENDED', 'STOPPED'),
+    JOB_STA_RUN: ('RUNNING', 'CONFIGURING', 'COMPLETING', 'RESIZING', 'SIGNALING', 'STAGE_OUT'),
+    JOB_STA_CAN: ('CANCELLED',),
+    JOB_STA_DON: ('COMPLETED',),
+}
+JOB_SLM_FAI = -1 # return code of a failed job (e.g. TIMEOUT) that left neither an exit code nor a signal
+
+
+
+# ~~ stage_inputs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def stage_inputs(inputs, workdir):
+    """
+    STAGE_INPUTS() puts the input files of a job in [workdir] under their
+    base names, as hard links where possible (same file system), else as
+    symbolic links where the system has them, else as copies
+    """
+    import os, shutil
+    for f in inputs:
+        target = os.path.join(workdir, os.path.basename(f))
+        if os.path.lexists(target): os.remove(target)
+        try: os.link(os.path.abspath(f), target)
+        except (AttributeError, OSError):
+            if hasattr(os, 'symlink'): os.symlink(os.path.abspath(f), target)
+            else: shutil.copy2(f, target)
+
+
+
+# ~~ INPUTSTORE ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class InputStore(object):
+    """
+    Content-addressed store of job inputs in [root]. A file is kept once
+    per content, as root/<SHA-1 hash>/<base name>, so jobs that use the same
+    file (e.g. the default GDX of every run) all point to one stored copy
+    and the file keeps its name wherever it is linked or transferred to.
+    Files are copied into the store (not linked), so rewriting the original
+    (e.g. by make_gdx) does not change the inputs of jobs already submitted.
+    Hashes are remembered by path, size and modification time, so a file is
+    hashed once however many jobs use it.
+    """
+
+    def __init__(self, root=JOB_STO_DIR):
+        self.root = root
+        self.hashes = {}
+
+    def hash(self, path):
+        """HASH() returns the SHA-1 hexadecimal hash of a file's contents."""
+        import hashlib, os
+        path = os.path.abspath(path)
+        info = os.stat(path)
+        key = (path, info.st_size, info.st_mtime)
+        if key not in self.hashes:
+            h = hashlib.sha1()
+            with open(path, 'rb') as fh:
+                while True:
+                    block = fh.read(JOB_STO_BUF)
+                    if not block: break
+                    h.update(block)
+            self.hashes[key] = h.hexdigest()
+        return self.hashes[key]
+
+    def put(self, path):
+        """
+        PUT() stores a file (if its content is not already stored) and
+        returns the full path of the stored copy
+        """
+        import os, shutil, tempfile
+        folder = os.path.abspath(os.path.join(self.root, self.hash(path)))
+        stored = os.path.join(folder, os.path.basename(path))
+        if not os.path.exists(stored):
+            if not os.path.exists(folder): os.makedirs(folder)
+            fd, temp = tempfile.mkstemp(dir=folder)
+            os.close(fd)
+            shutil.copy2(path, temp)
+            os.rename(temp, stored)
+        return stored
+
+    def put_all(self, inputs):
+        """PUT_ALL() stores files and returns the paths of the stored copies."""
+        return [self.put(f) for f in inputs]
+
+
+
+# ~~ stored_inputs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def stored_inputs(store, inputs):
+    """
+    STORED_INPUTS() returns the full paths of the stored copies of [inputs]
+    in an InputStore (or store directory), or of the inputs themselves if
+    store is None
+    """
+    import os
+    if store is None: return [os.path.abspath(f) for f in inputs]
+    if isinstance(store, basestring): store = InputStore(store)
+    return store.put_all(inputs)
+
+
+
+# ~~ cache_command() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def cache_command(command, shared, cache=JOB_CND_NCH):
+    """
+    CACHE_COMMAND() returns bash lines that link stored inputs from a cache
+    on the node into the job's directory, fetching them from the store
+    (which the node must be able to read) only when the node does not have
+    them yet, then run [command] and remove the links again (so Condor does
+    not transfer them back)
+
+    INPUTS:
+        command     = bash lines of the job
+        shared      = stored input paths (root/<hash>/<name>) to use through
+            the node cache
+        cache       = (optional) cache directory on the nodes. Default is
+            JOB_CND_NCH.
+    """
+    import os
+    lines = [
+        'fetch() {',
+        '  if [ ! -f "%s/$1/$2" ]; then' % cache,
+        '    mkdir -p "%s/$1" && cp "$3" "%s/$1/.$2.$$" && mv "%s/$1/.$2.$$" "%s/$1/$2"' % ((cache,)*4),
+        '  fi',
+        '  ln -s "%s/$1/$2" "$2" || cp "$3" "$2"' % cache,
+        '}',
+    ]
+    names = []
+    for f in shared:
+        folder, name = os.path.split(f)
+        lines.append('fetch %s "%s" "%s"' % (os.path.basename(folder), name, f))
+        names.append('"%s"' % name)
+    lines.extend(['(%s)' % command, 'code=$?', 'rm -f %s' % ' '.join(names), 'exit $code'])
+    return '\n'.join(lines)
+
+
+
+# ~~ job_directory() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def job_directory(rundir, name):
+    """
+    JOB_DIRECTORY() makes an empty directory for a job in [rundir] and
+    returns its full path. What an earlier job of the same name left there
+    (e.g. its results.gdx) is deleted, so it can not be taken for the
+    outputs of the new job.
+    """
+    import os, shutil
+    workdir = os.path.abspath(os.path.join(rundir, name))
+    if os.path.lexists(workdir):
+        if os.path.isdir(workdir) and not os.path.islink(workdir): shutil.rmtree(workdir)
+        else: os.remove(workdir)
+    os.makedirs(workdir)
+    return workdir
+
+
+
+# ~~ write_script() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def write_script(command, workdir, header=()):
+    """
+    WRITE_SCRIPT() writes the JOB_CLU_SCR bash script of a cluster job,
+    which sets up the GAMS environment and runs [command], and returns its
+    path
+    """
+    import os
+    script = os.path.join(workdir, JOB_CLU_SCR)
+    with open(script, 'w') as fh:
+        fh.write('#!/bin/bash\n')
+        for line in header: fh.write(line + '\n')
+        for line in JOB_CLU_ENV: fh.write(line + '\n')
+        fh.write('hostname\n')
+        fh.write(command + '\n')
+    os.chmod(script, 0755)
+    return script
+
+
+
+# ~~ LOCALBACKEND ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class LocalBackend(object):
+    """
+    Runs jobs as processes on this machine, at most [workers] at a time.
+    Each job works in its own scratch directory, made in the first writable
+    JOB_LOC_TMP (tmpfs) directory or else the system's temporary directory,
+    and deleted when the job is released. Inputs are linked into the
+    scratch directory, from an InputStore if [store] is given.
+    """
+
+    name = JOB_BCK_LOC
+    interval = JOB_LOC_INT
+
+    def __init__(self, workers=1, store=None):
+        import os, threading, Queue
+        if isinstance(store, basestring): store = InputStore(store)
+        self.workers = max(1, workers)
+        self.store = store
+        self.todo = Queue.Queue()
+        self.lock = threading.Lock()
+        self.jobs = {} # name: [state, return code, scratch directory, process]
+        self.threads = [] # worker threads, all started and ended under the lock
+        self.root = None
+        for root in JOB_LOC_TMP:
+            if os.path.isdir(root) and os.access(root, os.W_OK):
+                self.root = root
+                break
+
+    def submit(self, name, command, inputs=()):
+        """SUBMIT() queues a job to be run by the worker threads."""
+        import threading
+        inputs = stored_inputs(self.store, inputs)
+
+        # a worker only ends once it found the queue empty under the lock,
+        #   so a job queued here is either taken by a running worker or
+        #   starts a new one
+        with self.lock:
+            self.jobs[name] = [JOB_STA_QUE, None, None, None]
+            self.todo.put((name, command, inputs))
+            if len(self.threads) < self.workers:
+                thread = threading.Thread(target=self.work)
+                thread.daemon = True
+                self.threads.append(thread)
+                thread.start()
+
+    def work(self):
+        import subprocess, tempfile, threading, Queue
+        while True:
+            with self.lock:
+                try: name, command, inputs = self.todo.get_nowait()
+                except Queue.Empty:
+                    self.threads.remove(threading.current_thread())
+                    return
+                job = self.jobs[name]
+                if job[0] <> JOB_STA_QUE: continue
+                job[0] = JOB_STA_RUN
+            workdir = tempfile.mkdtemp(prefix=JOB_LOC_PRE, dir=self.root)
+            job[2] = workdir
+            try:
+                stage_inputs(inputs, workdir)
+                with self.lock:
+                    if job[0] <> JOB_STA_RUN: continue # cancelled meanwhile
+                    job[3] = subprocess.Popen(command, cwd=workdir, shell=True)
+                code = job[3].wait()
+            except Exception as e:
+                print 'Could not run %s: %s' % (command, e)
+                code = -1
+            with self.lock:
+                if job[0] == JOB_STA_RUN: job[0] = JOB_STA_DON
+                job[1] = code
+                job[3] = None
+
+    def poll(self):
+        """
+        POLL() returns {name: (state, return code)} of all jobs. Cancelled
+        jobs are running until their process has ended.
+        """
+        with self.lock:
+            return dict(
+                (name, (JOB_STA_RUN if job[3] is not None else job[0], job[1]))
+                for name, job in self.jobs.iteritems()
+            )
+
+    def cancel(self, names=None):
+        """CANCEL() drops queued jobs and kills running ones."""
+        with self.lock:
+            if names is None: names = self.jobs.keys()
+            for name in names:
+                job = self.jobs[name]
+                if job[0] in JOB_END: continue
+                job[0] = JOB_STA_CAN
+                if job[3] is not None:
+                    try: job[3].kill()
+                    except OSError: pass
+
+    def collect(self, name):
+        """COLLECT() returns (return code, scratch directory) of a job."""
+        job = self.jobs[name]
+        return (job[1], job[2])
+
+    def release(self, name):
+        """RELEASE() deletes the scratch directory of a job."""
+        import shutil
+        with self.lock: job = self.jobs.pop(name)
+        if job[2] is not None: shutil.rmtree(job[2], True)
+
+    def close(self):
+        """CLOSE() cancels unfinished jobs and waits for the threads."""
+        self.cancel()
+        with self.lock: threads = list(self.threads)
+        for thread in threads: thread.join()
+        for name in self.jobs.keys(): self.release(name)
+
+
+
+# ~~ CONDORBACKEND ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class CondorBackend(object):
+    """
+    Submits jobs to HTCondor from a directory per job in [rundir]. Input
+    files are transferred by Condor from where they are, and the job's
+    outputs come back to its directory. Job states are read from the Condor
+    job logs, so no Condor Python bindings are needed. Job directories are
+    kept (with the GAMS output and log) after the jobs are released, until
+    a job of the same name is submitted.
+        submit_all() submits many jobs with a single submit description
+    that queues them from a list (see submit_all()). With [pack] > 1, that
+    many runs are packed into each Condor job and run one after the other
+    on the node, so that short runs do not each wait on the negotiator.
+        With an InputStore [store], Condor transfers the stored copies of
+    the inputs, so each input is written to disk once however many jobs use
+    it. With a [nodeCache] directory as well (e.g. JOB_CND_NCH), inputs used
+    by more than one job are not transferred by Condor at all: the job
+    fetches them from the store (which must then be on a file system the
+    nodes can read) into the node's cache, where later jobs on the same
+    node find them (see cache_command()).
+    """
+
+    name = JOB_BCK_CND
+    interval = JOB_CLU_INT
+
+    def __init__(
+        self, rundir=JOB_CLU_DIR, cpus=None, pack=JOB_CND_DEF_PCK, store=None,
+        nodeCache=None
+    ):
+        import os
+        if cpus is None: cpus = int(os.environ.get('REQUEST_CPUS', 1))
+        if isinstance(store, basestring): store = InputStore(store)
+        self.rundir = rundir
+        self.cpus = cpus
+        self.pack = max(1, pack)
+        self.store = store
+        self.nodeCache = nodeCache
+        self.levels = {} # name: factor on the resources of a retried job (see escalate())
+        self.limits = {} # name: time limit in seconds (see limit())
+        self.scales = {} # name: factor on the CPUs of a job (see scale())
+        self.jobs = {} # name: [job directory, Condor job id, directory of its log]
+
+    def submit(self, name, command, inputs=()):
+        """SUBMIT() writes the job's submit file and calls condor_submit."""
+        import os
+        workdir = self.job_directory(name)
+        write_script(command, workdir)
+        lines = self.submit_lines(*self.resources([name]))
+        inputs = stored_inputs(self.store, inputs)
+        if len(inputs) > 0:
+            lines.append('transfer_input_files = %s' % ','.join(inputs))
+        cluster = self.condor_submit(workdir, lines + ['queue'])
+        self.jobs[name] = [workdir, cluster, workdir]
+        return cluster
+
+    def submit_all(self, jobs):
+        """
+        SUBMIT_ALL() submits jobs as one Condor cluster, queued from the
+        JOB_CND_LST list in [rundir] by a single submit description. Each
+        line of the list is a packed job's directory and its input files,
+        so paths must not contain spaces or commas. Packed runs each work
+        in a subdirectory of the node's scratch directory, and their
+        outputs come back to the pack directory with the run name as a
+        prefix until they are collected.
+
+        OUTPUTS:
+            list of Condor job ids, one per job
+        """
+        import os
+        rundir = os.path.abspath(self.rundir)
+        if not os.path.exists(rundir): os.makedirs(rundir)
+        jobs = [(name, command, stored_inputs(self.store, inputs)) for name, command, inputs in jobs]
+        packs = [jobs[i:i+self.pack] for i in xrange(0, len(jobs), self.pack)]
+        
+        # inputs of more than one pack are fetched through the node cache
+        uses = {}
+        for packJobs in packs:
+            for f in set(f for job in packJobs for f in job[2]): uses[f] = uses.get(f, 0) + 1
+        if (self.store is not None) and (self.nodeCache is not None):
+            shared = set(f for f in uses if uses[f] > 1)
+        else: shared = set()
+        
+        items = []
+        for packJobs in packs:
+            if len(packJobs) == 1:
+                name, command, inputs = packJobs[0]
+                packdir = self.job_directory(name)
+            else:
+                packdir = self.job_directory(JOB_CND_PCK % packJobs[0][0])
+                command = pack_command(packJobs)
+                for job in packJobs: self.job_directory(job[0])
+            inputs = []
+            for job in packJobs:
+                for f in job[2]:
+                    if f not in inputs: inputs.append(f)
+            fetched = [f for f in inputs if f in shared]
+            if len(fetched) > 0: command = cache_command(command, fetched, self.nodeCache)
+            write_script(command, packdir)
+            cpus, hours = self.resources([job[0] for job in packJobs])
+            items.append('%s %i %i %s' % (
+                packdir, cpus, hours, ','.join(f for f in inputs if f not in shared)
+            ))
+        with open(os.path.join(rundir, JOB_CND_LST), 'w') as fh:
+            fh.write('\n'.join(items) + '\n')
+        lines = self.submit_lines('$(cpus)', '$(hours)') + [
+            'initialdir = $(packdir)',
+            'transfer_input_files = $(inputs)',
+            'queue packdir,cpus,hours,inputs from %s' % JOB_CND_LST,
+        ]
+        lines[lines.index('executable = %s' % JOB_CLU_SCR)] = 'executable = $(packdir)/%s' % JOB_CLU_SCR
+        cluster = self.condor_submit(rundir, lines)
+        ids = []
+        for p in xrange(len(packs)):
+            for name, command, inputs in packs[p]:
+                packdir = items[p].split(' ', 1)[0]
+                self.jobs[name] = [os.path.join(rundir, name), '%s.%i' % (cluster, p), packdir]
+                ids.append(self.jobs[name][1])
+        print 'Submitted %i runs in %i Condor jobs as cluster %s.' % (len(jobs), len(packs), cluster)
+        return ids
+
+    def job_directory(self, name):
+        """
+        JOB_DIRECTORY() makes the (empty) directory of a job in [rundir] and
+        returns its full path (see job_directory())
+        """
+        return job_directory(self.rundir, name)
+
+    def condor_submit(self, workdir, lines):
+        """
+        CONDOR_SUBMIT() writes a submit description to [workdir], submits it
+        and returns the cluster id
+        """
+        import os, re, subprocess
+        with open(os.path.join(workdir, JOB_CND_CMD), 'w') as fh:
+            fh.write('\n'.join(lines) + '\n')
+        out = subprocess.Popen(
+            ['condor_submit', JOB_CND_CMD], cwd=workdir, stdout=subprocess.PIPE
+        ).communicate()[0]
+        cluster = re.search(r'submitted to cluster (\d+)', out)
+        if cluster is None: raise RuntimeError('condor_submit failed in %s: %s' % (workdir, out))
+        return cluster.group(1)
+
+    def resources(self, names):
+        """
+        RESOURCES() returns (request_cpus, +threshold_hours) of a Condor job
+        that runs the jobs [names] one after the other. The hours fit the
+        time limits of the jobs (see limit()) when all of them have one,
+        and are JOB_CND_HRS otherwise. The CPUs fit the job that needs the
+        most (see scale()). Both are scaled by the highest escalation level
+        of the jobs (see escalate()).
+        """
+        import math
+        level = max(self.levels.get(name, 1) for name in names)
+        if all(name in self.limits for name in names):
+            hours = max(1, int(math.ceil(sum(self.limits[name] for name in names) / 3600.)))
+        else: hours = JOB_CND_HRS
+        cpus = self.cpus * max(self.scales.get(name, 1) for name in names)
+        return (cpus*level, hours*level)
+
+    def submit_lines(self, cpus, hours):
+        """
+        SUBMIT_LINES() returns the submit file settings shared by all jobs,
+        with the CPUs and hours requested (numbers or submit macros)
+        """
+        return [
+            'universe = vanilla',
+            'executable = %s' % JOB_CLU_SCR,
+            'error = %s' % JOB_CLU_ERR,
+            'output = %s' % JOB_CLU_OUT,
+            'log = %s' % JOB_CND_LOG,
+            'should_transfer_files = YES',
+            'when_to_transfer_output = ON_EXIT',
+            'request_cpus = %s' % cpus,
+            '+threshold_hours = %s' % hours,
+        ] + list(JOB_CND_ATT)
+
+    def limit(self, name, seconds):
+        """
+        LIMIT() sets the time limit of a job, e.g. from its predicted run
+        time (see run_schedule.py), which sets its +threshold_hours
+        """
+        self.limits[name] = seconds
+
+    def scale(self, name, factor):
+        """
+        SCALE() multiplies the CPUs requested for a job by [factor], e.g. by
+        the number of solvers raced at once in it (see run_gams.py)
+        """
+        self.scales[name] = factor
+
+    def escalate(self, name):
+        """
+        ESCALATE() doubles the CPUs and hours requested for a job the next
+        time it is submitted (e.g. after it was removed for running past
+        threshold_hours)
+        """
+        self.levels[name] = 2*self.levels.get(name, 1)
+
+    def poll(self):
+        """POLL() returns {name: (state, return code)} from the job logs."""
+        logs = {}
+        for name, job in self.jobs.iteritems():
+            if job[2] not in logs: logs[job[2]] = self.read_log(job[2])
+        return dict((name, logs[job[2]]) for name, job in self.jobs.iteritems())
+
+    def read_log(self, workdir):
+        """
+        READ_LOG() returns (state, return code) of a job from the events in
+        its Condor job log
+        """
+        import os, re
+        path = os.path.join(workdir, JOB_CND_LOG)
+        if not os.path.exists(path): return (JOB_STA_QUE, None)
+        with open(path, 'r') as fh: text = fh.read()
+        if re.search(r'^009 ', text, re.M): return (JOB_STA_CAN, None)
+        if re.search(r'^005 ', text, re.M):
+            code = re.search(r'return value (\d+)', text)
+            if code is not None: return (JOB_STA_DON, int(code.group(1)))
+            signal = re.search(r'\(signal (\d+)\)', text)
+            return (JOB_STA_DON, -int(signal.group(1)) if signal else -1)
+        if re.search(r'^001 ', text, re.M): return (JOB_STA_RUN, None)
+        return (JOB_STA_QUE, None)
+
+    def cancel(self, names=None):
+        """
+        CANCEL() removes jobs from the Condor queue with condor_rm. All runs
+        packed with a cancelled run are cancelled with it.
+        """
+        import subprocess
+        if names is None: names = self.jobs.keys()
+        ids = sorted(set(self.jobs[name][1] for name in names))
+        if len(ids) > 0: subprocess.call(['condor_rm'] + ids)
+
+    def collect(self, name):
+        """
+        COLLECT() returns (return code, job directory) of a job. The outputs
+        of a packed run are first moved from the pack directory to the run's
+        own directory, and its return code is read from JOB_CND_EXT.
+        """
+        import os
+        from glob import glob
+        workdir, job, packdir = self.jobs[name]
+        code = self.read_log(packdir)[1]
+        if packdir == workdir: return (code, workdir)
+        if not os.path.exists(workdir): os.makedirs(workdir)
+        prefix = os.path.join(packdir, name + JOB_CND_SEP)
+        for f in glob(prefix + '*'):
+            os.rename(f, os.path.join(workdir, f[len(prefix):]))
+        code = None
+        exitFile = os.path.join(workdir, JOB_CND_EXT)
+        if os.path.exists(exitFile):
+            with open(exitFile, 'r') as fh: code = int(fh.read().strip() or -1)
+        return (code, workdir)
+
+    def release(self, name):
+        """RELEASE() forgets a job (its directory is kept)."""
+        self.jobs.pop(name)
+
+    def close(self):
+        self.jobs = {}
+
+
+
+# ~~ pack_command() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def pack_command(jobs):
+    """
+    PACK_COMMAND() returns bash lines that run several jobs one after the
+    other in one Condor job. Each job works in its own subdirectory with
+    links to the transferred inputs, its return code is written to
+    JOB_CND_EXT, and its outputs are moved to the top directory (which
+    Condor transfers back) with the job name and JOB_CND_SEP as a prefix.
+    """
+    lines = []
+    for name, command, inputs in jobs:
+        lines.extend([
+            'mkdir %s && cd %s' % (name, name),
+            'for f in ../*; do [ -f "$f" ] && ln -s "$f" .; done',
+            '(%s)' % command,
+            'echo $? > %s' % JOB_CND_EXT,
+            'for f in *; do [ -L "$f" ] || mv "$f" "../%s%s$f"; done' % (name, JOB_CND_SEP),
+            'cd .. && rm -rf %s' % name,
+        ])
+    return '\n'.join(lines)
+
+
+
+# ~~ sacct_state() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def sacct_state(state, exitCode):
+    """
+    SACCT_STATE() returns (state, return code) of a job from its State and
+    ExitCode (<exit code>:<signal>) in sacct. Only COMPLETED jobs are done
+    with their exit code. Jobs that ended otherwise (e.g. TIMEOUT, FAILED,
+    OUT_OF_MEMORY, NODE_FAIL, PREEMPTED) are done with a nonzero code: the
+    negative signal that ended them if there was one, as in the Condor job
+    logs, else their exit code if nonzero, else JOB_SLM_FAI.
+    """
+    state = state.split()[0] if state.strip() <> '' else '' # e.g. CANCELLED by 1234
+    for kind in (JOB_STA_QUE, JOB_STA_RUN, JOB_STA_CAN):
+        if state in JOB_SLM_STA[kind]: return (kind, None)
+    try: code, signal = [int(v) for v in (exitCode.strip().split(':') + ['0'])[:2]]
+    except ValueError: code, signal = (JOB_SLM_FAI, 0)
+    if state in JOB_SLM_STA[JOB_STA_DON]: return (JOB_STA_DON, code)
+    if signal <> 0: return (JOB_STA_DON, -signal)
+    return (JOB_STA_DON, code if code <> 0 else JOB_SLM_FAI)
+
+
+
+# ~~ SLURMBACKEND ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class SlurmBackend(object):
+    """
+    Submits jobs to SLURM with sbatch from a directory per job in [rundir],
+    which must be on a file system shared with the compute nodes. Input
+    files are linked into the job directory (see stage_inputs()), from an
+    InputStore if [store] is given, and job states are read with sacct.
+    Job directories are kept after the jobs are released, until a job of
+    the same name is submitted.
+    """
+
+    name = JOB_BCK_SLM
+    interval = JOB_CLU_INT
+
+    def __init__(self, rundir=JOB_CLU_DIR, cpus=1, options=(), store=None):
+        if isinstance(store, basestring): store = InputStore(store)
+        self.store = store
+        self.rundir = rundir
+        self.cpus = cpus
+        self.options = list(options) # extra #SBATCH options, e.g. --time=6:00:00
+        self.levels = {} # name: factor on the CPUs of a retried job (see escalate())
+        self.limits = {} # name: time limit in seconds (see limit())
+        self.scales = {} # name: factor on the CPUs of a job (see scale())
+        self.jobs = {} # name: [job directory, job id]
+
+    def submit(self, name, command, inputs=()):
+        """SUBMIT() writes the job's script and calls sbatch."""
+        import math, subprocess
+        workdir = job_directory(self.rundir, name)
+        stage_inputs(stored_inputs(self.store, inputs), workdir)
+        level = self.levels.get(name, 1)
+        options = [
+            '--job-name=%s' % name, '--chdir=%s' % workdir,
+            '--cpus-per-task=%i' % (self.cpus*self.scales.get(name, 1)*level),
+            '--output=%s' % JOB_CLU_OUT,
+            '--error=%s' % JOB_CLU_ERR,
+        ]
+        if name in self.limits:
+            options.append('--time=%i' % max(1, int(math.ceil(self.limits[name]*level / 60.))))
+        header = ['#SBATCH %s' % option for option in options + self.options]
+        write_script(command, workdir, header)
+        out = subprocess.Popen(
+            ['sbatch', '--parsable', JOB_CLU_SCR], cwd=workdir, stdout=subprocess.PIPE
+        ).communicate()[0].strip()
+        if out == '': raise RuntimeError('sbatch failed for %s' % name)
+        self.jobs[name] = [workdir, out.split(';')[0]]
+        return self.jobs[name][1]
+
+    def poll(self):
+        """POLL() returns {name: (state, return code)} from sacct."""
+        import subprocess
+        if len(self.jobs) == 0: return {}
+        ids = dict((job[1], name) for name, job in self.jobs.iteritems())
+        out = subprocess.Popen(
+            ['sacct', '-n', '-P', '-X', '-o', 'JobID,State,ExitCode', '-j', ','.join(ids.keys())],
+            stdout=subprocess.PIPE
+        ).communicate()[0]
+        states = dict((name, (JOB_STA_QUE, None)) for name in self.jobs)
+        for line in out.splitlines():
+            fields = line.split('|')
+            if (len(fields) < 3) or (fields[0] not in ids): continue
+            states[ids[fields[0]]] = sacct_state(fields[1], fields[2])
+        return states
+
+    def escalate(self, name):
+        """
+        ESCALATE() doubles the CPUs (and the time limit, if any) requested
+        for a job's next submission
+        """
+        self.levels[name] = 2*self.levels.get(name, 1)
+
+    def limit(self, name, seconds):
+        """LIMIT() sets the time limit (--time) of a job."""
+        self.limits[name] = seconds
+
+    def scale(self, name, factor):
+        """
+        SCALE() multiplies the CPUs (--cpus-per-task) requested for a job by
+        [factor], e.g. by the number of solvers raced at once in it
+        """
+        self.scales[name] = factor
+
+    def cancel(self, names=None):
+        """CANCEL() cancels jobs with scancel."""
+        import subprocess
+        if names is None: names = self.jobs.keys()
+        ids = [self.jobs[name][1] for name in names]
+        if len(ids) > 0: subprocess.call(['scancel'] + ids)
+
+    def collect(self, name):
+        """COLLECT() returns (return code, job directory) of a job."""
+        return (self.poll()[name][1], self.jobs[name][0])
+
+    def release(self, name):
+        """RELEASE() forgets a job (its directory is kept)."""
+        self.jobs.pop(name)
+
+    def close(self):
+        self.jobs = {}
+
+
+
+# ~~ FAKEBACKEND ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class FakeBackend(object):
+    """
+    Runs jobs in this process when they are polled, by calling
+    func(name, command, workdir) in a temporary directory holding the
+    inputs. func returns the job's return code (None for 0) and may write
+    outputs to workdir. The default func does nothing.
+    """
+
+    name = JOB_BCK_FAK
+    interval = 0.
+
+    def __init__(self, func=None):
+        self.func = func
+        self.jobs = {} # name: [state, return code, directory, command]
+
+    def submit(self, name, command, inputs=()):
+        import tempfile
+        workdir = tempfile.mkdtemp(prefix=JOB_LOC_PRE)
+        stage_inputs(inputs, workdir)
+        self.jobs[name] = [JOB_STA_QUE, None, workdir, command]
+
+    def poll(self):
+        for name, job in self.jobs.iteritems():
+            if job[0] == JOB_STA_QUE:
+                code = None
+                if self.func is not None: code = self.func(name, job[3], job[2])
+                job[0] = JOB_STA_DON
+                job[1] = 0 if code is None else code
+        return dict((name, (job[0], job[1])) for name, job in self.jobs.iteritems())
+
+    def cancel(self, names=None):
+        if names is None: names = self.jobs.keys()
+        for name in names:
+            if self.jobs[name][0] == JOB_STA_QUE: self.jobs[name][0] = JOB_STA_CAN
+
+    def collect(self, name):
+        return (self.jobs[name][1], self.jobs[name][2])
+
+    def release(self, name):
+        import shutil
+        shutil.rmtree(self.jobs.pop(name)[2], True)
+
+    def close(self):
+        for name in self.jobs.keys(): self.release(name)
+
+
+
+JOB_BCK = {
+    JOB_BCK_LOC: LocalBackend, JOB_BCK_CND: CondorBackend,
+    JOB_BCK_SLM: SlurmBackend, JOB_BCK_FAK: FakeBackend
+}
+
+
+# ~~ get_backend() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def get_backend(name, **options):
+    """
+    GET_BACKEND() returns a new backend instance given its name (see JOB_BCK
+    at top of script) and the options of its constructor
+    """
+    try: backend = JOB_BCK[name.lower()]
+    except KeyError:
+        raise ValueError('Unknown job backend %s. Use one of %s.' % (
+            name, ', '.join(sorted(JOB_BCK.keys()))
+        ))
+    return backend(**options)
+
+
+
+# ~~ run_jobs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def run_jobs(backend, jobs, interval=JOB_DEF_INT, follow=None, retry=None):
+    """
+    RUN_JOBS() submits jobs to a backend and hands them back as they finish,
+    so that their outputs can be used while the other jobs are still
+    running. The throughput of the backend is printed at the end.
+
+    INPUTS:
+        backend     = backend instance (see get_backend())
+        jobs        = list of (name, command, inputs) where name is unique
+        interval    = (optional) seconds to wait between polls when no job
+            has finished. Default is JOB_DEF_INT, which uses the backend's
+            own interval.
+        follow      = (optional) function follow(name, state, return code,
+            output directory) called when a job finishes (before it is
+            handed back), returning a list of further jobs to submit, e.g.
+            the next run of a chain that starts from this run's solution.
+            Default is None.
+        retry       = (optional) function retry(name, state, return code,
+            output directory) called for every finished attempt of a job,
+            returning the seconds to wait before submitting the job again,
+            or None to accept the attempt (e.g. RunManifest.retry()). A job
+            is escalated (see escalate() of the cluster backends) before it
+            is submitted again. Default is None (no retries).
+
+    OUTPUTS:
+        generator of (name, state, return code, output directory) of the
+        accepted attempt of each job, in the order the jobs finish. A job is
+        released when the generator moves on to the next job. If the
+        generator is closed early, the unfinished jobs are cancelled.
+    """
+
+    import time
+
+    if interval is None: interval = backend.interval
+    start = time.time()
+    submit_jobs(backend, jobs)
+    name2Job = dict((job[0], job) for job in jobs)
+    left = set(name2Job.keys())
+    waiting = [] # (time to submit, job) of jobs to retry
+    finished = 0
+    try:
+        while len(left) > 0:
+
+            # submit the retries that are due
+            due = [job for t, job in waiting if t <= time.time()]
+            if len(due) > 0:
+                waiting = [(t, job) for t, job in waiting if t > time.time()]
+                for job in due:
+                    if hasattr(backend, 'escalate'): backend.escalate(job[0])
+                    backend.submit(*job)
+
+            states = backend.poll()
+            ended = [
+                name for name in left
+                if (name in states) and (states[name][0] in JOB_END)
+            ]
+            if len(ended) == 0:
+                time.sleep(interval)
+                continue
+            for name in ended:
+                code, workdir = backend.collect(name)
+                if retry is not None:
+                    delay = retry(name, states[name][0], code, workdir)
+                    if delay is not None:
+                        backend.release(name)
+                        waiting.append((time.time() + delay, name2Job[name]))
+                        continue
+                left.discard(name)
+                finished += 1
+                if follow is not None:
+                    more = follow(name, states[name][0], code, workdir)
+                    if len(more) > 0:
+                        submit_jobs(backend, more)
+                        left.update(job[0] for job in more)
+                        name2Job.update((job[0], job) for job in more)
+                try: yield (name, states[name][0], code, workdir)
+                finally: backend.release(name)
+    finally:
+        waitingNames = set(job[0] for t, job in waiting)
+        running = [name for name in left if name not in waitingNames]
+        if len(running) > 0: backend.cancel(running)
+        print throughput(backend.name, finished, time.time() - start)
+
+
+
+# ~~ submit_jobs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def submit_jobs(backend, jobs):
+    """
+    SUBMIT_JOBS() submits jobs to a backend without waiting for them, and
+    returns the ids given by the backend. Backends that can submit many jobs
+    at once (e.g. CondorBackend.submit_all()) are given all the jobs
+    together.
+    """
+    if hasattr(backend, 'submit_all'): return backend.submit_all(jobs)
+    return [backend.submit(name, command, inputs) for name, command, inputs in jobs]
+
+
+
+# ~~ throughput() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def throughput(name, jobs, seconds):
+    """
+    THROUGHPUT() formats the number of jobs a backend finished in a time as
+    a message on jobs per hour
+    """
+    seconds = max(seconds, 1e-9)
+    return 'Backend %s finished %i jobs in %.1f s (%.1f jobs/hour).' % (
+        name, jobs, seconds, 3600.*jobs/seconds
+    )
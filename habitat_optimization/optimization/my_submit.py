@@ -1,48 +1,42 @@
 #!/usr/bin/python
 
 # imports
-from glob import glob
-import os, shutil, subprocess
+import os, sys
+from run_gams import run, RUN_RAC
+from job_backends import CondorBackend, JOB_CND_NCH
+from run_manifest import RMF_FIL
 
 # inputs/constants
 GDX_LOC = '../gdxs'
 RUN_LOC = '../runs'
-GDX_SCH = '*.gdx'
-RUN_DIR_PRE = 'run_%i'
+STO_LOC = '../store' # one copy of each input, by content hash
+RES_FIL = '../results/results.csv'
 DEF_PRE = 'data_all'
 RUN_PRE = 'data_run'
 GMS_FIL = 'Habitat_Opt.gms'
-CND_FIL = 'condor_gams_submit' 
+WAIT = '--wait' in sys.argv[1:] # stay to collect the results into RES_FIL
+PACK = 1 # runs per Condor job, e.g. --pack 10 for many short runs
+if '--pack' in sys.argv[1:]: PACK = int(sys.argv[sys.argv.index('--pack') + 1])
+NODE_CACHE = None # with --node-cache, nodes read shared inputs from STO_LOC
+if '--node-cache' in sys.argv[1:]: NODE_CACHE = JOB_CND_NCH
+MAN_FIL = os.path.join(RUN_LOC, RMF_FIL) # status, attempts and results of each run
+RESUME = '--resume' in sys.argv[1:] # skip the runs MAN_FIL has results for
+RACE = None # with --race, Gurobi and CPLEX race on each run (give them the CPUs of both)
+if '--race' in sys.argv[1:]: RACE = RUN_RAC
+SOLVER = None # e.g. --solver cplex, or --solver auto for the solver that won the most races
+if '--solver' in sys.argv[1:]: SOLVER = sys.argv[sys.argv.index('--solver') + 1]
+PLATEAU = None # e.g. --plateau 900,0.001 stops solves closing less than 0.1% of gap in 15 minutes
+if '--plateau' in sys.argv[1:]:
+    PLATEAU = tuple(float(v) for v in sys.argv[sys.argv.index('--plateau') + 1].split(','))
 
-# short function to get run number from run gdx file name
-gdx2run = lambda s: int(os.path.basename(s).split('.')[0][len(RUN_PRE):])
-
-# loop over runs, creating and submitting a job for each one
-gdxs = glob(os.path.join(GDX_LOC, GDX_SCH))
-defGDX = [gdx for gdx in gdxs if os.path.basename(gdx).startswith(DEF_PRE)][0]
-runGDXs = [gdx for gdx in gdxs if gdx <> defGDX]
-homeDir = os.path.abspath('.')
-for gdx in runGDXs:
-    
-    # copy run files to run directory
-    run = gdx2run(gdx)
-    runDir = os.path.join(RUN_LOC, RUN_DIR_PRE % run)
-    if not os.path.exists(runDir): os.makedirs(runDir)
-    submitFiles = [CND_FIL, defGDX, gdx, GMS_FIL]
-    for f in submitFiles: shutil.copy2(f, runDir)
-    
-    # create the run file to be passed to condor_gams_submit
-    runFile = os.path.join(runDir, 'res.run')
-    baseNames = tuple([os.path.basename(f) for f in (GMS_FIL, defGDX, gdx)])
-    with open(runFile, 'w') as fh:
-        fh.write('hostname\n')
-        fh.write("echo 'pwd'\n")
-        fh.write('gams %s --defaultgdx=%s --rungdx=%s' % baseNames)
-        
-    # submit the job
-    os.chdir(runDir)
-    submitName = os.path.basename(CND_FIL)
-    subprocess.call(['chmod', '777', submitName])
-    callStr = ['./%s' % submitName, 'res.run' , '%s' % ','.join(baseNames), str(run)]
-    subprocess.call(callStr)
-    os.chdir(homeDir)
\ No newline at end of file
+# submit the run GDXs (and the scenario GDX, if any) as one Condor cluster,
+#   queued from a run list, with PACK runs in each job. Each run gets its own
+#   directory in RUN_LOC and Condor transfers the stored copies of its inputs.
+#   Request CPUs with $REQUEST_CPUS. With --wait, failed runs are submitted
+#   again with twice the CPUs and hours (see run_manifest.py)
+backend = CondorBackend(RUN_LOC, pack=PACK, store=STO_LOC, nodeCache=NODE_CACHE)
+if WAIT and not os.path.exists(os.path.dirname(RES_FIL)): os.makedirs(os.path.dirname(RES_FIL))
+run(
+    GDX_LOC, RES_FIL, DEF_PRE, RUN_PRE, GMS_FIL, backend=backend, wait=WAIT,
+    manifest=MAN_FIL, resume=RESUME, race=RACE, solver=SOLVER, plateau=PLATEAU
+)
\ No newline at end of file
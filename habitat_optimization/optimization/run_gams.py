@@ -1,18 +1,419 @@
 import sys
 sys.path = ['../data_processing'] + sys.path
-from make_gdx import MAK_DEF_DDN, MAK_DEF_RDN
+from make_gdx import MAK_DEF_DDN, MAK_DEF_RDN, MAK_DEF_SDN, SCN_SET
+from gams_runner import GRN_RAC_FLG, GRN_PLT_FLG
 
 # run()
 RUN_EXT_GDX = '.gdx'
 RUN_EXT_CSV = '.csv'
 RUN_GMS = 'Habitat_Opt.gms'
+RUN_GMS_DMN = 'Habitat_Opt_Domains.gms' # needs GDXs made with active domains
+RUN_GMS_INC = ( # included by the models (model body and solves, and Habitat_Opt.gms by Habitat_Opt_Domains.gms)
+    RUN_GMS, 'Habitat_Opt_Model.gms', 'Habitat_Opt_Solve.gms'
+)
+RUN_GMS_SCN = 'Habitat_Opt_Scenarios.gms' # solves the scenario GDX
 RUN_GRF = 'data_run.gdx'
 RUN_GDF = 'data_all.gdx'
 RUN_GOF = 'results.gdx'
+RUN_DEF_WRK = None # GAMS processes at once, None to size from the .opt files
+RUN_DEF_WAT = True
+RUN_DEF_WST = False
+RUN_DEF_RES = False
+RUN_DEF_SCH = True
+RUN_DEF_LIM = None # no time limits from the schedule (see run_schedule.plan_jobs())
+
+# warm starts (see chain_runs())
+RUN_STA_SYM = 'startActions' # start point read by the models with --startgdx
+RUN_STA_FLG = 'startgdx'
+RUN_STA_PRE = 'start_'
+RUN_SYM_ACT = 'actions' # actions done, in the results GDX
+RUN_SYM_CST = 'cost'
+RUN_SYM_BUD = 'budget'
+RUN_SYM_P2B = 'ProjectToBudget'
+RUN_SYM_CAN = 'isCandidate'
+RUN_SYM_CAP = 'cap' # network symbols checked by start_caps()
+RUN_SYM_DWN = 'Downstream'
+RUN_SYM_ROO = 'isRoot'
+RUN_SYM_T2G = 'TargetToGuild'
+RUN_SYM_GBN = 'GuildsBeneficiary'
+RUN_SYM_GCT = 'GuildsControl'
+RUN_SYM_PPS = 'ProjectsPassability'
+RUN_SYM_PBN = 'ProjectsBenefit'
+RUN_SYM_PSB = 'passBase'
+RUN_SYM_PSC = 'passChange'
+RUN_SYM_BMB = 'benefitMaxBase'
+RUN_SYM_BMC = 'benefitMaxChange'
+RUN_SYM_NET = (
+    RUN_SYM_CAP, RUN_SYM_DWN, RUN_SYM_ROO, RUN_SYM_T2G, RUN_SYM_GBN, RUN_SYM_GCT,
+    RUN_SYM_PPS, RUN_SYM_PBN, RUN_SYM_PSB, RUN_SYM_PSC, RUN_SYM_BMB, RUN_SYM_BMC
+)
+RUN_TOL = 1e-9
+
+# gams_jobs(), solver_threads()
+RUN_OPT = ('gurobi.opt', 'cplex.opt') # solver option files read by the models
+RUN_OPT_THR = 'threads'
+RUN_GMS_LOG = 'lo=4' # log to the screen and <model>.log (see solver_telemetry.py)
+
+# solver races (see gams_runner.py)
+RUN_DEF_RAC = None
+RUN_RAC = ('gurobi', 'cplex')
+RUN_DEF_SLV = None # solve with the models' own sequence of solvers
+RUN_SLV_AUT = 'auto' # solve with the solver that won the most races
+RUN_SLV_FLG = 'solver'
+RUN_PYT = 'python' # default Python 2 interpreter that runs gams_runner.py where the jobs run
+RUN_RNR = 'gams_runner.py'
+RUN_TEL = 'solver_telemetry.py'
+RUN_DEF_PLT = None # (window seconds, gap to close per window) to stop stalled solves
+
+
+# ~~ solver_threads() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def solver_threads(optdir):
+    """
+    SOLVER_THREADS() returns the largest number of threads given to a solver
+    (e.g. 'threads 4') in the RUN_OPT files of [optdir], or 1 if none is set
+    """
+    import os
+    threads = 1
+    for name in RUN_OPT:
+        path = os.path.join(optdir, name)
+        if not os.path.exists(path): continue
+        with open(path, 'r') as fh:
+            for line in fh:
+                words = line.split()
+                if (len(words) >= 2) and (words[0].lower() == RUN_OPT_THR):
+                    try: threads = max(threads, int(words[1]))
+                    except ValueError: pass
+    return threads
+
+
+
+# ~~ default_workers() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def default_workers(optdir):
+    """
+    DEFAULT_WORKERS() returns how many GAMS processes to run at once so that
+    the solver threads of all of them fit on the CPUs of this machine
+    """
+    import multiprocessing
+    try: cpus = multiprocessing.cpu_count()
+    except NotImplementedError: cpus = 1
+    return max(1, cpus // solver_threads(optdir))
+
+
+
+# ~~ gams_jobs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def gams_jobs(
+    indir, defGDXStr=MAK_DEF_DDN, runGDXStr=MAK_DEF_RDN, gms=RUN_GMS,
+    scenGDXStr=MAK_DEF_SDN, race=RUN_DEF_RAC, solver=RUN_DEF_SLV,
+    plateau=RUN_DEF_PLT, python=RUN_PYT
+):
+    """
+    GAMS_JOBS() finds the GDXs made by make_gdx in [indir] and builds a job
+    (see job_backends.py) to solve each run GDX and the scenario GDX, if
+    any. Inputs of run() have the same meaning here.
+    
+    OUTPUTS:
+        (jobs, defGDX, runGDXs, scenGDXs) where jobs is a list of (name,
+        command, inputs), run GDXs first, with names taken from the GDX file
+        names
+    """
+    
+    from glob import glob
+    import os
+    
+    # get input gdxs and identify default gdx
+    defGDXs = [os.path.abspath(f) for f in glob(os.path.join(indir, defGDXStr + '*%s' % RUN_EXT_GDX))]
+    assert len(defGDXs) == 1, 'Unable to determine which GDX is the default.'
+    defGDX = defGDXs[0]
+    runGDXs = [os.path.abspath(f) for f in glob(os.path.join(indir, runGDXStr + '*%s' % RUN_EXT_GDX))]
+    scenGDXs = [os.path.abspath(f) for f in glob(os.path.join(indir, scenGDXStr + RUN_EXT_GDX))]
+    
+    # jobs run in a directory holding their inputs, so the command refers to
+    #   them by base name
+    thisdir = os.path.abspath(os.path.dirname(__file__))
+    optFiles = [os.path.join(thisdir, f) for f in RUN_OPT if os.path.exists(os.path.join(thisdir, f))]
+    jobs = []
+    for gdx, model, flag in (
+        [(gdx, gms, 'rungdx') for gdx in runGDXs] +
+        [(gdx, RUN_GMS_SCN, 'scengdx') for gdx in scenGDXs]
+    ):
+        inputs = [os.path.join(thisdir, f) for f in [model] + [f for f in RUN_GMS_INC if f <> model]]
+        inputs += [defGDX, gdx] + optFiles
+        command = 'gams %s %s --defaultgdx "%s" --%s "%s"' % (
+            model, RUN_GMS_LOG, os.path.basename(defGDX), flag, os.path.basename(gdx)
+        )
+        
+        # runs may be raced between solvers (see gams_runner.py), or solved
+        #   by a single solver, and watched for gap plateaus. Scenarios share
+        #   the solves of the runs (Habitat_Opt_Solve.gms) and take a single
+        #   solver too, but a GapWatch stops one solve per job, so only runs
+        #   are raced or watched
+        runner = []
+        if (flag == 'rungdx') and (race is not None) and (len(race) > 0):
+            runner += [GRN_RAC_FLG, ','.join(race)]
+        elif solver is not None:
+            command += ' --%s %s' % (RUN_SLV_FLG, solver)
+        if (flag == 'rungdx') and (plateau is not None):
+            runner += [GRN_PLT_FLG, '%g,%g' % tuple(plateau)]
+        if len(runner) > 0:
+            command = '%s %s %s %s' % (python, RUN_RNR, ' '.join(runner), command)
+            inputs += [os.path.join(thisdir, f) for f in (RUN_RNR, RUN_TEL)]
+        jobs.append((os.path.basename(gdx).split('.', 1)[0], command, inputs))
+    return (jobs, defGDX, runGDXs, scenGDXs)
+    
+    
+
+# ~~ run_records() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def run_records(gdxs, names):
+    """
+    RUN_RECORDS() reads symbols of a run as the model sees them, i.e. the
+    records of the default GDX overlaid with those of the run GDX (as with
+    $load followed by $loadm)
+    
+    INPUTS:
+        gdxs        = list of GDXs (or lists of gdx_io.Symbol already read
+            from them), in the order they are loaded
+        names       = names of the symbols to read
+        
+    OUTPUTS:
+        {symbol name: {tuple of keys: value}}
+    """
+    from gdx_io import read_gdx
+    records = dict((name, {}) for name in names)
+    for gdx in gdxs:
+        if isinstance(gdx, basestring): gdx = read_gdx(gdx)
+        for symbol in gdx:
+            if symbol.name not in records: continue
+            for keys, value in symbol.records(): records[symbol.name][tuple(keys)] = value
+    return records
+
+
+
+# ~~ start_actions() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def start_actions(actions, records):
+    """
+    START_ACTIONS() projects the actions of an earlier solution onto a run,
+    to give a start point that is feasible for the run's budgets. Actions
+    that are not candidates of the run are dropped, then the most expensive
+    actions drawing from an overspent budget are dropped until no budget is
+    overspent.
+    
+    INPUTS:
+        actions     = list of (barrier, project) done in the earlier solution
+        records     = run data, as from run_records() with RUN_SYM_CST,
+            RUN_SYM_BUD, RUN_SYM_P2B and RUN_SYM_CAN
+    
+    OUTPUTS:
+        list of (barrier, project) to start from
+    """
+    
+    cost = records[RUN_SYM_CST]
+    budget = dict((k[0], v) for k, v in records[RUN_SYM_BUD].iteritems())
+    draws = {}
+    for p, b in records[RUN_SYM_P2B]: draws.setdefault(p, []).append(b)
+    
+    # keep candidates and total what they spend from each budget
+    keep = set(a for a in actions if records[RUN_SYM_CAN].get(a, 0) <> 0)
+    spent = dict((b, 0.) for b in budget)
+    for a in keep:
+        for b in draws.get(a[1], []): spent[b] = spent.get(b, 0.) + cost.get(a, 0.)
+    
+    # drop the most expensive actions until the budgets are met
+    over = lambda: set(b for b in spent if spent[b] > budget.get(b, 0.) + RUN_TOL)
+    for a in sorted(keep, key=lambda a: -cost.get(a, 0.)):
+        overspent = over()
+        if len(overspent) == 0: break
+        if overspent.isdisjoint(draws.get(a[1], [])): continue
+        keep.remove(a)
+        for b in draws.get(a[1], []): spent[b] -= cost.get(a, 0.)
+    return sorted(keep)
+
+
+
+# ~~ start_caps() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def start_caps(actions, records):
+    """
+    START_CAPS() checks that a start point meets the caps of a run, i.e. the
+    minimum accessibility-weighted benefit of beneficiary targets (cn_cap_GB)
+    and the maximum of control targets (cn_cap_GC). Passabilities and
+    benefits are traced up the network as the models do, with the products
+    of actions and cumulative passabilities taken exactly, so a start that
+    passes is feasible (one that fails may still be, but is not used).
+    
+    INPUTS:
+        actions     = list of (barrier, project) to start from
+        records     = run data, as from run_records() with RUN_SYM_NET
+    
+    OUTPUTS:
+        list of (target, guild) whose cap is not met
+    """
+    
+    act = set(actions)
+    guilds = set(g for t, g in records[RUN_SYM_T2G])
+    downstream = dict(records[RUN_SYM_DWN].keys())
+    root = set(k[0] for k, v in records[RUN_SYM_ROO].iteritems() if v <> 0)
+    passProj = set(k[0] for k in records[RUN_SYM_PPS])
+    benProj = set(k[0] for k in records[RUN_SYM_PBN])
+    base = records[RUN_SYM_PSB]
+    change = {}
+    for (j, p, g), v in records[RUN_SYM_PSC].iteritems():
+        if (p in passProj) and ((j, p) in act): change[(j, g)] = change.get((j, g), 0.) + v
+    
+    # cumulative passabilities, walking down to a known barrier (or a root)
+    #   and back up, as networks may be too deep to recurse
+    cumPass = {}
+    def trace(j):
+        path = [j]
+        while (path[-1] not in cumPass) and (path[-1] not in root) and (path[-1] in downstream):
+            path.append(downstream[path[-1]])
+        for k in reversed(path):
+            if k in cumPass: continue
+            below = downstream.get(k) if k not in root else None
+            for g in guilds:
+                if below is None: pk = base.get((k, g), 0.) + change.get((k, g), 0.)
+                else: pk = (base.get((k, g), 0.) + change.get((k, g), 0.)) * cumPass[below][g]
+                cumPass.setdefault(k, {})[g] = pk
+        return cumPass[j]
+    
+    # accessibility-weighted benefit of each target, summed over barriers
+    total = {}
+    for (j, t), v in records[RUN_SYM_BMB].iteritems():
+        total.setdefault(t, []).append((j, v))
+    for (j, p, t), v in records[RUN_SYM_BMC].iteritems():
+        if (p in benProj) and ((j, p) in act): total.setdefault(t, []).append((j, v))
+    benefit = {}
+    for t, g in records[RUN_SYM_T2G]:
+        benefit[t] = benefit.get(t, 0.) + sum(v * trace(j)[g] for j, v in total.get(t, []))
+    
+    # compare with the caps
+    cap = dict((k[0], v) for k, v in records[RUN_SYM_CAP].iteritems())
+    beneficiary = set(k[0] for k in records[RUN_SYM_GBN])
+    control = set(k[0] for k in records[RUN_SYM_GCT])
+    unmet = []
+    for t, g in sorted(records[RUN_SYM_T2G]):
+        c = cap.get(t, 0.)
+        tol = RUN_TOL * max(1., abs(c))
+        if (g in beneficiary) and (benefit[t] < c - tol): unmet.append((t, g))
+        elif (g in control) and (benefit[t] > c + tol): unmet.append((t, g))
+    return unmet
+
+
+
+# ~~ write_start() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def write_start(actions, outname):
+    """
+    WRITE_START() writes the start point GDX (RUN_STA_SYM) read by the models
+    with --startgdx, and returns its path
+    """
+    import numpy
+    from gdx_io import Symbol, get_backend, GIO_KND_PAR, GIO_BCK_GMS
+    keys = numpy.array(actions, dtype=str).reshape((-1, 2))
+    symbol = Symbol(RUN_STA_SYM, GIO_KND_PAR, 2, keys, numpy.ones(len(keys)))
+    return get_backend(GIO_BCK_GMS).write([symbol], outname)
+
+
+
+# ~~ chain_runs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def chain_runs(jobs, defGDX, runGDXs, chains, startdir):
+    """
+    CHAIN_RUNS() sets up warm starts across a sweep of runs. The runs are
+    ordered by their total budget and split into [chains] chains of
+    neighboring runs. The first run of each chain starts cold, and each
+    later run starts from the previous run's actions, made feasible for its
+    budgets (see start_actions()). A start that does not meet the caps of
+    its run is not used (see start_caps()), and the run starts cold.
+    
+    INPUTS:
+        jobs        = jobs of the run GDXs, as from gams_jobs()
+        defGDX      = default GDX
+        runGDXs     = run GDXs, in the order of jobs
+        chains      = number of chains (i.e. runs solved at once)
+        startdir    = directory in which to write the start point GDXs
+    
+    OUTPUTS:
+        (first jobs, follow) where follow is the function to give to
+        job_backends.run_jobs() to submit the next run of a chain when a
+        run finishes
+    """
+    
+    import os
+    from gdx_io import read_gdx
+    
+    # order the runs along the sweep
+    names = (RUN_SYM_CST, RUN_SYM_BUD, RUN_SYM_P2B, RUN_SYM_CAN) + RUN_SYM_NET
+    default = read_gdx(defGDX)
+    budgets = []
+    for i in xrange(len(jobs)):
+        budget = run_records([default, runGDXs[i]], [RUN_SYM_BUD])[RUN_SYM_BUD]
+        budgets.append((sum(budget.values()), jobs[i][0]))
+    name2Job = dict((job[0], job) for job in jobs)
+    name2GDX = dict((jobs[i][0], runGDXs[i]) for i in xrange(len(jobs)))
+    order = [name for b, name in sorted(budgets)]
+    
+    # split into chains of neighbors
+    chains = max(1, min(chains, len(order)))
+    size = -(-len(order) // chains)
+    successor = {}
+    first = []
+    for i in xrange(0, len(order), size):
+        chain = order[i:i+size]
+        first.append(name2Job[chain[0]])
+        for j in xrange(len(chain)-1): successor[chain[j]] = chain[j+1]
+    print 'Warm-starting %i runs in %i chains.' % (len(order), len(first))
+    
+    # start the next run of a chain from the finished run's actions
+    def follow(name, state, code, workdir):
+        if name not in successor: return []
+        nextName, command, inputs = name2Job[successor[name]]
+        results = os.path.join(workdir, RUN_GOF)
+        if (code <> 0) or (not os.path.exists(results)): return [(nextName, command, inputs)]
+        actions = [s for s in read_gdx(results) if s.name == RUN_SYM_ACT]
+        if len(actions) == 0: return [(nextName, command, inputs)]
+        actions = [tuple(k) for k in actions[0].keys.tolist()]
+        records = run_records([default, name2GDX[nextName]], names)
+        actions = start_actions(actions, records)
+        unmet = start_caps(actions, records)
+        if len(unmet) > 0:
+            print 'Not warm-starting %s: caps of %i target(s) not met.' % (nextName, len(unmet))
+            return [(nextName, command, inputs)]
+        start = write_start(actions, os.path.join(startdir, RUN_STA_PRE + nextName))
+        command += ' --%s "%s"' % (RUN_STA_FLG, os.path.basename(start))
+        return [(nextName, command, inputs + [start])]
+    
+    return (first, follow)
+    
+    
+
+# ~~ results_csvs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def results_csvs(gamsOutGDX, name, gdx, scenGDXs, runGDXStr, outdir):
+    """
+    RESULTS_CSVS() converts the results GDX of a GAMS job to CSV, one per
+    scenario for the scenario GDX, and returns the list of CSVs made in
+    [outdir]
+    """
+    from gdx_to_csv import gdx_to_csv, scenarios_to_csvs
+    from gdx_io import read_gdx
+    import os
+    if gdx in scenGDXs:
+        scenarios = [s for s in read_gdx(gdx) if s.name == SCN_SET][0].keys[:,0]
+        outCSVs = dict(
+            (scenario, os.path.join(outdir, runGDXStr + scenario + RUN_EXT_CSV))
+            for scenario in scenarios
+        )
+        return scenarios_to_csvs(gamsOutGDX, outCSVs)
+    outCSV = os.path.join(outdir, name + RUN_EXT_CSV)
+    gdx_to_csv(gamsOutGDX, outCSV)
+    return [outCSV]
+
 
 
 # ~~ run() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-def run(indir, outfile, defGDXStr=MAK_DEF_DDN, runGDXStr=MAK_DEF_RDN):
+def run(
+    indir, outfile, defGDXStr=MAK_DEF_DDN, runGDXStr=MAK_DEF_RDN, gms=RUN_GMS,
+    scenGDXStr=MAK_DEF_SDN, workers=RUN_DEF_WRK, backend=None, wait=RUN_DEF_WAT,
+    warmStart=RUN_DEF_WST, manifest=None, resume=RUN_DEF_RES,
+    schedule=RUN_DEF_SCH, race=RUN_DEF_RAC, solver=RUN_DEF_SLV,
+    plateau=RUN_DEF_PLT, timeLimits=RUN_DEF_LIM, python=RUN_PYT
+):
     """
     RUN() runs a series of GAMS models, substituting the current run GDX in
     each run and outputting the results to a CSV.
@@ -24,51 +425,193 @@ def run(indir, outfile, defGDXStr=MAK_DEF_DDN, runGDXStr=MAK_DEF_RDN):
             [workingDir]. Default is take from make_gdx
         runGDXStr   = (optional) name prefix (without extension) of
             run-specific GDXs. Default is taken from make_gdx.
+        gms         = (optional) GAMS model file to run, e.g. RUN_GMS_DMN for
+            GDXs made by make_gdx with active-domain sets. Default is RUN_GMS.
+        scenGDXStr  = (optional) name (without extension) of the scenario GDX
+            made by make_gdx, if any. Its scenarios are solved in a single
+            GAMS call of RUN_GMS_SCN, and their results are reported as if
+            each had been a run GDX. Default is taken from make_gdx.
+        workers     = (optional) number of GAMS processes to run at once when
+            no backend is given. Default is RUN_DEF_WRK, which fits the
+            solver threads set in the RUN_OPT files to the CPUs of this
+            machine (see default_workers()).
+        backend     = (optional) job backend instance to run the models with
+            (see job_backends.py), e.g. a CondorBackend. Results are
+            converted to CSV as each job finishes. Default is None, which
+            runs the models on this machine, each in its own scratch
+            directory, with [workers] at a time.
+        wait        = (optional) if False, the jobs are submitted and run()
+            returns without waiting for them (e.g. to leave jobs on a
+            cluster queue). Default is RUN_DEF_WAT.
+        warmStart   = (optional) if True, the runs are ordered by budget and
+            solved in [workers] chains, each run starting from the previous
+            run's solution (see chain_runs()). Needs wait to be True.
+            Default is RUN_DEF_WST.
+        manifest    = (optional) RunManifest, or path of its database, that
+            records each run's input hash, status, attempts, host and kept
+            results (see run_manifest.py). Failed runs are retried after a
+            backoff with an escalated resource request (when wait is True).
+            Default is None (no manifest).
+        resume      = (optional) if True, runs the manifest records as done
+            with the same inputs are not run again, and their kept results
+            are used instead. If False, every run is solved again. Default
+            is RUN_DEF_RES.
+        schedule    = (optional) if True, the runs are submitted longest
+            predicted run time first, from the size features make_gdx wrote
+            to [indir] and the run times in the manifest's history (see
+            run_schedule.py). Default is RUN_DEF_SCH.
+        race        = (optional) names of the solvers to race on each run
+            GDX, e.g. RUN_RAC. Each run is solved by all of them at once
+            (with the --solver option of the model), the first to reach
+            optcr wins and the others are stopped (see gams_runner.py).
+            The winner is recorded in the manifest. A raced run needs the
+            CPUs of all its solvers, so [workers] defaults to fewer jobs,
+            and backends that request CPUs per job (see job_backends.py)
+            request them for each solver.
+            Default is RUN_DEF_RAC (no races).
+        solver      = (optional) single solver to solve each run GDX (and
+            each scenario) with when runs are not raced, or RUN_SLV_AUT for
+            the solver that won the most races in the manifest's history.
+            Default is RUN_DEF_SLV, which solves with the model's own
+            sequence of solvers.
+        plateau     = (optional) (window seconds, rate) to stop a solve of a
+            run GDX whose relative gap closes by less than rate over window
+            seconds. The solver keeps its incumbent, the model skips its
+            remaining solves and the reason is recorded in the manifest
+            (see gams_runner.py). Jobs run on this machine need a POSIX
+            system for it. Default is RUN_DEF_PLT (no stops).
+        timeLimits  = (optional) with schedule, time limit of a run as a
+            multiple of its predicted run time, given to backends that take
+            time limits (see job_backends.py) for each run whose time could
+            be predicted. Limits are never shorter than the reslim of all
+            the model's solves. Default is RUN_DEF_LIM (no limits).
+        python      = (optional) command of the Python 2 interpreter that
+            runs gams_runner.py for races and plateau stops where the jobs
+            run, e.g. a full path on cluster nodes. Default is RUN_PYT.
         
     OUTPUTS:
-        series of run result CSV file paths
+        series of run result CSV file paths, or None if wait is False
     """
     
     # imports
-    from glob import glob
-    from gdx_to_csv import gdx_to_csv, concatenate_csvs
-    import os, shutil, subprocess
+    from gdx_to_csv import concatenate_csvs
+    from job_backends import LocalBackend, run_jobs, submit_jobs, JOB_STA_CAN, JOB_BCK_LOC
+    from run_manifest import RunManifest
+    from run_schedule import plan_jobs
+    from make_gdx import read_features
+    import os, shutil, tempfile
     
-    # get input gdxs and identify default gdx
-    defGDXs = [os.path.abspath(f) for f in glob(os.path.join(indir, defGDXStr + '*%s' % RUN_EXT_GDX))]
-    assert len(defGDXs) == 1, 'Unable to determine which GDX is the default.'
-    defGDX = defGDXs[0]
-    runGDXs = [os.path.abspath(f) for f in glob(os.path.join(indir, runGDXStr + '*%s' % RUN_EXT_GDX))]
+    # plateau stops interrupt GAMS where the jobs run (see gams_runner.py),
+    #   which cluster nodes can do but other systems than POSIX can not
+    if (plateau is not None) and (os.name <> 'posix') and ((backend is None) or (backend.name == JOB_BCK_LOC)):
+        raise ValueError('plateau stops need a POSIX system to run the jobs on, not %s.' % os.name)
+    
+    # route the runs to the solver that won the most races
+    ownManifest = isinstance(manifest, basestring)
+    if ownManifest: manifest = RunManifest(manifest, results=RUN_GOF)
+    if solver == RUN_SLV_AUT:
+        wins = manifest.winners() if manifest is not None else {}
+        if len(wins) > 0: solver = max(wins, key=wins.get)
+        else: solver = None
+        print 'Solving with %s.' % (solver or 'the model\'s solvers')
     
     # set up for runs
+    jobs, defGDX, runGDXs, scenGDXs = gams_jobs(
+        indir, defGDXStr, runGDXStr, gms, scenGDXStr, race, solver, plateau,
+        python
+    )
+    name2GDX = dict(zip([job[0] for job in jobs], runGDXs + scenGDXs))
     thisdir = os.path.abspath(os.path.dirname(__file__))
-    gamsOutGDX = os.path.join(thisdir, RUN_GOF)
     tempFiles = set()
+    gdxCSVs = {}
+    features = read_features(indir)
+    features = dict(
+        (job[0], features[os.path.basename(name2GDX[job[0]])]) for job in jobs
+        if os.path.basename(name2GDX[job[0]]) in features
+    )
+    
+    # skip the runs the manifest has results for
+    retry = None
+    hashes = None
+    history = []
+    if manifest is not None:
+        hashes = dict((job[0], manifest.job_hash(job)) for job in jobs)
+        left = []
+        for job in jobs:
+            kept = manifest.completed(job[0], hashes[job[0]]) if resume else None
+            if kept is None:
+                left.append(job)
+                continue
+            csvs = results_csvs(kept, job[0], name2GDX[job[0]], scenGDXs, runGDXStr, thisdir)
+            tempFiles.update(csvs)
+            gdxCSVs[name2GDX[job[0]]] = csvs
+        if len(left) < len(jobs):
+            print 'Skipping %i runs already done (see %s).' % (len(jobs) - len(left), manifest.path)
+        jobs = left
+        for job in jobs: manifest.submitted(job[0], hashes[job[0]], features.get(job[0], None))
+        retry = manifest.retry
+        history = manifest.history()
+    
+    if (workers is None) and (race is not None) and (len(race) > 0):
+        workers = max(1, default_workers(thisdir) // len(race))
+    if backend is None:
+        if workers is None: workers = default_workers(thisdir)
+        backend = LocalBackend(workers)
+        print 'Running %i GAMS jobs, %i at a time.' % (len(jobs), workers)
+    if (race is not None) and (len(race) > 0) and hasattr(backend, 'scale'):
+        for job in jobs:
+            if name2GDX[job[0]] in runGDXs: backend.scale(job[0], len(race))
+    
+    # longest runs first, with any time limits fit to their predicted run
+    #   times
+    if schedule:
+        jobs, limits = plan_jobs(jobs, features, hashes, history, timeLimits)
+        if hasattr(backend, 'limit'):
+            for name in limits: backend.limit(name, limits[name])
+    if not wait:
+        ids = submit_jobs(backend, jobs)
+        print 'Submitted %i GAMS jobs to %s.' % (len(ids), backend.name)
+        if ownManifest: manifest.close()
+        return None
+    
+    # chain the runs of a sweep so that each starts from its neighbor's
+    #   solution
+    follow = None
+    startdir = None
+    runJobs = [job for job in jobs if name2GDX[job[0]] in runGDXs]
+    if warmStart and (len(runJobs) > 1):
+        if workers is None: workers = default_workers(thisdir)
+        startdir = tempfile.mkdtemp()
+        first, follow = chain_runs(
+            runJobs, defGDX, [name2GDX[job[0]] for job in runJobs], workers, startdir
+        )
+        rank = dict((jobs[i][0], i) for i in xrange(len(jobs)))
+        jobs = first + [job for job in jobs if name2GDX[job[0]] not in runGDXs]
+        jobs.sort(key=lambda job: rank[job[0]])
     
     try:
         
-        # run GAMS and output results
-        csvs = []
-        for gdx in runGDXs:
-            
-            # run the model
-            subprocess.call(
-                'gams %s --defaultgdx "%s" --rungdx "%s"' % (RUN_GMS, defGDX, gdx)
-            )
-            
-            # convert results to CSV
-            outCSV = os.path.join(thisdir, os.path.basename(gdx).split('.', 1)[0] + RUN_EXT_CSV)
-            gdx_to_csv(gamsOutGDX, outCSV)
-            tempFiles.add(gamsOutGDX)
-            tempFiles.add(outCSV)
-            csvs.append(outCSV)
+        # convert the results of each run to CSV as it finishes
+        for name, state, code, workdir in run_jobs(backend, jobs, follow=follow, retry=retry):
+            gdx = name2GDX[name]
+            gamsOutGDX = os.path.join(workdir, RUN_GOF)
+            if (state == JOB_STA_CAN) or (code <> 0) or (not os.path.exists(gamsOutGDX)):
+                print 'GAMS wrote no results for %s (%s, return code %s).' % (gdx, state, code)
+                continue
+            csvs = results_csvs(gamsOutGDX, name, gdx, scenGDXs, runGDXStr, thisdir)
+            tempFiles.update(csvs)
+            gdxCSVs[gdx] = csvs
             
-        # concatenate csvs
+        # concatenate csvs, in the order of the gdxs
+        csvs = [f for gdx in runGDXs + scenGDXs for f in gdxCSVs.get(gdx, [])]
         concatenate_csvs(csvs, outfile)
         return outfile
             
     # delete temporary files
     finally:
+        backend.close()
+        if ownManifest: manifest.close()
+        if startdir is not None: shutil.rmtree(startdir, True)
         for f in tempFiles:
             try: os.remove(f)
             except: print 'Could not delete temporary file %s' % f
@@ -0,0 +1,297 @@
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+# Description:
+#       This script keeps a persistent manifest of GAMS runs (a SQLite
+#   database) for run_gams.run() and my_submit.py. For each run it records
+#   a hash of the run's inputs, its status, the number of attempts, the host
+#   it ran on, its return code and where its results GDX was kept. A sweep
+#   that was interrupted can then be resumed without solving the completed
+#   runs again, and runs that fail (or are removed by the cluster, e.g. when
+#   they pass threshold_hours) are retried after a backoff with a larger
+#   resource request (see job_backends.py). The solver telemetry of each
+#   attempt (see solver_telemetry.py) is kept in a second table, solves,
+#   and the run time of every run that succeeded in a third, history, which
+#   clear() keeps so that later sweeps can predict their run times. Runs
+#   stopped early on a gap plateau keep the reason in stop_reason.
+
+# RunManifest
+RMF_FIL = 'run_manifest.sqlite'
+RMF_OUT = 'results' # directory next to the manifest where results are kept
+RMF_DEF_TRY = 3 # attempts per run, including the first
+RMF_DEF_BCK = 60. # seconds before the first retry, doubled for each retry
+RMF_STA_SUB = 'submitted'
+RMF_STA_DON = 'done'
+RMF_STA_FAI = 'failed'
+RMF_COL = ( # columns of the runs table
+    ('name', 'TEXT PRIMARY KEY'),
+    ('input_hash', 'TEXT'),
+    ('status', 'TEXT'),
+    ('attempts', 'INTEGER'),
+    ('host', 'TEXT'),
+    ('code', 'INTEGER'),
+    ('output', 'TEXT'),
+    ('submitted', 'REAL'),
+    ('finished', 'REAL'),
+    ('features', 'TEXT'), # JSON of the run's size features (see make_gdx.run_features())
+    ('solver', 'TEXT'), # winner of the run's solver race (see gams_runner.py)
+    ('stop_reason', 'TEXT'), # why the solve was stopped early, if it was (see gams_runner.py)
+)
+RMF_HIS = ( # columns of the history table, kept across sweeps (see run_schedule.py)
+    ('input_hash', 'TEXT PRIMARY KEY'),
+    ('features', 'TEXT'),
+    ('seconds', 'REAL'),
+    ('finished', 'REAL'),
+    ('solver', 'TEXT'),
+)
+RMF_SOL = ( # columns of the solves table (see solver_telemetry.py)
+    ('name', 'TEXT'),
+    ('attempt', 'INTEGER'),
+    ('stage', 'INTEGER'),
+    ('solver', 'TEXT'),
+    ('solver_status', 'INTEGER'),
+    ('model_status', 'INTEGER'),
+    ('objective', 'REAL'),
+    ('best_bound', 'REAL'),
+    ('gap', 'REAL'),
+    ('solve_seconds', 'REAL'),
+    ('wall_seconds', 'REAL'),
+    ('generation_seconds', 'REAL'),
+    ('iterations', 'INTEGER'),
+    ('nodes', 'INTEGER'),
+    ('rows', 'INTEGER'),
+    ('columns', 'INTEGER'),
+    ('nonzeros', 'INTEGER'),
+    ('discrete', 'INTEGER'),
+    ('memory_mb', 'REAL'),
+)
+
+
+
+# ~~ RUNMANIFEST ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class RunManifest(object):
+    """
+    Manifest of GAMS runs stored in the SQLite database [path]. Results GDXs
+    of runs that succeed are copied to RMF_OUT next to the database, so they
+    are still there when the run is skipped on a later resume.
+
+    INPUTS:
+        path        = database file to open or create
+        tries       = (optional) attempts a run gets, including the first.
+            Default is RMF_DEF_TRY.
+        backoff     = (optional) seconds to wait before the first retry of a
+            run. The wait doubles for each later retry. Default is
+            RMF_DEF_BCK.
+        results     = (optional) name of the results GDX left by a run. Default
+            is 'results.gdx'.
+    """
+
+    def __init__(self, path=RMF_FIL, tries=RMF_DEF_TRY, backoff=RMF_DEF_BCK, results='results.gdx'):
+        import os, sqlite3
+        self.path = os.path.abspath(path)
+        self.tries = max(1, tries)
+        self.backoff = backoff
+        self.results = results
+        self.outdir = os.path.join(os.path.dirname(self.path), RMF_OUT)
+        if not os.path.exists(os.path.dirname(self.path)): os.makedirs(os.path.dirname(self.path))
+        self.store = None # hashes input files, see job_hash()
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS runs (%s)' % ', '.join(
+            '%s %s' % column for column in RMF_COL
+        ))
+        self.db.execute('CREATE TABLE IF NOT EXISTS solves (%s, PRIMARY KEY (name, attempt, stage))' % ', '.join(
+            '%s %s' % column for column in RMF_SOL
+        ))
+        self.db.execute('CREATE TABLE IF NOT EXISTS history (%s)' % ', '.join(
+            '%s %s' % column for column in RMF_HIS
+        ))
+
+        # add the columns of newer versions to an older database
+        for table, columns in (('runs', RMF_COL), ('solves', RMF_SOL), ('history', RMF_HIS)):
+            have = set(row[1] for row in self.db.execute('PRAGMA table_info(%s)' % table))
+            for name, kind in columns:
+                if name not in have: self.db.execute('ALTER TABLE %s ADD COLUMN %s %s' % (table, name, kind))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def clear(self):
+        """
+        CLEAR() forgets all runs (kept results are left on disk, and the
+        run times of the history table are kept)
+        """
+        self.db.execute('DELETE FROM runs')
+        self.db.execute('DELETE FROM solves')
+        self.db.commit()
+
+    def get(self, name):
+        """GET() returns the record of a run as a dictionary, or None."""
+        row = self.db.execute(
+            'SELECT %s FROM runs WHERE name = ?' % ', '.join(c[0] for c in RMF_COL), (name,)
+        ).fetchone()
+        if row is None: return None
+        return dict(zip([c[0] for c in RMF_COL], row))
+
+    def put(self, name, **values):
+        """PUT() updates (or adds) the record of a run."""
+        record = self.get(name)
+        if record is None:
+            record = dict((c[0], None) for c in RMF_COL)
+            record['name'] = name
+            record['attempts'] = 0
+        record.update(values)
+        columns = [c[0] for c in RMF_COL]
+        self.db.execute(
+            'INSERT OR REPLACE INTO runs (%s) VALUES (%s)' % (
+                ', '.join(columns), ', '.join('?' for c in columns)
+            ), [record[c] for c in columns]
+        )
+        self.db.commit()
+        return record
+
+    def job_hash(self, job):
+        """
+        JOB_HASH() returns a SHA-1 hash of a job's command and the contents
+        of its input files (see job_backends.InputStore)
+        """
+        import hashlib
+        from job_backends import InputStore
+        if self.store is None: self.store = InputStore()
+        name, command, inputs = job
+        h = hashlib.sha1()
+        h.update(command)
+        for f in inputs: h.update(self.store.hash(f))
+        return h.hexdigest()
+
+    def completed(self, name, inputHash):
+        """
+        COMPLETED() returns the kept results GDX of a run that succeeded with
+        the same input hash, or None
+        """
+        import os
+        record = self.get(name)
+        if record is None: return None
+        if (record['status'] <> RMF_STA_DON) or (record['input_hash'] <> inputHash): return None
+        if (record['output'] is None) or (not os.path.exists(record['output'])): return None
+        return record['output']
+
+    def submitted(self, name, inputHash, features=None):
+        """
+        SUBMITTED() records that a run has been submitted, which starts its
+        count of attempts again, with its size [features] if given
+        """
+        import json, time
+        if features is not None: features = json.dumps(features, sort_keys=True)
+        self.db.execute('DELETE FROM solves WHERE name = ?', (name,))
+        self.put(
+            name, input_hash=inputHash, status=RMF_STA_SUB, attempts=0,
+            submitted=time.time(), features=features, solver=None, stop_reason=None
+        )
+
+    def retry(self, name, state, code, workdir):
+        """
+        RETRY() records a finished attempt of a run and returns the seconds
+        to wait before retrying it, or None if the run succeeded or is out
+        of attempts. An attempt succeeds if the job ended normally with
+        return code 0 and left a results GDX, which is then kept. This is
+        the retry function of job_backends.run_jobs().
+        """
+        import os, shutil, socket, time
+        from job_backends import JOB_STA_DON, JOB_CLU_OUT
+        from solver_telemetry import run_telemetry
+        from gams_runner import GRN_WIN, GRN_STP
+        results = os.path.join(workdir, self.results) if workdir else ''
+        ok = (state == JOB_STA_DON) and (code == 0) and os.path.exists(results)
+
+        # the host, from the first line (hostname) written by cluster jobs
+        host = None
+        out = os.path.join(workdir, JOB_CLU_OUT) if workdir else ''
+        if os.path.exists(out):
+            with open(out, 'r') as fh: host = fh.readline().strip() or None
+        elif ok: host = socket.gethostname()
+
+        record = self.get(name) or {'attempts': 0}
+        attempts = (record['attempts'] or 0) + 1
+        values = {'attempts': attempts, 'host': host, 'code': code, 'finished': time.time()}
+        winFile = os.path.join(workdir, GRN_WIN) if workdir else ''
+        if os.path.exists(winFile):
+            with open(winFile, 'r') as fh: values['solver'] = fh.read().strip() or None
+        stopFile = os.path.join(workdir, GRN_STP) if workdir else ''
+        values['stop_reason'] = None
+        if os.path.exists(stopFile):
+            with open(stopFile, 'r') as fh: values['stop_reason'] = fh.read().strip() or None
+        solves = run_telemetry(workdir) if workdir else []
+        self.put_solves(name, attempts, solves)
+        if ok:
+            if not os.path.exists(self.outdir): os.makedirs(self.outdir)
+            output = os.path.join(self.outdir, name + os.path.splitext(self.results)[1])
+            shutil.copy2(results, output)
+            record = self.put(name, status=RMF_STA_DON, output=output, **values)
+
+            # the run time, from the telemetry if there is any
+            seconds = sum((r['wall_seconds'] or r['solve_seconds'] or 0.) for r in solves)
+            if (seconds <= 0) and (record['submitted'] is not None):
+                seconds = record['finished'] - record['submitted']
+            self.db.execute(
+                'INSERT OR REPLACE INTO history (%s) VALUES (?, ?, ?, ?, ?)' % ', '.join(c[0] for c in RMF_HIS),
+                (record['input_hash'], record['features'], seconds, record['finished'], record['solver'])
+            )
+            self.db.commit()
+            return None
+        self.put(name, status=RMF_STA_FAI, output=None, **values)
+        if attempts >= self.tries:
+            print 'Run %s failed %i times (%s, return code %s). Giving up.' % (name, attempts, state, code)
+            return None
+        delay = self.backoff * 2**(attempts - 1)
+        print 'Run %s failed (%s, return code %s). Retrying in %.0f s.' % (name, state, code, delay)
+        return delay
+
+    def put_solves(self, name, attempt, records):
+        """
+        PUT_SOLVES() keeps the solve records (see solver_telemetry.py) of an
+        attempt of a run
+        """
+        columns = [c[0] for c in RMF_SOL]
+        for record in records:
+            record = dict(record, name=name, attempt=attempt)
+            self.db.execute(
+                'INSERT OR REPLACE INTO solves (%s) VALUES (%s)' % (
+                    ', '.join(columns), ', '.join('?' for c in columns)
+                ), [record.get(c) for c in columns]
+            )
+        self.db.commit()
+
+    def solves(self, name=None):
+        """
+        SOLVES() returns the solve records of a run (or of all runs if name
+        is None) as dictionaries, ordered by run, attempt and stage
+        """
+        columns = [c[0] for c in RMF_SOL]
+        query = 'SELECT %s FROM solves' % ', '.join(columns)
+        if name is None: rows = self.db.execute(query + ' ORDER BY name, attempt, stage')
+        else: rows = self.db.execute(query + ' WHERE name = ? ORDER BY attempt, stage', (name,))
+        return [dict(zip(columns, row)) for row in rows.fetchall()]
+
+    def history(self):
+        """
+        HISTORY() returns (input hash, size features, seconds) of the runs
+        that succeeded, in this and earlier sweeps, where features is a
+        dictionary (None if the run had none)
+        """
+        import json
+        rows = self.db.execute('SELECT input_hash, features, seconds FROM history').fetchall()
+        return [(h, None if f is None else json.loads(f), t) for h, f, t in rows]
+
+    def winners(self):
+        """
+        WINNERS() returns {solver: number of solver races won} over the
+        history of runs (see gams_runner.race())
+        """
+        return dict(self.db.execute(
+            'SELECT solver, COUNT(*) FROM history WHERE solver IS NOT NULL GROUP BY solver'
+        ).fetchall())
+
+    def summary(self):
+        """SUMMARY() returns {status: number of runs}."""
+        return dict(self.db.execute('SELECT status, COUNT(*) FROM runs GROUP BY status').fetchall())
@@ -0,0 +1,146 @@
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+# Description:
+#       This script predicts how long the GAMS runs of a sweep take to solve
+#   and orders them longest first, so that run_gams.run() does not leave a
+#   long run at the end of a sweep on an otherwise idle pool (longest
+#   processing time first list scheduling). Predictions use the size
+#   features make_gdx.py writes for each GDX (see make_gdx.run_features())
+#   and the run times of earlier sweeps kept in the history table of the
+#   run manifest (see run_manifest.py). Runs whose inputs were solved
+#   before get their measured time. Otherwise a log-linear model of the
+#   features is fit to the history. With too little history, fixed
+#   coefficients only rank the runs. Predictions only order the runs
+#   unless time limits are asked for, and a limit is never shorter than
+#   the time the model's own solves may take (SCH_RES x SCH_SLV).
+
+# fit_costs(), predict_seconds()
+SCH_COF = ('constant', 'candidates', 'size', 'tightness', 'hardness', 'scenarios')
+SCH_DEF_COF = (0., 1., 0.5, 0., 2., 1.) # rank runs before there is history
+SCH_MIN_FIT = 10 # runs of history needed to fit the model
+SCH_RDG = 1. # ridge penalty pulling the fit towards SCH_DEF_COF
+
+# plan_jobs()
+SCH_DEF_MAR = None # time limit of a run as a multiple of its predicted time, None for no limits
+SCH_RES = 3600 # reslim of each solve in the models
+SCH_SLV = 4 # solves per run (three Gurobi and one CPLEX)
+
+
+
+# ~~ design() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def design(features):
+    """
+    DESIGN() returns the SCH_COF terms of the cost model for a run's size
+    features: log candidates, log (barriers x guilds) for the size of the
+    passability constraints, the budget tightness (capped at 1), the
+    hardness 4t(1 - t) that peaks when half of the candidate cost can be
+    afforded, and log scenarios
+    """
+    import math
+    from make_gdx import FEA_CAN, FEA_NBR, FEA_GLD, FEA_TGT, FEA_SCN
+    tightness = min(1., max(0., features.get(FEA_TGT, 1.)))
+    return [
+        1.,
+        math.log1p(features.get(FEA_CAN, 0)),
+        math.log1p(features.get(FEA_NBR, 0) * max(1, features.get(FEA_GLD, 1))),
+        tightness,
+        4. * tightness * (1. - tightness),
+        math.log(max(1, features.get(FEA_SCN, 1))),
+    ]
+
+
+
+# ~~ fit_costs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def fit_costs(history):
+    """
+    FIT_COSTS() fits the log run time of past runs to their size features
+    by ridge regression (towards SCH_DEF_COF)
+
+    INPUTS:
+        history     = list of (input hash, features, seconds) as returned by
+            RunManifest.history()
+
+    OUTPUTS:
+        NumPy array of SCH_COF coefficients, or None if fewer than
+        SCH_MIN_FIT past runs have features and a run time
+    """
+    import numpy
+    rows = [(design(f), t) for h, f, t in history if (f is not None) and (t is not None) and (t > 0)]
+    if len(rows) < SCH_MIN_FIT: return None
+    X = numpy.array([r[0] for r in rows])
+    y = numpy.log([r[1] for r in rows])
+    penalty = SCH_RDG * numpy.eye(len(SCH_COF))
+    return numpy.linalg.solve(
+        X.T.dot(X) + penalty, X.T.dot(y) + penalty.dot(numpy.array(SCH_DEF_COF))
+    )
+
+
+
+# ~~ predict_seconds() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def predict_seconds(features, coefficients=SCH_DEF_COF):
+    """PREDICT_SECONDS() returns the predicted run time of a run."""
+    import math
+    return math.exp(sum(c*x for c, x in zip(coefficients, design(features))))
+
+
+
+# ~~ plan_jobs() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def plan_jobs(jobs, features, hashes=None, history=(), margin=SCH_DEF_MAR):
+    """
+    PLAN_JOBS() orders jobs longest predicted run time first, and gives them
+    time limits if [margin] is set
+
+    INPUTS:
+        jobs        = list of (name, command, inputs) (see job_backends.py)
+        features    = {job name: size features}. Jobs without features are
+            put last, in their order.
+        hashes      = (optional) {job name: input hash} (see
+            RunManifest.job_hash()), to find jobs solved before in
+            [history]. Default is None.
+        history     = (optional) list of (input hash, features, seconds) of
+            past runs, as returned by RunManifest.history(). Default is no
+            history.
+        margin      = (optional) time limit of a job as a multiple of its
+            predicted run time, or None for no limits. Limits are floored at
+            SCH_RES x SCH_SLV seconds (per scenario), so a job is not
+            stopped before its solves could reach their own reslim. Default
+            is SCH_DEF_MAR.
+
+    OUTPUTS:
+        (ordered jobs, {job name: time limit in seconds}) where there are
+        time limits only if [margin] is set, for the jobs whose run time
+        was measured before or could be predicted by a model fit to the
+        history
+    """
+    from make_gdx import FEA_SCN
+
+    if hashes is None: hashes = {}
+    measured = dict((h, t) for h, f, t in history if (t is not None) and (t > 0))
+    coefficients = fit_costs(history)
+    if coefficients is not None:
+        print 'Predicting run times from %i past runs.' % len(measured)
+
+    # predicted seconds, and a ranking by the fixed coefficients for when
+    #   some jobs have neither a measured nor a fitted run time
+    seconds = {}
+    ranks = {}
+    for job in jobs:
+        name = job[0]
+        if name in features: ranks[name] = predict_seconds(features[name])
+        if hashes.get(name, None) in measured:
+            seconds[name] = measured[hashes[name]]
+        elif (name in features) and (coefficients is not None):
+            seconds[name] = predict_seconds(features[name], coefficients)
+    if all(name in seconds for name in ranks): keys = seconds
+    else: keys = ranks
+    order = sorted(
+        range(len(jobs)),
+        key=lambda i: (jobs[i][0] not in keys, -keys.get(jobs[i][0], 0.), i)
+    )
+    limits = {}
+    if margin is not None:
+        for name, t in seconds.iteritems():
+            solves = SCH_SLV * max(1, features.get(name, {}).get(FEA_SCN, 1))
+            limits[name] = max(margin*t, SCH_RES*solves)
+    return ([jobs[i] for i in order], limits)
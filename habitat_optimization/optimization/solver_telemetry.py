@@ -0,0 +1,194 @@
+# Created 10/19/2026
+# Updated 10/19/2026
+# Python version: 2.7.8
+# Description:
+#       This script reads the solver telemetry of a GAMS run from the files
+#   GAMS leaves in the run's directory: the listing (.lst), which has the
+#   model statistics and a solve summary for each solve, and the log (.log,
+#   written because run_gams.py calls GAMS with lo=4), which has the wall
+#   time of each solve and the branch-and-bound node counts. Each solve of
+#   the model (e.g. the three Gurobi solves and the CPLEX solve of
+#   Habitat_Opt.gms) becomes one record, which run_manifest.py keeps in its
+#   solves table. telemetry_csv() writes the records of a manifest to a CSV
+#   to compare where the time goes across sweeps.
+
+# solve records
+TEL_COL = ( # fields of a solve record, in CSV order
+    'stage', 'solver', 'solver_status', 'model_status', 'objective',
+    'best_bound', 'gap', 'solve_seconds', 'wall_seconds', 'generation_seconds',
+    'iterations', 'nodes', 'rows', 'columns', 'nonzeros', 'discrete',
+    'memory_mb'
+)
+TEL_EXT_LST = '.lst'
+TEL_EXT_LOG = '.log'
+
+# parse_listing()
+TEL_LST_SUM = 'S O L V E      S U M M A R Y'
+TEL_LST_STA = 'MODEL STATISTICS'
+TEL_LST_PAT = ( # (field, pattern, type) read from the listing
+    ('rows', r'SINGLE EQUATIONS\s+([\d,]+)', int),
+    ('columns', r'SINGLE VARIABLES\s+([\d,]+)', int),
+    ('nonzeros', r'NON ZERO ELEMENTS\s+([\d,]+)', int),
+    ('discrete', r'DISCRETE VARIABLES\s+([\d,]+)', int),
+    ('generation_seconds', r'GENERATION TIME\s+=\s+([\d.]+)', float),
+    ('memory_mb', r'GENERATION TIME\s+=\s+[\d.]+\s+SECONDS\s+(\d+)\s+MB', float),
+    ('solver', r'SOLVER\s+(\S+)', str),
+    ('solver_status', r'\*\*\*\* SOLVER STATUS\s+(\d+)', int),
+    ('model_status', r'\*\*\*\* MODEL STATUS\s+(\d+)', int),
+    ('objective', r'\*\*\*\* OBJECTIVE VALUE\s+(\S+)', float),
+    ('solve_seconds', r'RESOURCE USAGE, LIMIT\s+([\d.]+)', float),
+    ('iterations', r'ITERATION COUNT, LIMIT\s+(\d+)', int),
+    ('best_bound', r'Best possible\s*:\s*(\S+)', float),
+    ('gap', r'Relative gap\s*:\s*(\S+)', float),
+    ('nodes', r'iterations, (\d+) nodes\)', int),
+)
+
+# parse_log()
+TEL_LOG_EXE = r'--- Executing (\S+)(?:\s*\(.*?\))?: elapsed (\d+):(\d+):([\d.]+)' # e.g. GUROBI (Solvelink=0)
+TEL_LOG_AFT = r'--- Executing after solve: elapsed (\d+):(\d+):([\d.]+)'
+TEL_LOG_NOD = ( # node counts printed by the solvers
+    r'Explored (\d+) nodes', # Gurobi
+    r'iterations, (\d+) nodes\)', # GAMS/CPLEX summary
+)
+
+
+
+# ~~ parse_listing() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def parse_listing(lstFile):
+    """
+    PARSE_LISTING() reads a GAMS listing file and returns a list of solve
+    records (dictionaries with some of the TEL_COL fields), one per solve
+    summary, in solve order. The model statistics printed before a solve
+    summary belong to that solve.
+    """
+    import re
+    with open(lstFile, 'r') as fh: text = fh.read()
+
+    # each solve is its solve summary and solver output, plus the model
+    #   statistics before it
+    parts = text.split(TEL_LST_SUM)
+    records = []
+    for i in xrange(1, len(parts)):
+        before = parts[i-1]
+        if TEL_LST_STA in before: before = before[before.rindex(TEL_LST_STA):]
+        else: before = ''
+        record = {}
+        for field, pattern, kind in TEL_LST_PAT:
+            match = re.search(pattern, before + parts[i].split(TEL_LST_STA)[0])
+            if match is None: continue
+            try: record[field] = kind(match.group(1).replace(',', ''))
+            except ValueError: pass
+        records.append(record)
+    return records
+
+
+
+# ~~ solve_start() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def solve_start(line):
+    """
+    SOLVE_START() returns (solver, elapsed seconds) if [line] is the log line
+    GAMS writes when it hands a model to a solver, else None. Run the
+    examples with python -m doctest solver_telemetry.py
+    
+    >>> solve_start('--- Executing GUROBI (Solvelink=0): elapsed 0:00:01.250')
+    ('GUROBI', 1.25)
+    >>> solve_start('--- Executing CPLEX: elapsed 1:02:03.500')
+    ('CPLEX', 3723.5)
+    >>> solve_start('--- Executing after solve: elapsed 0:00:02.000') is None
+    True
+    """
+    import re
+    match = re.search(TEL_LOG_EXE, line)
+    if match is None: return None
+    h, m, s = match.groups()[1:]
+    return (match.group(1), int(h)*3600 + int(m)*60 + float(s))
+
+
+
+# ~~ parse_log() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def parse_log(logFile):
+    """
+    PARSE_LOG() reads a GAMS log file and returns a list of solve records
+    with the solver, the wall time between GAMS handing the model to the
+    solver and reading the solution back (wall_seconds) and the node count,
+    in solve order
+    """
+    import re
+    records = []
+    record = None
+    with open(logFile, 'r') as fh:
+        for line in fh:
+            start = solve_start(line)
+            if start is not None:
+                record = {'solver': start[0], 'start': start[1]}
+                records.append(record)
+                continue
+            if record is None: continue
+            match = re.search(TEL_LOG_AFT, line)
+            if match is not None:
+                h, m, s = match.groups()
+                record['wall_seconds'] = int(h)*3600 + int(m)*60 + float(s) - record['start']
+                record = None
+                continue
+            for pattern in TEL_LOG_NOD:
+                match = re.search(pattern, line)
+                if match is not None: record['nodes'] = int(match.group(1))
+    for record in records: record.pop('start')
+    return records
+
+
+
+# ~~ run_telemetry() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def run_telemetry(workdir):
+    """
+    RUN_TELEMETRY() returns the solve records of the GAMS run in [workdir],
+    joining the records of its listing and log (if any) in solve order.
+    Each record has every TEL_COL field, with None where the field was not
+    found, and stage is the position of the solve (1 for the first). Runs
+    that left no listing have no records.
+    """
+    from glob import glob
+    import os
+    records = []
+    for lstFile in sorted(glob(os.path.join(workdir, '*' + TEL_EXT_LST))):
+        fromList = parse_listing(lstFile)
+        logFile = os.path.splitext(lstFile)[0] + TEL_EXT_LOG
+        fromLog = parse_log(logFile) if os.path.exists(logFile) else []
+        for i in xrange(max(len(fromList), len(fromLog))):
+            record = dict((k, None) for k in TEL_COL)
+            if i < len(fromLog): record.update(fromLog[i])
+            if i < len(fromList):
+                record.update((k, v) for k, v in fromList[i].iteritems() if v is not None)
+            record['stage'] = len(records) + 1
+            records.append(record)
+    return records
+
+
+
+# ~~ telemetry_csv() ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def telemetry_csv(manifest, outfile):
+    """
+    TELEMETRY_CSV() writes the solve records kept in a run manifest (a
+    RunManifest or the path of its database) to a CSV, one row per solve
+    of each attempt of each run, and returns the CSV path
+    """
+    import csv
+    from run_manifest import RunManifest, RMF_SOL
+    own = isinstance(manifest, basestring)
+    if own: manifest = RunManifest(manifest)
+    try:
+        columns = [c[0] for c in RMF_SOL]
+        with open(outfile, 'wb') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(columns)
+            for record in manifest.solves():
+                writer.writerow(['' if record[k] is None else record[k] for k in columns])
+    finally:
+        if own: manifest.close()
+    return outfile
+
+
+
+if __name__ == '__main__':
+    import sys
+    print telemetry_csv(sys.argv[1], sys.argv[2])